@@ -6,6 +6,7 @@ Callbacks that might be useful at the APS using BlueSky
    
    ~document_contents_callback
    ~DocumentCollectorCallback
+   ~PeakStatistics
    ~SnapshotReport
 
 FILE WRITER CALLBACK
@@ -26,9 +27,12 @@ see :class:`SpecWriterCallback()`
 
 import datetime
 import logging
+import numpy as np
 import pyRestTable
 from bluesky.callbacks.core import CallbackBase
 
+from .signals import pseudo_voigt
+
 
 logger = logging.getLogger(__name__).addHandler(logging.NullHandler())
 
@@ -97,6 +101,246 @@ class DocumentCollectorCallback(object):
         return
 
 
+def _least_squares(func, x, y, p0, max_iterations=100, tolerance=1e-9):
+    """
+    Levenberg-Marquardt minimization of ``sum((y - func(x, p))**2)``
+
+    The Jacobian is evaluated numerically, one (vectorized) model
+    evaluation per parameter.  Returns ``(p, chisqr)``.
+    """
+    p = np.array(p0, dtype=float)
+    r = y - func(x, p)
+    chisqr = r @ r
+    damping = 1e-3
+    for _ in range(max_iterations):
+        h = 1e-7 * np.maximum(np.abs(p), 1)
+        f0 = y - r
+        J = np.column_stack([
+            (func(x, p + h[k]*np.eye(len(p))[k]) - f0) / h[k]
+            for k in range(len(p))
+        ])
+        A = J.T @ J
+        g = J.T @ r
+        improved = False
+        while damping < 1e10:
+            M = A + damping * np.diag(np.diag(A) + 1e-12)
+            dp = np.linalg.lstsq(M, g, rcond=None)[0]
+            r_new = y - func(x, p + dp)
+            chisqr_new = r_new @ r_new
+            if chisqr_new < chisqr:
+                improved = True
+                break
+            damping *= 10
+        if not improved:
+            break
+        converged = (chisqr - chisqr_new) <= tolerance * chisqr
+        p, r, chisqr = p + dp, r_new, chisqr_new
+        damping /= 10
+        if converged:
+            break
+    return p, chisqr
+
+
+class PeakStatistics(CallbackBase):
+    """
+    BlueSky callback: peak statistics computed with NumPy array operations
+    
+    Computes the same statistics as bluesky's ``PeakStats`` 
+    (``cen``, ``com``, ``fwhm``, ``min``, ``max``, ``crossings``)
+    and can also fit a peak shape to the data.
+    Data are kept in NumPy arrays that grow in blocks.  Running sums 
+    (for ``com``) and the ``min`` and ``max`` are updated with each point,
+    the remaining statistics are computed by :meth:`compute()`
+    (called automatically at the end of the run).
+    
+    PARAMETERS
+    
+    x : str
+        name of the independent (positioner) field
+    y : str
+        name of the dependent (detector) field
+    stream : str
+        (default: ``"primary"``)
+        name of the document stream with the data
+    
+    EXAMPLE::
+    
+        stats = PeakStatistics("m1", "noisy")
+        RE(bp.scan([noisy], m1, -1, 1, 31), stats)
+        print(stats.cen, stats.fwhm)
+        print(stats.fit("gaussian"))
+    
+    .. autosummary::
+       
+       ~append
+       ~compute
+       ~fit
+       ~reset
+
+    """
+    
+    _block_size_ = 256
+    fit_shapes = "gaussian lorentzian pseudovoigt".split()
+    
+    def __init__(self, x, y, stream="primary"):
+        super().__init__()
+        self.x = x
+        self.y = y
+        self.stream = stream
+        self.reset()
+    
+    def reset(self):
+        """clear all data and statistics"""
+        self._x = np.empty(self._block_size_)
+        self._y = np.empty(self._block_size_)
+        self._n = 0
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+        self._i_min = None
+        self._i_max = None
+        self._descriptors = set()
+        self.cen = None
+        self.com = None
+        self.fwhm = None
+        self.min = None
+        self.max = None
+        self.crossings = None
+        self.fitted = None
+    
+    @property
+    def x_data(self):
+        """positioner values (as received)"""
+        return self._x[:self._n]
+    
+    @property
+    def y_data(self):
+        """detector values (as received)"""
+        return self._y[:self._n]
+    
+    def append(self, x, y):
+        """add one (x, y) point, update running statistics"""
+        n = self._n
+        if n == len(self._x):
+            self._x = np.concatenate((self._x, np.empty(self._block_size_)))
+            self._y = np.concatenate((self._y, np.empty(self._block_size_)))
+        self._x[n] = x
+        self._y[n] = y
+        self._n += 1
+        self._sum_y += y
+        self._sum_xy += x * y
+        if self._i_min is None or y < self._y[self._i_min]:
+            self._i_min = n
+        if self._i_max is None or y > self._y[self._i_max]:
+            self._i_max = n
+        self.min = self._x[self._i_min], self._y[self._i_min]
+        self.max = self._x[self._i_max], self._y[self._i_max]
+        if self._sum_y != 0:
+            self.com = self._sum_xy / self._sum_y
+
+    def start(self, doc):
+        self.reset()
+        super().start(doc)
+    
+    def descriptor(self, doc):
+        if doc.get("name", "primary") == self.stream:
+            self._descriptors.add(doc["uid"])
+        super().descriptor(doc)
+    
+    def event(self, doc):
+        if doc["descriptor"] in self._descriptors:
+            data = doc["data"]
+            if self.x in data and self.y in data:
+                self.append(data[self.x], data[self.y])
+        super().event(doc)
+    
+    def stop(self, doc):
+        self.compute()
+        super().stop(doc)
+    
+    def compute(self):
+        """
+        (re)compute the statistics from all points received
+        
+        Sort by ``x``, then find where the data cross the half-height 
+        (between ``min`` and ``max``) by linear interpolation,
+        all as array operations.
+        """
+        if self._n == 0:
+            return
+        order = np.argsort(self.x_data, kind="stable")
+        x = self.x_data[order]
+        y = self.y_data[order]
+
+        mid = (self.max[1] + self.min[1]) / 2
+        above = y > mid
+        i = np.nonzero(above[1:] != above[:-1])[0]
+        x0, x1 = x[i], x[i+1]
+        y0, y1 = y[i] - mid, y[i+1] - mid
+        crossings = x0 - y0 * (x1 - x0) / (y1 - y0)
+        if len(crossings) > 0:
+            self.crossings = crossings
+            self.cen = crossings.mean()
+            if len(crossings) >= 2:
+                self.fwhm = abs(crossings[-1] - crossings[0])
+    
+    def fit(self, shape="pseudovoigt"):
+        """
+        least-squares fit of a peak shape to the data
+        
+        Fits ``y = background + height * profile(x)`` where ``profile``
+        is the peak-normalized :func:`~apstools.signals.pseudo_voigt`, 
+        as simulated by :class:`~apstools.signals.SynPseudoVoigt`
+        (with ``scale=height`` and ``bkg=background/height``).
+        
+        PARAMETERS
+        
+        shape : str
+            one of ``gaussian`` (``eta=0``), ``lorentzian`` (``eta=1``),
+            or ``pseudovoigt`` (``eta`` is fitted)
+        
+        Returns a dictionary with the fitted ``center``, ``sigma``, 
+        ``eta``, ``height``, ``background``, and ``chisqr``,
+        (also available as ``self.fitted``) 
+        or ``None`` if there are not enough points to fit.
+        """
+        if shape not in self.fit_shapes:
+            msg = "shape must be one of {}, received {}"
+            raise ValueError(msg.format(self.fit_shapes, shape))
+        eta_fixed = dict(gaussian=0.0, lorentzian=1.0).get(shape)
+        n_params = 4 if eta_fixed is not None else 5
+        if self._n <= n_params:
+            return None
+        
+        self.compute()
+        x = self.x_data
+        y = self.y_data
+        center = self.max[0] if self.cen is None else self.cen
+        if self.fwhm:
+            sigma = self.fwhm / 2.2
+        else:
+            sigma = (x.max() - x.min()) / 4 or 1
+        height = self.max[1] - self.min[1]
+        p0 = [center, sigma, height, self.min[1]]
+        if eta_fixed is None:
+            p0.append(0.5)
+        
+        def model(x, p):
+            eta = eta_fixed if eta_fixed is not None else np.clip(p[4], 0, 1)
+            return p[3] + p[2] * pseudo_voigt(x, p[0], abs(p[1]) or 1e-30, eta)
+
+        p, chisqr = _least_squares(model, x, y, p0)
+        self.fitted = dict(
+            shape = shape,
+            center = p[0],
+            sigma = abs(p[1]),
+            eta = eta_fixed if eta_fixed is not None else float(np.clip(p[4], 0, 1)),
+            height = p[2],
+            background = p[3],
+            chisqr = chisqr,
+            )
+        return self.fitted
+
+
 class SnapshotReport(CallbackBase):
     """
     show the data from a ``apstools.plans.snapshot()``
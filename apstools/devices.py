@@ -17,6 +17,8 @@ AREA DETECTOR SUPPORT
    
     ~AD_setup_FrameType
     ~AD_warmed_up
+    ~AD_prime_plugin
+    ~AD_warm_up_detectors
     ~AD_EpicsHdf5FileName
 
 DETECTOR / SCALER SUPPORT
@@ -24,6 +26,7 @@ DETECTOR / SCALER SUPPORT
 .. autosummary::
    
     ~Struck3820
+    ~Struck3820Flyer
     ~use_EPICS_scaler_channels
 
 MOTORS, POSITIONERS, AXES, ...
@@ -50,6 +53,7 @@ SHUTTERS
     ~EpicsOnOffShutter
     ~OneSignalShutter
     ~ShutterBase
+    ~ShutterGroup
     ~SimulatedApsPssShutterWithStatus
 
 synApps records
@@ -96,11 +100,13 @@ Internal routines
 
 
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import epics
 import itertools
 import logging
 import numpy as np
+import queue
 import threading
 import time
 
@@ -119,6 +125,7 @@ from ophyd.areadetector.filestore_mixins import FileStoreBase
 from ophyd.areadetector.filestore_mixins import FileStorePluginBase
 from ophyd.areadetector.filestore_mixins import FileStoreIterativeWrite
 from ophyd import HDF5Plugin
+from ophyd.status import wait as status_wait
 from ophyd.utils import set_and_wait
 
 from bluesky import plan_stubs as bps
@@ -130,29 +137,62 @@ logger = logging.getLogger(__name__)
 SCALER_AUTOCOUNT_MODE = 1
 
 
-def use_EPICS_scaler_channels(scaler):
+_scaler_channels_cache = {}     # {prefix: {channel: name}}
+
+
+def _scaler_channel_names(scaler, timeout=2.0, refresh=False):
+    """
+    (internal) EPICS names of all channels, ``{channel: name}``
+    
+    All the names are read in one concurrent CA request.
+    Cached by scaler prefix, unless a name could not be read.
+    """
+    if not refresh and scaler.prefix in _scaler_channels_cache:
+        return _scaler_channels_cache[scaler.prefix]
+
+    channels = scaler.channels.component_names
+    pvlist = [
+        "{}.NM{}".format(scaler.prefix, int(ch[4:])) 
+        for ch in channels]
+    values = epics.caget_many(
+        pvlist, as_string=True, timeout=timeout, connection_timeout=timeout)
+
+    names = OrderedDict()
+    for ch, pvname, value in zip(channels, pvlist, values):
+        if value is None:
+            logger.warning("%s: could not read %s", scaler.name, pvname)
+            value = ""
+        names[ch] = value.strip()
+    if None not in values:
+        _scaler_channels_cache[scaler.prefix] = names
+    return names
+
+
+def use_EPICS_scaler_channels(scaler, timeout=2.0, refresh=False):
     """
     configure scaler for only the channels with names assigned in EPICS
     
+    The channel names are read in one (concurrent) CA request,
+    waiting up to ``timeout`` seconds, and remembered (by scaler 
+    prefix) for the next call.  Use ``refresh=True`` to read them again
+    (such as after the names are changed in EPICS).
+    
     Note: For `ScalerCH`, use `scaler.select_channels(None)` instead of this code.
     (Applies only to `ophyd.scaler.ScalerCH` in releases after 2019-02-27.)
     """
     if isinstance(scaler, EpicsScaler):
-        import epics
-        read_attrs = []
-        for ch in scaler.channels.component_names:
-            _nam = epics.caget("{}.NM{}".format(scaler.prefix, int(ch[4:])))
-            if len(_nam.strip()) > 0:
-                read_attrs.append(ch)
+        names = _scaler_channel_names(scaler, timeout=timeout, refresh=refresh)
+        read_attrs = [ch for ch, nm in names.items() if len(nm) > 0]
         scaler.channels.read_attrs = read_attrs
     elif isinstance(scaler, ScalerCH):
 	# superceded by: https://github.com/NSLS-II/ophyd/commit/543e7ef81f3cb760192a0de719e51f9359642ae8
-        scaler.match_names()
+        names = _scaler_channel_names(scaler, timeout=timeout, refresh=refresh)
         read_attrs = []
         configuration_attrs = []
-        for ch in scaler.channels.component_names:
-            nm_pv = scaler.channels.__getattribute__(ch)
-            if nm_pv is not None and len(nm_pv.chname.value.strip()) > 0:
+        for ch, nm in names.items():
+            # same as scaler.match_names() without a CA get per channel
+            getattr(scaler.channels, ch).s.name = nm
+            if len(nm) > 0:
                 read_attrs.append(ch)
                 configuration_attrs.append(ch)
                 configuration_attrs.append(ch+".chname")
@@ -198,9 +238,19 @@ class ApsMachineParametersDevice(Device):
         sd = SupplementalData()
         RE.preprocessors.append(sd)
 
+    To avoid a CA get on every use (such as frequent checks of 
+    ``inUserOperations``, reads of the baseline, or dashboards), 
+    keep a table of the latest values from CA monitors::
+
+        APS.enable_cache(max_age_s=60)
+        print(APS.snapshot())   # all values, as from one read()
+
     .. autosummary::
     
         ~inUserOperations
+        ~enable_cache
+        ~disable_cache
+        ~snapshot
    
 
     """
@@ -232,6 +282,120 @@ class ApsMachineParametersDevice(Device):
     global_feedback_h = Component(EpicsSignalRO, "SRFB:GBL:HLoopStatusBI", string=True)
     global_feedback_v = Component(EpicsSignalRO, "SRFB:GBL:VLoopStatusBI", string=True)
     operator_messages = Component(ApsOperatorMessagesDevice)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache = None          # {name: {"value": v, "timestamp": t}}
+        self._cache_updated = {}    # {name: time.time() when received}
+        self._cache_cids = []
+        self._cache_lock = threading.RLock()
+        self.cache_max_age_s = None
+
+    def enable_cache(self, max_age_s=None):
+        """
+        serve ``read()``, ``snapshot()``, and ``inUserOperations`` from CA monitors
+        
+        PARAMETERS
+        
+        max_age_s : float
+            A value not updated by its monitor within this time (s)
+            is read again (a CA get).  ``None`` (default): any 
+            value received from a monitor is used.
+        """
+        self.cache_max_age_s = max_age_s
+        if self._cache is not None:
+            return
+        self._cache = {}
+        self._cache_updated = {}
+        for walk in self.walk_signals():
+            signal = walk.item
+            cid = signal.subscribe(self._cache_cb)
+            self._cache_cids.append((signal, cid))
+
+    def disable_cache(self):
+        """read values by CA get (default)"""
+        for signal, cid in self._cache_cids:
+            signal.unsubscribe(cid)
+        self._cache_cids = []
+        self._cache = None
+
+    def _cache_cb(self, value=None, timestamp=None, obj=None, **kwargs):
+        """(internal) monitor callback: remember the latest value"""
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache[obj.name] = dict(value=value, timestamp=timestamp)
+                self._cache_updated[obj.name] = time.time()
+
+    def _cached_reading(self, signal):
+        """(internal) ``signal`` reading from the cache (or CA get if stale)"""
+        with self._cache_lock:
+            t_read = time.time()
+            if self._cache is not None and signal.name in self._cache:
+                age = t_read - self._cache_updated[signal.name]
+                if self.cache_max_age_s is None or age <= self.cache_max_age_s:
+                    return dict(self._cache[signal.name])
+        reading = signal.read()[signal.name]    # without holding the lock
+        self._update_cache({signal.name: reading}, t_read)
+        return reading
+
+    def _update_cache(self, readings, t_read):
+        """(internal) cache ``readings`` (CA gets started at ``t_read``)"""
+        with self._cache_lock:
+            if self._cache is None:
+                return
+            for name, reading in readings.items():
+                if self._cache_updated.get(name, 0) < t_read:
+                    # no newer monitor update arrived meanwhile
+                    self._cache[name] = dict(reading)
+                    self._cache_updated[name] = time.time()
+
+    def read(self):
+        """read the signals (from the cache if enabled)"""
+        if self._cache is None:
+            return super().read()
+        result = OrderedDict()
+        for attr in self.read_attrs:
+            signal = getattr(self, attr)
+            if not isinstance(signal, Device):
+                result[signal.name] = self._cached_reading(signal)
+        return result
+
+    def snapshot(self):
+        """
+        dictionary with the latest value and timestamp of all signals
+        
+        ``{name: {"value": value, "timestamp": timestamp}}``
+        
+        Taken all at once from the cache (if enabled, stale 
+        values are read again), otherwise by CA gets.
+        """
+        result = OrderedDict()
+        if self._cache is not None:
+            stale = []
+            with self._cache_lock:
+                t_snapshot = time.time()
+                for walk in self.walk_signals():
+                    signal = walk.item
+                    name = signal.name
+                    result[name] = None
+                    if self._cache is not None and name in self._cache:
+                        age = t_snapshot - self._cache_updated[name]
+                        if self.cache_max_age_s is None or age <= self.cache_max_age_s:
+                            result[name] = dict(self._cache[name])
+                            continue
+                    stale.append(signal)
+
+            # CA gets without holding the lock (monitors keep updating)
+            readings = {
+                signal.name: signal.read()[signal.name] 
+                for signal in stale}
+
+            result.update(readings)
+            self._update_cache(readings, t_snapshot)
+        else:
+            for walk in self.walk_signals():
+                result.update(walk.item.read())
+        return result
     
     @property
     def inUserOperations(self):
@@ -253,11 +417,69 @@ class ApsMachineParametersDevice(Device):
                 pass
 
         """
-        verdict = self.machine_status.value in (1, "USER OPERATIONS")
+        value = self._cached_reading(self.machine_status)["value"]
+        verdict = value in (1, "USER OPERATIONS")
         # verdict = verdict and self.operating_mode.value not in (5, "MAINTENANCE")
         return verdict
 
 
+class _ShutterMove(object):
+    """
+    one move of a shutter, started by :meth:`ShutterBase.set()`
+    
+    ``event`` wakes the thread waiting for the move to complete, 
+    either when the hardware reports the new position or when
+    the move is cancelled.
+    """
+
+    def __init__(self, target, status):
+        self.target = target        # "open" or "close"
+        self.status = status
+        self.cancelled = False
+        self.finished = False
+        self.event = threading.Event()
+        self.timer = None           # settling delay (delay_s)
+        self.t0 = time.time()
+
+    def cancel(self):
+        """stop waiting for this move"""
+        self.cancelled = True
+        self.event.set()
+        if self.timer is not None:
+            self.timer.cancel()
+
+    def wait_for(self, signal, predicate, timeout=None):
+        """
+        BLOCKING: wait until ``predicate()`` is True or move is cancelled
+        
+        ``predicate()`` is tested now and at each update of ``signal``.
+        Raises ``TimeoutError`` if not done within ``timeout`` (s).
+        """
+        def cb(*args, **kwargs):
+            if predicate():
+                self.event.set()
+
+        cid = signal.subscribe(cb)      # run=True: also tests now
+        try:
+            self.wait(timeout)
+        finally:
+            signal.unsubscribe(cid)
+
+    def wait_for_status(self, status, timeout=None):
+        """BLOCKING: wait until ``status`` is done or move is cancelled"""
+        status.add_callback(lambda *args, **kwargs: self.event.set())
+        if status.done:
+            self.event.set()
+        self.wait(timeout)
+
+    def wait(self, timeout=None):
+        """BLOCKING: wait for ``event``"""
+        if not self.event.wait(timeout):
+            msg = f"Timeout ({timeout} s) waiting for shutter"
+            msg += f" to {self.target}"
+            raise TimeoutError(msg)
+
+
 class ShutterBase(Device):
     """
     base class for all shutter Devices
@@ -288,6 +510,11 @@ class ShutterBase(Device):
         does not wait if shutter already in position
         (default = 0)
 
+    move_timeout_s : float
+        maximum time (s) to wait for the hardware to report
+        the new position, ``None`` waits forever
+        (default = None)
+
     busy : Signal
         (internal) tells if a move is in progress
 
@@ -295,6 +522,14 @@ class ShutterBase(Device):
         (constant) Text reported by ``state`` when not open or closed.
         cannot move to this position
         (default = "unknown")
+
+    A subclass implements ``state`` and either :meth:`_move()` 
+    (as the shutters in this module do) or the blocking 
+    :meth:`open()` and :meth:`close()` called by the default 
+    :meth:`_move()`.  Once :meth:`_move()` is overridden, ``set()`` 
+    no longer calls :meth:`open()` or :meth:`close()`:  in a subclass 
+    of :class:`OneSignalShutter` (for example), override :meth:`_move()` 
+    to change how the shutter is moved.
     """
 
     valid_open_values = ["open", "opened",]   # lower-case strings ONLY
@@ -302,13 +537,14 @@ class ShutterBase(Device):
     open_value = 1      # value of "open"
     close_value = 0     # value of "close"
     delay_s = 0.0       # time to wait (s) after move is complete
+    move_timeout_s = None   # time to wait (s) for hardware to report position
     busy = Component(Signal, value=False)
     unknown_state = "unknown"       # cannot move to this position
 
     # - - - - likely to override these methods in subclass - - - -
 
     def open(self):
-        """BLOCKING: request shutter to open, called by set()"""
+        """BLOCKING: request shutter to open, called by the default _move()"""
         raise NotImplementedError("must implement in subclass")
         """ example code
         if not self.isOpen:
@@ -318,7 +554,7 @@ class ShutterBase(Device):
         """
 
     def close(self):
-        """BLOCKING: request shutter to close, called by set()"""
+        """BLOCKING: request shutter to close, called by the default _move()"""
         raise NotImplementedError("must implement in subclass")
         """ example code
         if not self.isClosed:
@@ -347,6 +583,37 @@ class ShutterBase(Device):
         super().__init__(*args, **kwargs)
         self.valid_open_values = list(map(self.lowerCaseString, self.valid_open_values))
         self.valid_close_values = list(map(self.lowerCaseString, self.valid_close_values))
+        self._move_lock = threading.RLock()
+        self._active_move = None
+        # moves of this shutter run in order, in its own (daemon) thread,
+        # so a move waiting forever (move_timeout_s=None) does not
+        # keep the Python session from exiting
+        self._move_queue = queue.Queue()
+        self._move_thread = None
+        self.move_times = {}    # duration (s) of the last move to each target
+
+    def _move(self, move):
+        """
+        BLOCKING: move the shutter, called (in a thread) by set()
+        
+        Command the hardware to ``move.target`` ("open" or "close"),
+        then return when the hardware reports the new position 
+        (or when the move is cancelled: ``move.cancelled``).
+        
+        Returns the time (s) to wait after the move is complete.
+        
+        This default calls the blocking :meth:`open()` or
+        :meth:`close()`, which wait for ``delay_s`` themselves.
+        """
+        if move.target == "open":
+            self.open()
+        else:
+            self.close()
+        return 0
+
+    def _move_done(self, target):
+        """called after a move to ``target`` is complete"""
+        pass
     
     @property
     def isOpen(self):
@@ -372,6 +639,13 @@ class ShutterBase(Device):
         """
         plan: request the shutter to open or close
 
+        Returns a status which is done when the hardware reports 
+        the shutter is in position (and ``delay_s`` has passed).
+        The move runs in a thread of this shutter (calls :meth:`_move()`),
+        so several shutters move at the same time.  A new 
+        ``set()`` replaces a move in progress (that status fails),
+        :meth:`stop()` cancels it.
+
         PARAMETERS
         
         value : str
@@ -381,31 +655,99 @@ class ShutterBase(Device):
             ignored at this time
 
         """
-        if self.busy.value:
-            raise RuntimeError("shutter is operating")
-        
         __value__ = self.lowerCaseString(value)
         self.validTarget(__value__)
 
+        self._cancel_move()
         status = DeviceStatus(self)
         
         if self.inPosition(__value__):
             # no need to move, cut straight to the end
             status._finished(success=True)
+            return status
+
+        if __value__ in self.valid_open_values:
+            target = "open"
         else:
-            def move_it():
-                # runs in a thread, no need to "yield from"
-                self.busy.put(True)
-                if __value__ in self.valid_open_values:
-                    self.open()
-                elif __value__ in self.valid_close_values:
-                    self.close()
-                self.busy.put(False)
-                status._finished(success=True)
-            # get it moving
-            threading.Thread(target=move_it, daemon=True).start()
+            target = "close"
+        move = _ShutterMove(target, status)
+        with self._move_lock:
+            self._active_move = move
+            self.busy.put(True)
+            if self._move_thread is None:
+                self._move_thread = threading.Thread(
+                    target=self._move_worker, 
+                    name="shutter-" + self.name,
+                    daemon=True)
+                self._move_thread.start()
+        # get it moving
+        self._move_queue.put(move)
         return status
-    
+
+    def stop(self, *, success=False):
+        """cancel any move in progress"""
+        self._cancel_move()
+        super().stop(success=success)
+
+    def destroy(self):
+        """cancel any move in progress, end the thread of this shutter"""
+        self._cancel_move()
+        with self._move_lock:
+            if self._move_thread is not None:
+                self._move_queue.put(None)
+                self._move_thread = None
+        super().destroy()
+
+    def _move_worker(self):
+        """(internal) thread of this shutter: run its moves in order"""
+        while True:
+            move = self._move_queue.get()
+            if move is None:
+                return
+            self._run_move(move)
+
+    def _run_move(self, move):
+        """(internal) run one move, then wait ``delay_s`` with a timer"""
+        try:
+            delay_s = self._move(move)
+        except Exception as exc:
+            logger.error("%s: move to %s failed: %s", self.name, move.target, exc)
+            self._finish_move(move, success=False)
+            return
+        with self._move_lock:
+            if move.cancelled:
+                return
+            if delay_s > 0:
+                move.timer = threading.Timer(
+                    delay_s, self._finish_move, args=(move,))
+                move.timer.daemon = True
+                move.timer.start()
+                return
+        self._finish_move(move)
+
+    def _finish_move(self, move, success=True):
+        """(internal) mark ``move`` as complete"""
+        with self._move_lock:
+            if move.finished:
+                return
+            move.finished = True
+            if self._active_move is move:
+                self._active_move = None
+                self.busy.put(False)
+        if success:
+            self.move_times[move.target] = time.time() - move.t0
+            self._move_done(move.target)
+        move.status._finished(success=success)
+
+    def _cancel_move(self):
+        """(internal) cancel the move in progress (if any)"""
+        with self._move_lock:
+            move = self._active_move
+            if move is None:
+                return
+            move.cancel()
+        self._finish_move(move, success=False)
+
     # - - - - - - not likely to override in subclass - - - - - -
 
     def addCloseValue(self, text):
@@ -523,18 +865,24 @@ class OneSignalShutter(ShutterBase):
         return result
 
     def open(self):
-        """BLOCKING: request shutter to open, called by set()"""
-        if not self.isOpen:
-            self.signal.put(self.open_value)
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
+        """BLOCKING: request shutter to open, interactive use"""
+        status_wait(self.set("open"))
 
     def close(self):
-        """BLOCKING: request shutter to close, called by set()"""
-        if not self.isClosed:
+        """BLOCKING: request shutter to close, interactive use"""
+        status_wait(self.set("close"))
+
+    def _move(self, move):
+        """BLOCKING: put the new value, wait for ``signal`` to report it"""
+        if move.target == "open":
+            self.signal.put(self.open_value)
+        else:
             self.signal.put(self.close_value)
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
+        move.wait_for(
+            self.signal, 
+            lambda: self.inPosition(move.target), 
+            timeout=self.move_timeout_s)
+        return self.delay_s
 
 
 class ApsPssShutter(ShutterBase):
@@ -603,30 +951,29 @@ class ApsPssShutter(ShutterBase):
         return self.unknown_state   # no state info available
 
     def open(self, timeout=10):
-        """request the shutter to open (timeout is ignored)"""
-        if not self.isOpen:
-            self.open_signal.put(1)
-            
-            # wait for the shutter to move
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
-            
-            # reset that signal (if not done by EPICS)
-            if self.open_signal.value == 1:
-                self.open_signal.put(0)
+        """BLOCKING: request the shutter to open"""
+        status_wait(self.set("open"), timeout=timeout)
 
     def close(self, timeout=10):
-        """request the shutter to close (timeout is ignored)"""
-        if not self.isClosed:
+        """BLOCKING: request the shutter to close"""
+        status_wait(self.set("close"), timeout=timeout)
+
+    def _move(self, move):
+        """set the bit, then (set() will) wait ``delay_s`` for the shutter to move"""
+        if move.target == "open":
+            self.open_signal.put(1)
+        else:
             self.close_signal.put(1)
-            
-            # wait for the shutter to move
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
-            
-            # reset that signal (if not done by EPICS)
-            if self.close_signal.value == 1:
-                self.close_signal.put(0)
+        return self.delay_s
+
+    def _move_done(self, target):
+        """reset the bit (if not done by EPICS)"""
+        if target == "open":
+            signal = self.open_signal
+        else:
+            signal = self.close_signal
+        if signal.get() == 1:
+            signal.put(0)
 
 
 class ApsPssShutterWithStatus(ApsPssShutter):
@@ -673,29 +1020,67 @@ class ApsPssShutterWithStatus(ApsPssShutter):
     pss_state_closed_values = [0]
 
     delay_s = 0       # let caller add time after the move
-    
-    _poll_factor_ = 1.5
-    _poll_s_min_ = 0.002
-    _poll_s_max_ = 0.15
+    move_timeout_s = 10
+
+    _state_tables = None        # (open, closed) lookup sets
+    _state_enum_strs = None     # enum_strs used for _state_tables
+    _state_value = None         # last pss_state value from monitor
 
     def __init__(self, prefix, state_pv, *args, **kwargs):
         self.state_pv = state_pv
         super().__init__(prefix, *args, **kwargs)
+        self.pss_state.subscribe(
+            self._pss_state_meta_cb, 
+            event_type=self.pss_state.SUB_META, 
+            run=False)
+        self.pss_state.subscribe(self._pss_state_value_cb, run=False)
+
+    def _pss_state_meta_cb(self, enum_strs=None, connected=None, **kwargs):
+        """
+        rebuild the state lookup tables when enum_strs changes,
+        forget the last reported state on disconnect
+        """
+        if enum_strs is not None and tuple(enum_strs) != self._state_enum_strs:
+            self._state_tables = None
+        if connected is False:
+            self._state_value = None
+
+    def _pss_state_value_cb(self, value=None, **kwargs):
+        """remember the last reported state"""
+        self._state_value = value
+
+    @property
+    def state_tables(self):
+        """
+        (open, closed) : sets of ``pss_state`` values for open and closed
+        
+        Built (once) from ``pss_state_open_values``, 
+        ``pss_state_closed_values``, and the ``pss_state`` enum strings
+        (``enum_strs[1]`` is open, ``enum_strs[0]`` is closed).
+        """
+        if self._state_tables is None:
+            open_values = set(self.pss_state_open_values)
+            closed_values = set(self.pss_state_closed_values)
+            enum_strs = tuple(getattr(self.pss_state, "enum_strs", None) or ())
+            if len(enum_strs) > 1:
+                closed_values.add(enum_strs[0])
+                open_values.add(enum_strs[1])
+            self._state_enum_strs = enum_strs
+            self._state_tables = (
+                frozenset(open_values), 
+                frozenset(closed_values))
+        return self._state_tables
 
     @property
     def state(self):
         """is shutter "open", "close", or "unknown"?"""
-		# update the list of acceptable values - very inefficient but works
-        for item in self.pss_state.enum_strs[1]:
-            if item not in self.pss_state_open_values:
-                self.pss_state_open_values.append(item)
-        for item in self.pss_state.enum_strs[0]:
-            if item not in self.pss_state_closed_values:
-                self.pss_state_closed_values.append(item)
-
-        if self.pss_state.value in self.pss_state_open_values:
+        value = self._state_value
+        if value is None:
+            value = self.pss_state.get()
+        open_values, closed_values = self.state_tables
+        if value in open_values:
             result = self.valid_open_values[0]
-        elif self.pss_state.value in self.pss_state_closed_values:
+        elif value in closed_values:
             result = self.valid_close_values[0]
         else:
             result = self.unknown_state
@@ -705,93 +1090,89 @@ class ApsPssShutterWithStatus(ApsPssShutter):
         """
         wait for the PSS state to reach a desired target
         
+        Waits for an update (CA monitor) of ``pss_state`` 
+        with a value in ``target``, returns immediately 
+        if ``pss_state`` is already there.
+        
         PARAMETERS
         
         target : [str]
-            list of strings containing acceptable values
+            list (or set) of strings containing acceptable values
         
         timeout : non-negative number
             maximum amount of time (seconds) to wait for PSS state to reach target
+            (``None`` to wait forever)
         
         poll_s : non-negative number
-            Time to wait (seconds) in first polling cycle.
-            After first poll, this will be increased by ``_poll_factor_``
-            up to a maximum time of ``_poll_s_max_``.
+            Ignored (there is no polling).  Kept for compatibility.
         """
         if timeout is not None:
-            expiration = time.time() + max(timeout, 0)  # ensure non-negative timeout
-        else:
-            expiration = None
-        
-        # ensure the poll delay is reasonable
-        if poll_s > self._poll_s_max_:
-            poll_s = self._poll_s_max_
-        elif poll_s < self._poll_s_min_:
-            poll_s = self._poll_s_min_
-
-        while self.pss_state.get() not in target:
-            time.sleep(poll_s)
-            if poll_s < self._poll_s_max_:
-                poll_s *= self._poll_factor_   # progressively longer
-            if expiration is not None and time.time() > expiration:
+            timeout = max(timeout, 0)   # ensure non-negative timeout
+        
+        arrived = threading.Event()
+
+        def state_cb(value=None, **kwargs):
+            if value in target:
+                arrived.set()
+
+        # run=True: also called now with the current value
+        cid = self.pss_state.subscribe(state_cb)
+        try:
+            if not arrived.wait(timeout):
                 msg = f"Timeout ({timeout} s) waiting for shutter state"
                 msg += f" to reach a value in {target}"
                 raise TimeoutError(msg)
+        finally:
+            self.pss_state.unsubscribe(cid)
 
     def open(self, timeout=10):
-        """request the shutter to open"""
-        if not self.isOpen:
-            self.open_signal.put(1)
-            
-            # wait for the shutter to move
-            self.wait_for_state(
-                self.pss_state_open_values, 
-                timeout=timeout)
-            
-            # wait as caller specified
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
-            
-            # reset that signal (if not done by EPICS)
-            if self.open_signal.value == 1:
-                self.open_signal.put(0)
+        """BLOCKING: request the shutter to open"""
+        status_wait(self.set("open"), timeout=timeout)
 
     def close(self, timeout=10):
-        """request the shutter to close"""
-        if not self.isClosed:
+        """BLOCKING: request the shutter to close"""
+        status_wait(self.set("close"), timeout=timeout)
+
+    def _move(self, move):
+        """set the bit, wait for ``pss_state`` to report the new position"""
+        if move.target == "open":
+            self.open_signal.put(1)
+        else:
             self.close_signal.put(1)
-            
-            # wait for the shutter to move
-            self.wait_for_state(
-                self.pss_state_closed_values, 
-                timeout=timeout)
-            
-            # wait as caller specified
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
-            
-            # reset that signal (if not done by EPICS)
-            if self.close_signal.value == 1:
-                self.close_signal.put(0)
+        move.wait_for(
+            self.pss_state, 
+            lambda: self.inPosition(move.target), 
+            timeout=self.move_timeout_s)
+        return self.delay_s
 
 
 class SimulatedApsPssShutterWithStatus(ApsPssShutterWithStatus):
     """
     Simulated APS PSS shutter
     
+    The simulated response time is chosen at random 
+    (uniformly, in the range of ``response_time_s``) 
+    from this shutter's own random number generator.
+    Give a ``seed`` for a reproducible sequence of response times.
+    
     EXAMPLE::
     
         sim = SimulatedApsPssShutterWithStatus(name="sim")
+        sim = SimulatedApsPssShutterWithStatus(name="sim", seed=12345)
     
     """
     open_signal = Component(Signal, value=0)
     close_signal = Component(Signal, value=0)
     pss_state = FormattedComponent(Signal, value='close')
 
-    def __init__(self, *args, **kwargs):
-        super(ApsPssShutter, self).__init__("", *args, **kwargs)
-        self.pss_state_open_values += self.valid_open_values
-        self.pss_state_closed_values += self.valid_close_values
+    def __init__(self, *args, seed=None, response_time_s=(0.1, 0.9), **kwargs):
+        super().__init__("", None, *args, **kwargs)
+        # new lists: do not modify the class attributes
+        self.pss_state_open_values = self.pss_state_open_values + self.valid_open_values
+        self.pss_state_closed_values = self.pss_state_closed_values + self.valid_close_values
+        self.response_time_s = response_time_s
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
 
     def wait_for_state(self, target, timeout=10, poll_s=0.01):
         """
@@ -808,20 +1189,154 @@ class SimulatedApsPssShutterWithStatus(ApsPssShutterWithStatus):
         poll_s : non-negative number
             Ignored in the simulation.
         """
-        simulated_response_time_s = np.random.uniform(0.1, 0.9)
+        simulated_response_time_s = self.rng.uniform(*self.response_time_s)
         time.sleep(simulated_response_time_s)
-        self.pss_state.put(target[0])
+        self.pss_state.put([v for v in self.choices if v in target][0])
+
+    def _move(self, move):
+        """the simulated PSS reports the new position after a random time"""
+        response_s = self.rng.uniform(*self.response_time_s)
+        if move.target == "open":
+            value = self.valid_open_values[0]
+        else:
+            value = self.valid_close_values[0]
+        timer = threading.Timer(response_s, self.pss_state.put, args=(value,))
+        timer.daemon = True
+        timer.start()
+        try:
+            return super()._move(move)
+        finally:
+            if move.cancelled:
+                timer.cancel()
+
+
+class ShutterGroup(Device):
+    """
+    operate several shutters together
+    
+    ``set()`` starts all the members moving at once and returns 
+    one status, done when all members are in position 
+    (fails if any member fails).  The time (s) each member 
+    took is reported in ``timing`` (and by :meth:`report()`).
+    
+    PARAMETERS
+    
+    shutters : [ShutterBase]
+        The members of the group.  Any object with a ``set()`` 
+        method that returns a status may be a member.
+    
+    EXAMPLE::
+    
+        shutters = ShutterGroup(
+            [A_shutter, tomo_shutter, bit_shutter], 
+            name="shutters")
+        
+        # in a plan
+        yield from bps.mv(shutters, "open")
+        
+        # different targets for some members
+        yield from bps.mv(shutters, {A_shutter: "open", bit_shutter: "close"})
+        
+        shutters.report()
+
+    .. autosummary::
+       
+       ~set
+       ~stop
+       ~report
+    """
+    busy = Component(Signal, value=False)
+
+    def __init__(self, shutters, *args, **kwargs):
+        super().__init__("", *args, **kwargs)
+        self.shutters = list(shutters)
+        self.timing = OrderedDict()
+        self._lock = threading.Lock()
 
     @property
     def state(self):
-        """is shutter "open", "close", or "unknown"?"""
-        if self.pss_state.value in self.pss_state_open_values:
-            result = self.valid_open_values[0]
-        elif self.pss_state.value in self.pss_state_closed_values:
-            result = self.valid_close_values[0]
+        """is the group "open", "close", or "unknown" (members disagree)?"""
+        states = set([str(shutter.state) for shutter in self.shutters])
+        if len(states) == 1:
+            return states.pop()
+        return ShutterBase.unknown_state
+
+    @property
+    def isOpen(self):
+        """are all shutters open?"""
+        return all([shutter.isOpen for shutter in self.shutters])
+
+    @property
+    def isClosed(self):
+        """are all shutters closed?"""
+        return all([shutter.isClosed for shutter in self.shutters])
+
+    def set(self, value, **kwargs):
+        """
+        plan: request all the shutters to move at once
+        
+        PARAMETERS
+        
+        value : str or dict
+            any from the members' ``choices`` (typically "open" or "close"), 
+            or a dictionary ``{member: value}`` to move only those members
+        
+        kwargs : dict
+            ignored at this time
+        """
+        if isinstance(value, dict):
+            targets = list(value.items())
         else:
-            result = self.unknown_state
-        return result
+            targets = [(shutter, value) for shutter in self.shutters]
+
+        status = DeviceStatus(self)
+        pending = [len(targets)]
+        t0 = time.time()
+        with self._lock:
+            self.timing = OrderedDict()
+        self.busy.put(True)
+
+        def member_done(member, member_status):
+            with self._lock:
+                self.timing[member.name] = time.time() - t0
+                pending[0] -= 1
+                finished = pending[0] == 0 or not member_status.success
+                if finished and not status.done:
+                    self.busy.put(False)
+                    status._finished(success=member_status.success)
+
+        # start all the moves before waiting for any
+        member_statuses = []
+        for member, target in targets:
+            try:
+                member_statuses.append((member, member.set(target)))
+            except Exception as exc:
+                logger.error(
+                    "%s: could not move %s to %s: %s", 
+                    self.name, member.name, target, exc)
+                for started, _st in member_statuses:
+                    started.stop()
+                self.busy.put(False)
+                status._finished(success=False)
+                return status
+        for member, member_status in member_statuses:
+            member_status.add_callback(
+                lambda st, member=member: member_done(member, st))
+        if len(targets) == 0:
+            self.busy.put(False)
+            status._finished(success=True)
+        return status
+
+    def stop(self, *, success=False):
+        """stop all the shutters"""
+        for shutter in self.shutters:
+            shutter.stop(success=success)
+        super().stop(success=success)
+
+    def report(self):
+        """print the time (s) each member took in the last ``set()``"""
+        for name, t in self.timing.items():
+            print("{} : {:.3f} s".format(name, t))
 
 
 class ApsUndulator(Device):
@@ -1176,18 +1691,25 @@ class EpicsMotorShutter(OneSignalShutter):
     
     def open(self):
         """move motor to BEAM NOT BLOCKED position, interactive use"""
-        if not self.isOpen:
-            self.signal.move(self.open_value)
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
+        status_wait(self.set("open"))
     
     def close(self):
         """move motor to BEAM BLOCKED position, interactive use"""
-        self.signal.move(self.close_value)
-        if not self.isClosed:
-            self.signal.move(self.close_value)
-            if self.delay_s > 0:
-                time.sleep(self.delay_s)    # blocking call OK here
+        status_wait(self.set("close"))
+
+    def _move(self, move):
+        """move the motor, stop it if the move is cancelled"""
+        if move.target == "open":
+            position = self.open_value
+        else:
+            position = self.close_value
+        motion = self.signal.move(position, wait=False)
+        try:
+            move.wait_for_status(motion, timeout=self.move_timeout_s)
+        finally:
+            if move.cancelled or not motion.done:
+                self.signal.stop()
+        return self.delay_s
 
 
 class EpicsOnOffShutter(OneSignalShutter):
@@ -1304,6 +1826,146 @@ class Struck3820(Device):
     do_readl_all = Component(EpicsSignal, "DoReadAll")
 
 
+class Struck3820Flyer(Struck3820):
+    """
+    Struck/SIS 3820 Multi-Channel Scaler as a bluesky flyer
+    
+    * ``kickoff()`` : erase and start the SIS3820, 
+      done when it reports ``Acquiring``
+      (fails after ``kickoff_timeout_s``)
+    * ``complete()`` : done when acquisition has ended and
+      all the MCA spectra have been read (``DoReadAll``), 
+      fails if acquisition has not ended within ``complete_timeout_s``
+    * ``collect_pages()`` : one event page with the four spectra
+    
+    The spectra are NumPy arrays (as received from EPICS, trimmed to
+    the channels acquired, not copied).  Each MCS channel is one
+    event, the ``timestamps`` of its data are 
+    ``kickoff`` time + (channel+1) * ``dwell_time``.
+    
+    EXAMPLE::
+
+        mcs = Struck3820Flyer("9idcLAX:3820:", name="mcs")
+        
+        def fly_plan():
+            yield from bps.open_run()
+            yield from bps.kickoff(mcs, wait=True)
+            # start the motion here
+            yield from bps.complete(mcs, wait=True)
+            yield from bps.collect(mcs)
+            yield from bps.close_run()
+
+    .. autosummary::
+       
+       ~kickoff
+       ~complete
+       ~collect_pages
+       ~describe_collect
+    """
+    stream_name = "mcs"
+    kickoff_timeout_s = 10      # time (s) to report Acquiring
+    complete_timeout_s = 3600   # time (s) to end acquisition, None: forever
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._acquired = threading.Event()
+        self._started = False
+        self._kickoff_status = None
+        self._acquiring_cid = None
+        self._arrays = None
+        self._t0 = None
+
+    @property
+    def mca_channels(self):
+        """the four MCA records"""
+        return [self.mca1, self.mca2, self.mca3, self.mca4]
+
+    def _acquiring_cb(self, value=None, **kwargs):
+        """(internal) detect the end of acquisition"""
+        if value in (1, "Acquiring"):
+            self._started = True
+            status = self._kickoff_status
+            if status is not None and not status.done:
+                status._finished(success=True)
+        elif self._started and value in (0, "Done"):
+            self._acquired.set()
+
+    def kickoff(self):
+        """erase and start the SIS3820, done when it is acquiring"""
+        self._acquired.clear()
+        self._started = False
+        self._arrays = None
+        status = DeviceStatus(self, timeout=self.kickoff_timeout_s)
+        self._kickoff_status = status
+        if self._acquiring_cid is None:
+            self._acquiring_cid = self.acquiring.subscribe(
+                self._acquiring_cb, run=False)
+        self._t0 = time.time()
+        self.erase_start.put(1)
+        return status
+
+    def complete(self):
+        """wait for the acquisition to end, then read all the spectra"""
+        status = DeviceStatus(self)
+
+        def readout():
+            try:
+                if not self._acquired.wait(self.complete_timeout_s):
+                    msg = f"acquisition did not end within {self.complete_timeout_s} s"
+                    raise TimeoutError(msg)
+                self.acquiring.unsubscribe(self._acquiring_cid)
+                self._acquiring_cid = None
+                self.do_readl_all.put(1, wait=True)
+                self._arrays = self._read_arrays()
+                status._finished(success=True)
+            except Exception as exc:
+                logger.error("%s: readout failed: %s", self.name, exc)
+                status.set_exception(exc)
+
+        threading.Thread(target=readout, daemon=True).start()
+        return status
+
+    def stop(self, *, success=False):
+        """stop acquisition (``complete()`` will read what was acquired)"""
+        self.stop_all.put(1)
+        self._acquired.set()
+        super().stop(success=success)
+
+    def _read_arrays(self):
+        """(internal) spectra of the acquired channels, ``{name: array}``"""
+        n = int(self.current_channel.get())
+        arrays = OrderedDict()
+        for mca in self.mca_channels:
+            if n > 0:
+                spectrum = mca.spectrum.get(count=n)
+            else:
+                spectrum = mca.spectrum.get()
+            arrays[mca.name] = np.asarray(spectrum)[:n or None]
+        return arrays
+
+    def describe_collect(self):
+        """describe the spectra: one number per channel in each event"""
+        desc = OrderedDict()
+        for mca in self.mca_channels:
+            desc[mca.name] = dict(
+                source="PV:" + mca.prefix, dtype="number", shape=[])
+        return {self.stream_name: desc}
+
+    def collect_pages(self):
+        """one event page: an event per MCS channel"""
+        if self._arrays is None:
+            return
+        n = min([len(v) for v in self._arrays.values()])
+        dwell = self.dwell_time.get()
+        t = self._t0 + dwell * np.arange(1, n+1)
+        # the RunEngine sets time & seq_num of each event, 
+        # the channel times are kept as timestamps
+        yield dict(
+            data={k: v[:n] for k, v in self._arrays.items()},
+            timestamps={k: t for k in self._arrays},
+            )
+
+
 # AreaDetector support
 
 AD_FrameType_schemes = {
@@ -1325,14 +1987,17 @@ AD_FrameType_schemes = {
 }
 
 
-def AD_setup_FrameType(prefix, scheme="NeXus"):
+def AD_setup_FrameType(prefix, scheme="NeXus", timeout=5):
     """
     configure so frames are identified & handled by type (dark, white, or image)
     
     PARAMETERS
 
         prefix (str) : EPICS PV prefix of area detector, such as "13SIM1:"
+            (or a list of prefixes, to configure several detectors at once)
         scheme (str) : any key in the `AD_FrameType_schemes` dictionary
+            (or a dictionary ``{prefix: scheme}``)
+        timeout (float) : maximum time (s) to connect and to complete the puts
     
     This routine prepares the EPICS Area Detector to identify frames
     by image type for handling by clients, such as the HDF5 file writing plugin.
@@ -1345,27 +2010,93 @@ def AD_setup_FrameType(prefix, scheme="NeXus"):
     the `AD_FrameType_schemes` dictionary, defining storage values for the
     fields of the EPICS `mbbo` record that you will be using.
     
+    All the PVs (of all the detectors) are written at once, 
+    waiting for completion, then read back for verification.
+    Returns a report: a dictionary for each prefix with
+    ``ok`` (True if all values were written and verified) and
+    ``errors`` (``{pvname: (expected, received)}``, 
+    ``received`` is None if the PV could not be read).
+    Failures are also logged.
+    
     see: https://github.com/BCDA-APS/use_bluesky/blob/master/notebooks/images_darks_flats.ipynb
     
     EXAMPLE::
     
         AD_setup_FrameType("2bmbPG3:", scheme="DataExchange")
     
+        report = AD_setup_FrameType(["13SIM1:", "2bmbPG3:"], scheme="NeXus")
+        print(report["2bmbPG3:"]["ok"])
+    
     * Call this function *before* creating the ophyd area detector object
     * use lower-level PyEpics interface
     """
-    db = AD_FrameType_schemes.get(scheme)
-    if db is None:
-        msg = "unknown AD_FrameType_schemes scheme: {}".format(scheme)
-        msg += "\n Should be one of: " + ", ".join(AD_FrameType_schemes.keys())
-        raise ValueError(msg)
+    if isinstance(prefix, str):
+        prefixes = [prefix]
+    else:
+        prefixes = list(prefix)
+    if isinstance(scheme, dict):
+        schemes = scheme
+    else:
+        schemes = {p: scheme for p in prefixes}
 
     template = "{}cam1:FrameType{}.{}"
-    for field, value in db.items():
-        epics.caput(template.format(prefix, "", field), value)
-        epics.caput(template.format(prefix, "_RBV", field), value)
+    owners = []     # prefix of each PV
+    pvlist = []
+    values = []
+    for p in prefixes:
+        db = AD_FrameType_schemes.get(schemes.get(p))
+        if db is None:
+            msg = "unknown AD_FrameType_schemes scheme: {}".format(schemes.get(p))
+            msg += "\n Should be one of: " + ", ".join(AD_FrameType_schemes.keys())
+            raise ValueError(msg)
+        for field, value in db.items():
+            for suffix in ("", "_RBV"):
+                owners.append(p)
+                pvlist.append(template.format(p, suffix, field))
+                values.append(value)
+
+    epics.caput_many(
+        pvlist, values, wait="all", 
+        connection_timeout=timeout, put_timeout=timeout)
+    received = epics.caget_many(
+        pvlist, as_string=True, 
+        timeout=timeout, connection_timeout=timeout)
+
+    report = OrderedDict([(p, dict(ok=True, errors=OrderedDict())) for p in prefixes])
+    for p, pvname, expected, value in zip(owners, pvlist, values, received):
+        if value != expected:
+            report[p]["ok"] = False
+            report[p]["errors"][pvname] = (expected, value)
+            logger.warning(
+                "AD_setup_FrameType: %s is %r, expected %r", 
+                pvname, value, expected)
+    return report
+
+
+def _wait_for_value(signal, predicate, timeout=None):
+    """
+    BLOCKING: wait (CA monitor) until ``predicate(value)`` is True
+    
+    Returns True if it happened, False if ``timeout`` (s) expired first.
+    """
+    arrived = threading.Event()
+
+    def cb(value=None, **kwargs):
+        if predicate(value):
+            arrived.set()
+
+    cid = signal.subscribe(cb)      # run=True: also tests the current value
+    try:
+        return arrived.wait(timeout)
+    finally:
+        signal.unsubscribe(cid)
+
+
+def _AD_plugin_primed(plugin):
+    """(internal) has ``plugin`` received an NDArray?"""
+    return np.array(plugin.array_size.get()).sum() > 0
+
 
-         
 def AD_warmed_up(detector):
     """
     Has area detector pushed an NDarray to the HDF5 plugin?  True or False
@@ -1376,21 +2107,83 @@ def AD_warmed_up(detector):
     If detector IOC has just been started and has not yet taken an image
     with the HDF5 plugin, then a TimeoutError will occur as the
     HDF5 plugin "Capture" is set to 1 (Start).  In such case,
-    first acquire at least one image with the HDF5 plugin enabled.
+    first acquire at least one image with the HDF5 plugin enabled
+    (see :func:`AD_prime_plugin`).
+    
+    Checks (without changing anything) if the plugin has received
+    an image (its array size is not zero).  Returns at once:
+    only :func:`AD_prime_plugin` waits (for the priming frame).
     """
-    old_capture = detector.hdf1.capture.value
-    old_file_write_mode = detector.hdf1.file_write_mode.value
-    if old_capture == 1:
-        return True
+    return _AD_plugin_primed(detector.hdf1)
+
+
+def AD_prime_plugin(detector, timeout=10):
+    """
+    acquire one frame, if needed, so the HDF5 plugin has received an NDArray
     
-    detector.hdf1.file_write_mode.put(1)
-    detector.hdf1.capture.put(1)
-    verdict = detector.hdf1.capture.get() == 1
-    detector.hdf1.capture.put(old_capture)
-    detector.hdf1.file_write_mode.put(old_file_write_mode)
+    Sets the camera for a single, internally-triggered image,
+    enables the plugin, acquires, and waits (up to ``timeout`` seconds)
+    for the plugin to report the array size.  Then restores 
+    all the settings it changed.  Returns True if the plugin is 
+    primed (warmed up).
+    """
+    hdf = detector.hdf1
+    if _AD_plugin_primed(hdf):
+        return True
+
+    cam = detector.cam
+    settings = OrderedDict([
+        (cam.array_callbacks, 1),
+        (cam.image_mode, 0),        # Single
+        (cam.trigger_mode, 0),      # Internal
+        (cam.num_images, 1),
+        (hdf.enable, 1),
+        ])
+    original = OrderedDict([(sig, sig.get()) for sig in settings])
+    try:
+        for sig, value in settings.items():
+            sig.put(value, wait=True)
+        cam.acquire.put(1)
+        verdict = _wait_for_value(
+            hdf.array_size.width, 
+            lambda value: _AD_plugin_primed(hdf), 
+            timeout=timeout)
+    finally:
+        cam.acquire.put(0)
+        for sig, value in reversed(original.items()):
+            sig.put(value, wait=True)
     return verdict
 
 
+def AD_warm_up_detectors(detectors, timeout=10):
+    """
+    prime the HDF5 plugin of several detectors at the same time
+    
+    Returns a dictionary ``{detector.name: primed}``.
+    
+    EXAMPLE::
+    
+        primed = AD_warm_up_detectors([simdet, pilatus, eiger])
+        for name, ok in primed.items():
+            if not ok:
+                print(name, "is not ready")
+    """
+    if len(detectors) == 0:
+        return OrderedDict()
+    with ThreadPoolExecutor(max_workers=len(detectors)) as executor:
+        futures = [
+            (det, executor.submit(AD_prime_plugin, det, timeout=timeout))
+            for det in detectors]
+    results = OrderedDict()
+    for det, future in futures:
+        try:
+            results[det.name] = future.result()
+        except Exception as exc:
+            logger.error("%s: could not prime HDF5 plugin: %s", det.name, exc)
+            results[det.name] = False
+    return results
+
+
 class AD_EpicsHdf5FileName(FileStorePluginBase):
     """
     custom class to define image file name from EPICS
@@ -1410,6 +2203,7 @@ class AD_EpicsHdf5FileName(FileStorePluginBase):
         ~generate_datum
         ~get_frames_per_point
         ~stage
+        ~unstage
 
     To allow users to control the file **name**,
     we override the ``make_filename()`` method here
@@ -1491,12 +2285,35 @@ class AD_EpicsHdf5FileName(FileStorePluginBase):
 
         RE(bp.count([simdet]))
     
+    The file name template, path, name, and number are read from EPICS
+    once, in ``stage()``.  While staged, the file number is updated
+    by its CA monitor, so ``generate_datum()`` does not need CA gets.
+    
+    For scans with many frames, set ``datum_batch_size`` to group
+    the frames in batches of that many frames 
+    (default: 1, no batches)::
+    
+        simdet.hdf1.datum_batch_size = 100
+    
+    With batches, there is one datum for each batch (not for each
+    frame): every frame (event) of a batch refers to the same datum.
+    Its ``datum_kwargs`` give the range of frames (points) in the 
+    batch as a Python slice, ``point_start`` and ``point_stop``
+    (instead of ``point_number``), so the handler (which must accept
+    these keywords) returns the frames of the batch as one block.
+    The frame of an event is its position in that block.
+    
     INTERNAL METHODS
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.filestore_spec = 'AD_HDF5'  # spec name stored in resource doc
+        self._file_name_parts = None     # cached while staged
+        self._file_number_cid = None
+        self.datum_batch_size = 1
+        self._batch = None      # file name & frame range of current batch
+        self._batch_point = 0
         self.stage_sigs.update([
             ('file_template', '%s%s_%4.4d.h5'),
             ('file_write_mode', 'Stream'),
@@ -1522,16 +2339,56 @@ class AD_EpicsHdf5FileName(FileStorePluginBase):
 
     def generate_datum(self, key, timestamp, datum_kwargs):
         """Generate a uid and cache it with its key for later insertion."""
-        template = self.file_template.get()
-        filename, read_path, write_path = self.make_filename()
-        file_number = self.file_number.get()
-        hdf5_file_name = template % (read_path, filename, file_number)
-
-        # inject the actual name of the HDF5 file here into datum_kwargs
-        datum_kwargs["HDF5_file_name"] = hdf5_file_name
-        
-        logger.debug("make_filename:", hdf5_file_name)
-        return super().generate_datum(key, timestamp, datum_kwargs)
+        parts = self._file_name_parts
+        if parts is None:
+            # not staged: ask EPICS
+            template = self.file_template.get()
+            filename, read_path, write_path = self.make_filename()
+            file_number = self.file_number.get()
+        else:
+            template = parts["template"]
+            filename = parts["filename"]
+            read_path = parts["read_path"]
+            file_number = parts["file_number"]
+
+        batch_size = max(1, int(self.datum_batch_size or 1))
+        datum_kwargs = dict(datum_kwargs or {})
+        if batch_size == 1:
+            # inject the actual name of the HDF5 file here into datum_kwargs
+            datum_kwargs["HDF5_file_name"] = template % (
+                read_path, filename, file_number)
+            logger.debug("make_filename: %s", datum_kwargs["HDF5_file_name"])
+            return super().generate_datum(key, timestamp, datum_kwargs)
+
+        point = self._batch_point
+        self._batch_point += 1
+        batch = self._batch
+        if (batch is None 
+                or key != batch["key"]
+                or point >= batch["point_stop"] 
+                or file_number != batch["file_number"]):
+            # new batch: one datum for all its frames
+            batch = dict(
+                key = key,
+                file_number = file_number,
+                point_start = point,
+                point_stop = point + batch_size,
+                HDF5_file_name = template % (read_path, filename, file_number),
+                )
+            logger.debug("make_filename: %s", batch["HDF5_file_name"])
+            datum_kwargs["HDF5_file_name"] = batch["HDF5_file_name"]
+            datum_kwargs["point_start"] = batch["point_start"]
+            datum_kwargs["point_stop"] = batch["point_stop"]
+            # FileStoreBase: no point_number (from FileStoreIterativeWrite)
+            batch["datum_id"] = FileStoreBase.generate_datum(
+                self, key, timestamp, datum_kwargs)
+            self._batch = batch
+            return batch["datum_id"]
+
+        # this frame is in the current batch: reuse its datum
+        reading = {"value": batch["datum_id"], "timestamp": timestamp}
+        self._datum_uids[key].append(reading)
+        return batch["datum_id"]
 
     def get_frames_per_point(self):
         """overrides default behavior"""
@@ -1570,13 +2427,41 @@ class AD_EpicsHdf5FileName(FileStorePluginBase):
         template = self.file_template.get()
         self._fn = template % (read_path, filename, file_number)
         self._fp = read_path
+
         if not self.file_path_exists.get():
             raise IOError("Path {} does not exist on IOC.".format(
                           self.file_path.get()))
 
+        # cache for generate_datum(), file_number updated by CA monitor
+        self._file_name_parts = dict(
+            template = template,
+            filename = filename,
+            read_path = read_path,
+            file_number = self.file_number.get(),
+            )
+        self._file_number_cid = self.file_number.subscribe(
+            self._file_number_cb, run=False)
+
         # from FileStoreIterativeWrite.stage()
         self._point_counter = itertools.count()
+        self._batch = None
+        self._batch_point = 0
         
         # from FileStoreHDF5.stage()
         res_kwargs = {'frame_per_point': self.get_frames_per_point()}
         self._generate_resource(res_kwargs)
+
+    def unstage(self):
+        """overrides default behavior: forget the cached file name"""
+        if self._file_number_cid is not None:
+            self.file_number.unsubscribe(self._file_number_cid)
+            self._file_number_cid = None
+        self._file_name_parts = None
+        self._batch = None
+        return super().unstage()
+
+    def _file_number_cb(self, value=None, **kwargs):
+        """(internal) IOC reports a new file number"""
+        parts = self._file_name_parts
+        if parts is not None:
+            parts["file_number"] = value
@@ -0,0 +1,295 @@
+
+"""
+Read data files written by EPICS synApps
+
+.. autosummary::
+
+   ~read_mda
+   ~MdaFile
+   ~MdaScan
+
+The MDA file format (written by the synApps ``saveData`` support
+for the ``sscan`` record) is XDR: big-endian binary.
+The file is memory-mapped and the data of each scan are read
+as NumPy views of the file (no copy).  The arrays returned by
+:meth:`MdaFile.positioners` and :meth:`MdaFile.detectors`
+are (native) ``float64`` copies, points not acquired are NaN.
+
+EXAMPLE : read an MDA file::
+
+    from apstools.filereaders import read_mda
+    mda = read_mda("/home/beams/USER/mda/xxx_0001.mda")
+    x = mda.positioners(1)["m1"]
+    y = mda.detectors(1)["I0"]
+
+EXAMPLE : read the latest MDA file written by saveData::
+
+    from apstools.synApps_ophyd import SaveData
+    save_data = SaveData("xxx:saveData_", name="save_data")
+    mda = save_data.read_latest_mda()
+
+see:  https://epics.anl.gov/bcda/synApps/sscan/saveData_fileFormat.txt
+"""
+
+#-----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     jemian@anl.gov
+# :copyright: (c) 2017-2019, UChicago Argonne, LLC
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+#-----------------------------------------------------------------------------
+
+from collections import OrderedDict
+import numpy as np
+
+
+# EPICS DBR types of the "extra" PVs
+DBR_STRING = 0
+DBR_CTRL_SHORT = 29
+DBR_CTRL_FLOAT = 30
+DBR_CTRL_CHAR = 32
+DBR_CTRL_LONG = 33
+DBR_CTRL_DOUBLE = 34
+
+_xdr_types = {
+    DBR_CTRL_SHORT: ">i4",      # XDR writes short as 4 bytes
+    DBR_CTRL_FLOAT: ">f4",
+    DBR_CTRL_CHAR: ">i4",       # XDR writes char as 4 bytes
+    DBR_CTRL_LONG: ">i4",
+    DBR_CTRL_DOUBLE: ">f8",
+}
+
+_file_header = np.dtype([
+    ("version", ">f4"),
+    ("scan_number", ">i4"),
+    ("rank", ">i4"),
+])
+
+_scan_header = np.dtype([
+    ("rank", ">i4"),
+    ("npts", ">i4"),
+    ("curr_pt", ">i4"),
+])
+
+
+class _XdrCursor(object):
+    """read XDR items from a buffer, starting at ``offset``"""
+
+    def __init__(self, buffer, offset=0):
+        self.buffer = buffer
+        self.offset = offset
+
+    def array(self, dtype, count=1):
+        dtype = np.dtype(dtype)
+        value = np.frombuffer(
+            self.buffer, dtype=dtype, count=count, offset=self.offset)
+        self.offset += dtype.itemsize * count
+        return value
+
+    def int(self):
+        return int(self.array(">i4")[0])
+
+    def float(self):
+        return float(self.array(">f4")[0])
+
+    def string(self):
+        """XDR string: length, then characters padded to 4 bytes"""
+        length = self.int()
+        text = bytes(self.buffer[self.offset:self.offset+length])
+        self.offset += (length + 3) // 4 * 4
+        return text.decode("latin-1")
+
+    def counted_string(self):
+        """MDA counted string: length, then (if not empty) XDR string"""
+        if self.int() == 0:
+            return ""
+        return self.string()
+
+
+class MdaScan(object):
+    """
+    one scan (one dimension) in an MDA file
+
+    ``positioner_data`` is (positioners, points) and
+    ``detector_data`` is (detectors, points).
+    Only the first ``curr_pt`` points were acquired.
+    ``lower_scans`` are the scans of the next (inner) dimension,
+    one for each point.
+    """
+
+    def __init__(self, cursor):
+        header = cursor.array(_scan_header)[0]
+        self.rank = int(header["rank"])
+        self.npts = int(header["npts"])
+        self.curr_pt = int(header["curr_pt"])
+        self.lower_offsets = []
+        if self.rank > 1:
+            self.lower_offsets = cursor.array(">i4", self.npts).tolist()
+        self.name = cursor.counted_string()
+        self.time = cursor.counted_string()
+        n_p, n_d, n_t = cursor.array(">i4", 3).tolist()
+
+        self.positioners = []
+        for _ in range(n_p):
+            self.positioners.append(OrderedDict([
+                ("number", cursor.int()),
+                ("name", cursor.counted_string()),
+                ("desc", cursor.counted_string()),
+                ("step_mode", cursor.counted_string()),
+                ("unit", cursor.counted_string()),
+                ("readback_name", cursor.counted_string()),
+                ("readback_desc", cursor.counted_string()),
+                ("readback_unit", cursor.counted_string()),
+            ]))
+        self.detectors = []
+        for _ in range(n_d):
+            self.detectors.append(OrderedDict([
+                ("number", cursor.int()),
+                ("name", cursor.counted_string()),
+                ("desc", cursor.counted_string()),
+                ("unit", cursor.counted_string()),
+            ]))
+        self.triggers = []
+        for _ in range(n_t):
+            self.triggers.append(OrderedDict([
+                ("number", cursor.int()),
+                ("name", cursor.counted_string()),
+                ("command", cursor.float()),
+            ]))
+
+        data = cursor.array(np.dtype([
+            ("positioners", ">f8", (n_p, self.npts)),
+            ("detectors", ">f4", (n_d, self.npts)),
+        ]))[0]
+        self.positioner_data = data["positioners"]
+        self.detector_data = data["detectors"]
+
+        self.lower_scans = []
+        for offset in self.lower_offsets[:self.curr_pt]:
+            if offset > 0:
+                self.lower_scans.append(
+                    MdaScan(_XdrCursor(cursor.buffer, offset)))
+
+
+class MdaFile(object):
+    """
+    contents of an MDA file
+
+    .. autosummary::
+
+        ~positioners
+        ~detectors
+        ~scan
+
+    """
+
+    def __init__(self, filename, buffer):
+        self.filename = filename
+        cursor = _XdrCursor(buffer)
+        header = cursor.array(_file_header)[0]
+        self.version = round(float(header["version"]), 4)
+        self.scan_number = int(header["scan_number"])
+        self.rank = int(header["rank"])
+        self.dimensions = cursor.array(">i4", self.rank).tolist()
+        self.is_regular = bool(cursor.int())
+        offset_extra = cursor.int()
+        self.scan_1D = MdaScan(cursor)
+        self.extra_pvs = OrderedDict()
+        if offset_extra > 0:
+            self.extra_pvs = _read_extra_pvs(_XdrCursor(buffer, offset_extra))
+
+    def scan(self, dimension=1):
+        """first scan of ``dimension`` (1 is the outermost)"""
+        scan = self.scan_1D
+        for _ in range(dimension - 1):
+            if len(scan.lower_scans) == 0:
+                return None
+            scan = scan.lower_scans[0]
+        return scan
+
+    def _stacked(self, dimension, key):
+        """data of ``dimension``, (channels, points of dims 1..dimension)"""
+        def stack(scan, level):
+            if level == dimension:
+                return _acquired(getattr(scan, key), scan.curr_pt)
+            rows = [
+                (i, stack(lower, level + 1))
+                for i, lower in enumerate(scan.lower_scans)]
+            rows = [(i, row) for i, row in rows if row is not None]
+            if len(rows) == 0:
+                return None
+            shape = rows[0][1].shape
+            full = np.full((shape[0], scan.npts) + shape[1:], np.nan)
+            for i, row in rows:
+                full[:, i] = row
+            return full
+
+        return stack(self.scan_1D, 1)
+
+    def _by_name(self, dimension, channels, key):
+        first = self.scan(dimension)
+        if first is None:
+            return OrderedDict()
+        data = self._stacked(dimension, key)
+        result = OrderedDict()
+        for i, channel in enumerate(getattr(first, channels)):
+            name = channel["name"] or "%s%d" % (channels[0].upper(), channel["number"])
+            result[name] = data[i]
+        return result
+
+    def positioners(self, dimension=1):
+        """
+        positioner arrays of ``dimension``: ``{name: array}``
+
+        Arrays of dimension ``n`` have shape ``dimensions[:n]``.
+        """
+        return self._by_name(dimension, "positioners", "positioner_data")
+
+    def detectors(self, dimension=1):
+        """
+        detector arrays of ``dimension``: ``{name: array}``
+
+        Arrays of dimension ``n`` have shape ``dimensions[:n]``.
+        """
+        return self._by_name(dimension, "detectors", "detector_data")
+
+
+def _acquired(data, curr_pt):
+    """``data`` as native float64, points at or after ``curr_pt`` are NaN"""
+    data = np.array(data, dtype=np.float64)
+    data[..., curr_pt:] = np.nan
+    return data
+
+
+def _read_extra_pvs(cursor):
+    """``{name: dict(desc, unit, value)}`` of the extra PVs"""
+    extra_pvs = OrderedDict()
+    for _ in range(cursor.int()):
+        name = cursor.counted_string()
+        desc = cursor.counted_string()
+        dbr_type = cursor.int()
+        unit = ""
+        if dbr_type == DBR_STRING:
+            value = cursor.counted_string()
+        else:
+            count = cursor.int()
+            unit = cursor.counted_string()
+            value = cursor.array(_xdr_types[dbr_type], count)
+            if dbr_type == DBR_CTRL_CHAR:
+                value = bytes(value.astype("u1")).split(b"\0")[0].decode("latin-1")
+            elif count == 1:
+                value = value[0]
+        extra_pvs[name] = dict(desc=desc, unit=unit, value=value)
+    return extra_pvs
+
+
+def read_mda(filename):
+    """
+    read an MDA file (written by synApps saveData), return :class:`MdaFile`
+
+    The file is memory-mapped: data are read when first used.
+    """
+    buffer = np.memmap(filename, dtype="u1", mode="r")
+    return MdaFile(filename, buffer)
@@ -8,7 +8,9 @@ Plans that might be useful at the APS when using BlueSky
    ~run_in_thread
    ~snapshot
    ~sscan_1D
+   ~sscan_nD
    ~TuneAxis
+   ~TuneResults
    ~tune_axes
 
 """
@@ -23,7 +25,8 @@ Plans that might be useful at the APS when using BlueSky
 # The full license is in the file LICENSE.txt, distributed with this software.
 #-----------------------------------------------------------------------------
 
-from collections import OrderedDict
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import logging
 import numpy as np
@@ -34,9 +37,11 @@ import time
 from bluesky import preprocessors as bpp
 from bluesky import plan_stubs as bps
 from bluesky import plans as bp
-from bluesky.callbacks.fitting import PeakStats
 import ophyd
 from ophyd import Device, Component, Signal
+from ophyd.signal import EpicsSignalBase
+
+from .callbacks import PeakStatistics
 
 
 logger = logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -296,12 +301,114 @@ def _get_sscan_data_objects(sscan):
     return scan_data_objects
 
 
+def _sscan_acquired_points(sscan):
+    """
+    number of points acquired by the most recent scan of this sscan record
+
+    The arrays (``.P1CA``, ``.D01CA``, ...) are always ``MPTS`` long
+    but only the first ``NPTS`` (or ``CPT``, if the scan ended early)
+    values have been acquired.
+
+    PARAMETERS
+
+    sscan : Device
+        one EPICS sscan record (instance of `apstools.synApps_ophyd.sscanRecord`)
+    """
+    npts = int(sscan.number_points.get())
+    cpt = int(sscan.current_point.get())
+    if 0 < cpt < npts:
+        npts = cpt          # scan ended before all points were acquired
+    return npts
+
+
+def _get_sscan_final_array_channels(sscan):
+    """
+    dictionary of the configured sscan array signals, grouped by role
+
+    PARAMETERS
+
+    sscan : Device
+        one EPICS sscan record (instance of `apstools.synApps_ophyd.sscanRecord`)
+    """
+    channels = OrderedDict()
+    # we have to search for the arrays since they have ``kind="omitted"``
+    # (which means they do not get reported by the ``.read()`` method)
+    for part in (sscan.positioners, sscan.detectors):
+        arrays = OrderedDict()
+        for nm in part.read_attrs:
+            if "." not in nm:
+                arrays[nm] = getattr(part, nm).array
+        channels[part.attr_name] = arrays
+    return channels
+
+
+def _get_sscan_final_arrays(sscan, npts=None, stacked=False, max_workers=8):
+    """
+    read only the acquired points of the configured sscan arrays
+
+    The arrays are read concurrently and each is trimmed to ``npts``.
+    Returns a list of ``ophyd.Signal`` objects, ready for ``bps.read()``.
+
+    PARAMETERS
+
+    sscan : Device
+        one EPICS sscan record (instance of `apstools.synApps_ophyd.sscanRecord`)
+    npts : int
+        (default: ``None``)
+        Number of points to keep.  If ``None``, use the number
+        of points acquired by the most recent scan.
+    stacked : bool
+        (default: ``False``)
+        If ``True``, report one 2-D array (channels, points) for each of
+        the positioners and the detectors.  The channel names are
+        available from :func:`_get_sscan_final_array_channels()`.
+        If ``False``, report one 1-D array for each channel.
+    max_workers : int
+        (default: 8)
+        maximum number of concurrent EPICS requests
+    """
+    if npts is None:
+        npts = _sscan_acquired_points(sscan)
+
+    def _read(obj):
+        if isinstance(obj, EpicsSignalBase):
+            # only transfer the acquired points
+            value = obj.get(count=max(npts, 1))
+        else:
+            value = obj.get()
+        return np.asarray(value)[:npts]
+
+    channels = _get_sscan_final_array_channels(sscan)
+    objects = [obj for part in channels.values() for obj in part.values()]
+    if len(objects) > 0:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(objects))) as pool:
+            arrays = iter(pool.map(_read, objects))
+    else:
+        arrays = iter([])
+
+    signals = []
+    for part_name, part in channels.items():
+        part_arrays = [next(arrays) for _ in part]
+        if stacked:
+            if len(part_arrays) == 0:
+                continue
+            sig = Signal(
+                name="{}_{}_array".format(sscan.name, part_name),
+                value=np.vstack(part_arrays))
+            signals.append(sig)
+        else:
+            for obj, arr in zip(part.values(), part_arrays):
+                signals.append(Signal(name=obj.name, value=arr))
+    return signals
+
+
 def sscan_1D(
         sscan, 
         poll_delay_s=0.001, 
         phase_timeout_s = 60.0,
         running_stream="primary", 
         final_array_stream=None, 
+        final_array_stacked=False,
         device_settings_stream="settings", 
         md={}):
     """
@@ -323,7 +430,16 @@ def sscan_1D(
         (default: ``None``)
         Name of document stream to write positioners and detectors data 
         posted *after* the sscan has ended.
+        Only the acquired points are written, not the full
+        ``MPTS``-long arrays.
         If set to `None`, this stream will not be written.
+    final_array_stacked : bool
+        (default: ``False``)
+        If ``True``, write the ``final_array_stream`` as one 2-D array
+        (channels, points) for the positioners and another for the
+        detectors.  The channel names are written into the
+        ``sscan_final_array_channels`` key of the run metadata.
+        If ``False``, write one 1-D array for each channel.
     device_settings_stream : str or `None`
         (default: ``"settings"``)
         Name of document stream to write *settings* of the sscan device.
@@ -400,6 +516,11 @@ def sscan_1D(
     sscan.scan_phase.subscribe(phase_cb)
     
     md["plan_name"] = "sscan_1D"
+    if final_array_stream is not None and final_array_stacked:
+        md["sscan_final_array_channels"] = {
+            k: list(v.keys())
+            for k, v in _get_sscan_final_array_channels(sscan).items()
+        }
 
     yield from bps.open_run(md)               # start data collection
     yield from bps.mv(sscan.execute_scan, 1)   # start sscan
@@ -421,14 +542,10 @@ def sscan_1D(
 
     # dump the complete data arrays
     if final_array_stream is not None:
+        arrays = _get_sscan_final_arrays(sscan, stacked=final_array_stacked)
         yield from bps.create(final_array_stream)
-        # we have to search for the arrays since they have ``kind="omitted"``
-        # (which means they do not get reported by the ``.read()`` method)
-        for part in (sscan.positioners, sscan.detectors):
-            for nm in part.read_attrs:
-                if "." not in nm:
-                    # TODO: write just the acquired data, not the FULL arrays!
-                    yield from bps.read(getattr(part, nm).array)
+        for obj in arrays:
+            yield from bps.read(obj)
         yield from bps.save()
 
     # dump the entire sscan record into another stream
@@ -442,6 +559,292 @@ def sscan_1D(
     return sscan_status
 
 
+def sscan_nD(
+        sscans, 
+        hardware_sscan=None,
+        poll_delay_s=0.001, 
+        phase_timeout_s = 60.0,
+        release_timeout_s = 5.0,
+        stream_names=None,
+        device_settings_stream="settings", 
+        md=None):
+    """
+    multi-dimensional scan using nested EPICS synApps sscan records
+    
+    assumes the sscan records have already been setup properly for a scan
+    (each outer record triggers the next inner record as a detector trigger)
+
+    Each sscan record writes its own document stream.  Every time
+    an inner record completes a pass, *one* event is written with the
+    (acquired points of the) arrays of that record and the current 
+    readback values of the positioners of all outer records.
+    The outermost record writes one event when the whole scan ends.
+    The number of documents is proportional to the number of 
+    *outer* points, not the total number of points.
+
+    While this plan runs, each inner record is told to wait 
+    (using its ``AWCT`` field) for this plan to read its arrays
+    before it continues with the next pass.
+
+    PARAMETERS
+
+    sscans : [Device]
+        list of EPICS sscan records (instances of 
+        `apstools.synApps_ophyd.sscanRecord`), 
+        ordered from *inner* to *outer* dimension, 
+        such as ``[scans.scan1, scans.scan2]``
+    hardware_sscan : Device or `None`
+        (default: ``None``)
+        sscan record used for the hardware-array dimension
+        (such as ``scans.scanH``), triggered by the innermost 
+        record in ``sscans``.
+        If set to `None`, there is no hardware-array dimension.
+    poll_delay_s : float
+        (default: 0.001 seconds)
+        How long to sleep during each polling loop while waiting
+        for data and for the sscan to complete.
+        Must be a number between zero and 0.1 seconds.
+    phase_timeout_s : float
+        (default: 60 seconds)
+        How long to wait after last update of *any* ``sscan.FAZE``.
+        To cancel this feature, set it to ``None``.
+    release_timeout_s : float
+        (default: 5 seconds)
+        When the plan ends, how long to try to release
+        any inner record still waiting (``WCNT`` > 0).
+    stream_names : [str] or `None`
+        (default: ``None``)
+        Names of the document streams, one for each sscan record,
+        ordered from hardware (if used) to inner to outer dimension.
+        If set to `None`, the attribute names of the records
+        (such as ``scanH``, ``scan1``, ``scan2``) are used.
+    device_settings_stream : str or `None`
+        (default: ``"settings"``)
+        Name of document stream to write *settings* of the sscan records.
+        If set to `None`, this stream will not be written.
+    md : dict, optional
+        metadata
+    
+    EXAMPLE
+    
+    Assume that ``scan2`` has been setup to trigger ``scan1``::
+    
+        from apstools.synApps_ophyd import sscanDevice
+        scans = sscanDevice(P, name="scans")
+        
+        from apstools.plans import sscan_nD
+        RE(sscan_nD([scans.scan1, scans.scan2]), md=dict(purpose="area map"))
+
+    """
+    msg = f"poll_delay_s must be a number between 0 and 0.1, received {poll_delay_s}"
+    assert 0 <= poll_delay_s <= 0.1, msg
+    logger = logging.getLogger(__name__)
+
+    records = list(sscans)
+    if hardware_sscan is not None:
+        records.insert(0, hardware_sscan)
+    if len(records) == 0:
+        raise ValueError("must provide at least one sscan record")
+    if stream_names is None:
+        stream_names = [sscan.attr_name for sscan in records]
+    if len(stream_names) != len(records):
+        msg = f"need {len(records)} stream names, received {stream_names}"
+        raise ValueError(msg)
+
+    outermost = records[-1]
+    inner_records = records[:-1]
+    sscan_status = ophyd.DeviceStatus(outermost.execute_scan)
+    pending = deque()       # indices of records with new data to be read
+    array_signals = {}      # index: signals of the arrays of that record
+    progress = dict(
+        started = False,
+        deadline = time.time() + (phase_timeout_s or 0),
+        data_ready = [None for _ in records],
+        )
+    
+    def execute_cb(value, timestamp, **kwargs):
+        """watch for outermost sscan to complete"""
+        if progress["started"] and value in (0, "IDLE"):
+            sscan_status._finished()
+    
+    def phase_cb(value, timestamp, **kwargs):
+        """any activity in any dimension keeps the plan alive"""
+        if phase_timeout_s is not None:
+            progress["deadline"] = time.time() + phase_timeout_s
+    
+    def make_data_cb(index):
+        def data_cb(value, timestamp, **kwargs):
+            """watch for an inner sscan to finish one pass"""
+            previous = progress["data_ready"][index]
+            progress["data_ready"][index] = value
+            if progress["started"] and previous in (0, "Not Ready"):
+                if value in (1, "Ready"):
+                    pending.append(index)
+        return data_cb
+
+    # acquire only the channels with non-empty configuration in EPICS
+    for sscan in records:
+        sscan.select_channels()
+
+    # positioner readbacks of the outer dimensions, for each record
+    outer_positioners = []
+    for i in range(len(records)):
+        objects = []
+        for sscan in records[i+1:]:
+            for nm in sscan.positioners.read_attrs:
+                if nm.endswith(".readback_value"):
+                    objects.append(getattr(sscan.positioners, nm))
+        outer_positioners.append(objects)
+
+    awct_values = [sscan.awct.get() for sscan in inner_records]
+    data_callbacks = [
+        (sscan.data_ready, sscan.data_ready.subscribe(make_data_cb(i)))
+        for i, sscan in enumerate(inner_records)
+    ]
+    phase_callbacks = [
+        (sscan.scan_phase, sscan.scan_phase.subscribe(phase_cb))
+        for sscan in records
+    ]
+    execute_callback = outermost.execute_scan.subscribe(execute_cb)
+
+    _md = dict(
+        plan_name = "sscan_nD",
+        sscan_dimensions = len(records),
+        sscan_records = [sscan.name for sscan in records],
+        sscan_streams = list(stream_names),
+        )
+    _md.update(md or {})
+
+    def emit_arrays(index):
+        """one event: acquired arrays of this record & outer positions"""
+        sscan = records[index]
+        arrays = _get_sscan_final_arrays(sscan)
+        if index in array_signals:
+            # same objects in every event of the stream
+            for signal, new in zip(array_signals[index], arrays):
+                signal.put(new.get())
+            arrays = array_signals[index]
+        else:
+            array_signals[index] = arrays
+        yield from bps.create(stream_names[index])
+        for obj in arrays + outer_positioners[index]:
+            yield from bps.read(obj)
+        yield from bps.save()
+        if sscan is not outermost:
+            # tell the record to continue
+            yield from bps.abs_set(sscan.wait, 0)
+
+    def _scan():
+        # make each inner record wait for us to read its arrays
+        for sscan in inner_records:
+            yield from bps.mv(sscan.awct, 1)
+
+        yield from bps.open_run(_md)
+        # the sscan may finish (or post data) before bps.mv() returns
+        progress["started"] = True
+        yield from bps.mv(outermost.execute_scan, 1)   # start sscan
+
+        while not sscan_status.done or len(pending) > 0:
+            while len(pending) > 0:
+                yield from emit_arrays(pending.popleft())
+            if phase_timeout_s is not None and time.time() > progress["deadline"]:
+                logger.warning(
+                    "No change in sscan records for %s seconds."
+                    "  Ending plan early as unsuccessful.",
+                    phase_timeout_s)
+                sscan_status._finished(success=False)
+            yield from bps.sleep(poll_delay_s)
+
+        # the outermost dimension
+        yield from emit_arrays(len(records) - 1)
+
+        if device_settings_stream is not None:
+            yield from bps.create(device_settings_stream)
+            for sscan in records:
+                yield from bps.read(sscan)
+            yield from bps.save()
+
+        yield from bps.close_run()
+
+    def _cleanup():
+        outermost.execute_scan.unsubscribe(execute_callback)
+        for obj, cid in data_callbacks + phase_callbacks:
+            obj.unsubscribe(cid)
+        for sscan, awct in zip(inner_records, awct_values):
+            yield from bps.mv(sscan.awct, awct)
+            # release any waiting record
+            deadline = time.time() + release_timeout_s
+            while sscan.wcnt.get() > 0:
+                if time.time() > deadline:
+                    logger.warning(
+                        "%s: still waiting (WCNT=%s) after %s seconds",
+                        sscan.name, sscan.wcnt.get(), release_timeout_s)
+                    break
+                yield from bps.abs_set(sscan.wait, 0)
+                yield from bps.sleep(poll_delay_s)
+        yield from bps.null()
+
+    yield from bpp.finalize_wrapper(_scan(), _cleanup())
+
+    return sscan_status
+
+
+class TuneResults(Device):
+    """
+    results of a :class:`TuneAxis` tune (``bps.read()`` needs a Device or a Signal)
+
+    .. autosummary::
+       
+       ~report
+       ~update
+    """
+    tune_ok = Component(Signal)
+    initial_position = Component(Signal)
+    final_position = Component(Signal)
+    center = Component(Signal)
+    # - - - - -
+    x = Component(Signal)
+    y = Component(Signal)
+    cen = Component(Signal)
+    com = Component(Signal)
+    fwhm = Component(Signal)
+    min = Component(Signal)
+    max = Component(Signal)
+    crossings = Component(Signal)
+    # - - - - - fitted peak shape (NaN if not fitted)
+    fit_center = Component(Signal, value=np.nan)
+    fit_sigma = Component(Signal, value=np.nan)
+    fit_eta = Component(Signal, value=np.nan)
+    fit_height = Component(Signal, value=np.nan)
+    fit_background = Component(Signal, value=np.nan)
+    # - - - - - adaptive multi-pass tuning
+    converged = Component(Signal, value=False)
+    points_saved = Component(Signal, value=0)
+    peakstats_attrs = "x y cen com fwhm min max crossings".split()
+    fit_attrs = "center sigma eta height background".split()
+
+    def update(self, tuner, initial_position, final_position):
+        """copy the results from ``tuner`` (a :class:`TuneAxis`)"""
+        for key in "tune_ok center converged points_saved".split():
+            getattr(self, key).put(getattr(tuner, key))
+        self.final_position.put(final_position)
+        self.initial_position.put(initial_position)
+        for key in self.peakstats_attrs:
+            v = getattr(tuner.peaks, key)
+            if key in ("crossings", "min", "max"):
+                v = np.array(v)
+            getattr(self, key).put(v)
+        fitted = tuner.peaks.fitted or {}
+        for key in self.fit_attrs:
+            getattr(self, "fit_" + key).put(fitted.get(key, np.nan))
+    
+    def report(self):
+        """print the results"""
+        keys = self.peakstats_attrs + "tune_ok center initial_position final_position".split()
+        for key in keys:
+            print("{} : {}".format(key, getattr(self, key).value))
+
+
 class TuneAxis(object):
     """
     tune an axis with a signal
@@ -467,6 +870,23 @@ class TuneAxis(object):
         RE(tuner.multi_pass_tune(width=2, num=9), live_table)
         RE(tuner.tune(width=0.05, num=9), live_table)
     
+    Peak statistics are computed by 
+    :class:`~apstools.callbacks.PeakStatistics`.
+    To locate the peak by fitting a peak shape, set ``peak_choice="fit"``
+    and (optionally) ``fit_shape`` to one of 
+    ``gaussian``, ``lorentzian``, or ``pseudovoigt`` (default)::
+    
+        tuner.peak_choice = "fit"
+        tuner.fit_shape = "gaussian"
+    
+    With ``adaptive=True``, :meth:`multi_pass_tune()` stops as soon as 
+    the center moves less than ``tolerance`` between passes and places 
+    the points of each subsequent pass closer together near the 
+    center found by the previous pass::
+    
+        RE(tuner.multi_pass_tune(width=2, num=9, adaptive=True, tolerance=0.001))
+        print(tuner.points_saved)
+    
     Also see the jupyter notebook referenced here:
     :ref:`example_tuneaxis`.
 
@@ -478,7 +898,7 @@ class TuneAxis(object):
 
     """
     
-    _peak_choices_ = "cen com".split()
+    _peak_choices_ = "cen com fit".split()
     
     def __init__(self, signals, axis, signal_name=None):
         self.signals = signals
@@ -490,6 +910,7 @@ class TuneAxis(object):
         self.peak_choice = self._peak_choices_[0]
         self.center = None
         self.stats = []
+        self.results = TuneResults(name="PeakStats")
         
         # defaults
         self.width = 1
@@ -497,6 +918,15 @@ class TuneAxis(object):
         self.step_factor = 4
         self.pass_max = 6
         self.snake = True
+        self.fit_shape = None       # None: "pseudovoigt" when peak_choice="fit"
+        self.peak_factor = 4        # peak_detected(): max > peak_factor * min
+
+        # adaptive multi_pass_tune()
+        self.adaptive = False
+        self.tolerance = None       # None: scan width / num
+        self.density = 2            # > 1: points are denser near the center
+        self.converged = False
+        self.points_saved = 0
 
     def tune(self, width=None, num=None, md=None):
         """
@@ -504,7 +934,7 @@ class TuneAxis(object):
         
         Scan self.axis centered about current position from
         ``-width/2`` to ``+width/2`` with ``num`` observations.
-        If a peak was detected (default check is that max >= 4*min), 
+        If a peak was detected (default check is that max > peak_factor*min), 
         then set ``self.tune_ok = True``.
 
         PARAMETERS
@@ -528,9 +958,9 @@ class TuneAxis(object):
 
         initial_position = self.axis.position
         final_position = initial_position       # unless tuned
-        start = initial_position - width/2
-        finish = initial_position + width/2
         self.tune_ok = False
+        self.converged = False
+        self.points_saved = 0
 
         tune_md = dict(
             width = width,
@@ -559,68 +989,33 @@ class TuneAxis(object):
         _md.update(md or {})
         if "pass_max" not in _md:
             self.stats = []
-        self.peaks = PeakStats(x=self.axis.name, y=self.signal_name)
-        
-        class Results(Device):
-            """because bps.read() needs a Device or a Signal)"""
-            tune_ok = Component(Signal)
-            initial_position = Component(Signal)
-            final_position = Component(Signal)
-            center = Component(Signal)
-            # - - - - -
-            x = Component(Signal)
-            y = Component(Signal)
-            cen = Component(Signal)
-            com = Component(Signal)
-            fwhm = Component(Signal)
-            min = Component(Signal)
-            max = Component(Signal)
-            crossings = Component(Signal)
-            peakstats_attrs = "x y cen com fwhm min max crossings".split()
-            
-            def report(self):
-                keys = self.peakstats_attrs + "tune_ok center initial_position final_position".split()
-                for key in keys:
-                    print("{} : {}".format(key, getattr(self, key).value))
+        # set by multi_pass_tune(adaptive=True)
+        adaptive = _md.get("tune_adaptive")
+        density = 1 if adaptive is None else adaptive["density"]
+        self.peaks = PeakStatistics(x=self.axis.name, y=self.signal_name)
 
         @bpp.subs_decorator(self.peaks)
         def _scan(md=None):
             yield from bps.open_run(md)
 
-            position_list = np.linspace(start, finish, num)
+            position_list = self._positions(initial_position, width, num, density)
             signal_list = list(self.signals)
             signal_list += [self.axis,]
             for pos in position_list:
                 yield from bps.mv(self.axis, pos)
                 yield from bps.trigger_and_read(signal_list)
             
-            final_position = initial_position
-            if self.peak_detected():
-                self.tune_ok = True
-                if self.peak_choice == "cen":
-                    final_position = self.peaks.cen
-                elif self.peak_choice == "com":
-                    final_position = self.peaks.com
-                else:
-                    final_position = None
-                self.center = final_position
+            final_position = self._evaluate_peak(initial_position)
+            if adaptive is not None:
+                self._evaluate_convergence(
+                    adaptive, _md["points_budget"], _md["points_used"])
 
             # add stream with results
-            # yield from add_results_stream()
             stream_name = "PeakStats"
-            results = Results(name=stream_name)
-
-            for key in "tune_ok center".split():
-                getattr(results, key).put(getattr(self, key))
-            results.final_position.put(final_position)
-            results.initial_position.put(initial_position)
-            for key in results.peakstats_attrs:
-                v = getattr(self.peaks, key)
-                if key in ("crossings", "min", "max"):
-                    v = np.array(v)
-                getattr(results, key).put(v)
-
-            if results.tune_ok.value:
+            results = self.results
+            results.update(self, initial_position, final_position)
+
+            if results.tune_ok.get():
                 yield from bps.create(name=stream_name)
                 yield from bps.read(results)
                 yield from bps.save()
@@ -635,7 +1030,9 @@ class TuneAxis(object):
         
     
     def multi_pass_tune(self, width=None, step_factor=None, 
-                        num=None, pass_max=None, snake=None, md=None):
+                        num=None, pass_max=None, snake=None, 
+                        adaptive=None, tolerance=None, density=None,
+                        md=None):
         """
         BlueSky plan for tuning this axis with this signal
         
@@ -643,6 +1040,18 @@ class TuneAxis(object):
         Each subsequent pass will reduce the width of scan by ``step_factor``.
         If ``snake=True`` then the scan direction will reverse with
         each subsequent pass.
+        
+        If ``adaptive=True``, stop when the center moves less than 
+        ``tolerance`` from the previous pass.  After the first pass, 
+        the points are placed closer together near the center 
+        (see ``density``).  The number of points *not* 
+        scanned (compared with ``pass_max`` full passes) is reported 
+        in ``self.points_saved`` and in the ``points_saved`` field of
+        the ``PeakStats`` stream of each pass (zero until converged).
+        
+        The start document of each pass reports ``points_budget`` 
+        (``pass_max`` full passes) and ``points_used`` (all passes 
+        up to and including this one).
 
         PARAMETERS
     
@@ -662,6 +1071,20 @@ class TuneAxis(object):
         snake : bool
             If ``True``, reverse scan direction on next pass.
             Default value in ``self.snake`` (initially True)
+        adaptive : bool
+            If ``True``, stop early when the center has converged.
+            Default value in ``self.adaptive`` (initially False)
+        tolerance : float
+            Center has converged when it moves less than this amount
+            between passes, in the units of ``self.axis``.
+            Default value in ``self.tolerance`` (initially None, 
+            which means the width of the pass divided by ``num``)
+        density : float
+            (only when ``adaptive=True``)
+            Exponent of the point spacing after the first pass, 
+            ``1`` is evenly spaced, larger values place more points
+            near the center.
+            Default value in ``self.density`` (initially 2)
         md : dict, optional
             metadata
         """
@@ -670,21 +1093,37 @@ class TuneAxis(object):
         step_factor = step_factor or self.step_factor
         snake = snake or self.snake
         pass_max = pass_max or self.pass_max
+        adaptive = adaptive or self.adaptive
+        tolerance = tolerance or self.tolerance
+        density = density or self.density
         
         self.stats = []
+        self.points_saved = 0
 
         def _scan(width=1, step_factor=10, num=10, snake=True):
+            points_used = 0
+            previous_center = None
             for _pass_number in range(pass_max):
+                points_used += num
                 _md = {'pass': _pass_number+1,
                        'pass_max': pass_max,
                        'plan_name': self.__class__.__name__ + '.multi_pass_tune',
+                       'points_budget': pass_max * num,
+                       'points_used': points_used,
                        }
+                if adaptive:
+                    _md["tune_adaptive"] = dict(
+                        tolerance = tolerance or abs(width)/num,
+                        density = 1 if previous_center is None else density,
+                        previous_center = previous_center,
+                        )
                 _md.update(md or {})
             
                 yield from self.tune(width=width, num=num, md=_md)
 
-                if not self.tune_ok:
+                if not self.tune_ok or self.converged:
                     return
+                previous_center = float(self.center)
                 width /= step_factor
                 if snake:
                     width *= -1
@@ -693,13 +1132,65 @@ class TuneAxis(object):
             yield from _scan(
                 width=width, step_factor=step_factor, num=num, snake=snake))
     
+    def _positions(self, center, width, num, density=1):
+        """
+        positions for one pass, centered about ``center``
+        
+        With ``density=1``, the ``num`` positions are evenly spaced.
+        With ``density > 1``, the positions are closer together near
+        the center, such as when the peak position is already known
+        from a previous pass.
+        """
+        u = np.linspace(-1, 1, num)
+        if density != 1:
+            u = np.sign(u) * np.abs(u)**density
+        return center + u * width/2
+    
+    def _evaluate_convergence(self, adaptive, points_budget, points_used):
+        """
+        set ``converged`` & ``points_saved`` for ``multi_pass_tune(adaptive=True)``
+        """
+        previous = adaptive["previous_center"]
+        if self.tune_ok and previous is not None:
+            shift = abs(self.center - previous)
+            self.converged = bool(shift < adaptive["tolerance"])
+        if self.converged:
+            self.points_saved = points_budget - points_used
+
+    def _evaluate_peak(self, initial_position):
+        """
+        set ``tune_ok`` & ``center`` from the peak statistics, return final position
+        """
+        final_position = initial_position
+        if self.peak_detected():
+            self.tune_ok = True
+            if self.peak_choice == "cen":
+                final_position = self.peaks.cen
+            elif self.peak_choice == "com":
+                final_position = self.peaks.com
+            elif self.peak_choice == "fit":
+                fitted = self.peaks.fit(self.fit_shape or "pseudovoigt")
+                if fitted is None:
+                    final_position = self.peaks.cen
+                else:
+                    final_position = fitted["center"]
+            else:
+                final_position = None
+            if final_position is None:
+                # cannot move to an undetermined position
+                self.tune_ok = False
+                final_position = initial_position
+            self.center = final_position
+        return final_position
+    
     def peak_detected(self):
         """
         returns True if a peak was detected, otherwise False
         
         The default algorithm identifies a peak when the maximum
-        value is four times the minimum value.  Change this routine
-        by subclassing :class:`TuneAxis` and override :meth:`peak_detected`.
+        value is ``peak_factor`` (default: four) times the minimum value.  
+        Change this routine by subclassing :class:`TuneAxis` and 
+        override :meth:`peak_detected`.
         """
         if self.peaks is None:
             return False
@@ -709,18 +1200,213 @@ class TuneAxis(object):
         
         ymax = self.peaks.max[-1]
         ymin = self.peaks.min[-1]
-        return ymax > 4*ymin        # this works for USAXS@APS
+        return ymax > self.peak_factor*ymin        # this works for USAXS@APS
 
 
-def tune_axes(axes):
+def _tune_schedule(axes, groups=None, depends_on=None):
     """
-    BlueSky plan to tune a list of axes in sequence
+    arrange ``axes`` into a list of layers, tune all axes in a layer together
+    
+    Each layer contains the axes whose dependencies have been tuned 
+    in a previous layer.  Members of a group (from ``groups``) 
+    depend on the preceding member of the same group.
+    Axes with no dependencies (such as members of ``axes`` that
+    are in no group) are in the first layer.
+    Raises ``ValueError`` if the dependencies are circular.
+    """
+    axes = list(axes)
+    for group in groups or []:
+        axes += [axis for axis in group if axis not in axes]
+    depends = {axis: [] for axis in axes}
+    for group in groups or []:
+        for before, axis in zip(group[:-1], group[1:]):
+            depends[axis].append(before)
+    for axis, requires in (depends_on or {}).items():
+        if axis not in depends:
+            axes.append(axis)
+            depends[axis] = []
+        for before in requires:
+            if before not in depends:
+                axes.append(before)
+                depends[before] = []
+            depends[axis].append(before)
+
+    if groups is None and depends_on is None:
+        # original behavior: each axis depends on the one before it
+        return [[axis] for axis in axes]
+
+    layers = []
+    done = []
+    while len(done) < len(axes):
+        layer = [
+            axis
+            for axis in axes
+            if axis not in done
+            and all(before in done for before in depends[axis])
+        ]
+        if len(layer) == 0:
+            msg = "circular dependency among axes: "
+            msg += ", ".join(
+                [getattr(axis, "name", str(axis)) 
+                 for axis in axes 
+                 if axis not in done])
+            raise ValueError(msg)
+        layers.append(layer)
+        done += layer
+    return layers
+
+
+def _tune_concurrently(tuners, md=None):
+    """
+    BlueSky plan to tune several independent :class:`TuneAxis` in one run
+    
+    At each step, all axes move together, then the detectors are
+    triggered once and each axis (with its signals) is read into a 
+    stream named for that axis.  The results of each axis are
+    written to a stream named ``<axis>_PeakStats``.
+    """
+    names = [tuner.axis.name for tuner in tuners]
+    plans = []
+    for tuner in tuners:
+        if tuner.peak_choice not in tuner._peak_choices_:
+            msg = "peak_choice must be one of {}, geave {}"
+            msg = msg.format(tuner._peak_choices_, tuner.peak_choice)
+            raise ValueError(msg)
+        initial_position = tuner.axis.position
+        positions = tuner._positions(initial_position, tuner.width, tuner.num)
+        tuner.tune_ok = False
+        tuner.converged = False
+        tuner.points_saved = 0
+        tuner.stats = []
+        tuner.peaks = PeakStatistics(
+            x=tuner.axis.name, y=tuner.signal_name, stream=tuner.axis.name)
+        plans.append((tuner, initial_position, positions))
+
+    triggers = []
+    for tuner in tuners:
+        for obj in list(tuner.signals) + [tuner.axis]:
+            if obj not in triggers:
+                triggers.append(obj)
+
+    _md = {'plan_name': 'tune_axes',
+           'tune_parameters': {
+               tuner.axis.name: dict(
+                    num = tuner.num,
+                    width = tuner.width,
+                    initial_position = initial_position,
+                    peak_choice = tuner.peak_choice,
+                    x_axis = tuner.axis.name,
+                    y_axis = tuner.signal_name,
+                    )
+               for tuner, initial_position, _p in plans
+               },
+           'motors': tuple(names),
+           'detectors': tuple(sorted(set([t.signal_name for t in tuners]))),
+           'hints': dict(
+               dimensions = [([name], name) for name in names]
+               )
+           }
+    _md.update(md or {})
+
+    @bpp.subs_decorator([tuner.peaks for tuner in tuners])
+    def _scan(md=None):
+        yield from bps.open_run(md)
+
+        for step in range(max([len(p[2]) for p in plans])):
+            active = [p for p in plans if step < len(p[2])]
+            args = []
+            for tuner, _i, positions in active:
+                args += [tuner.axis, positions[step]]
+            yield from bps.mv(*args)
+
+            group = "tune_axes_trigger"
+            for obj in triggers:
+                if hasattr(obj, "trigger"):
+                    yield from bps.trigger(obj, group=group)
+            yield from bps.wait(group=group)
+            for tuner, _i, _p in active:
+                yield from bps.create(name=tuner.axis.name)
+                for obj in list(tuner.signals) + [tuner.axis]:
+                    yield from bps.read(obj)
+                yield from bps.save()
+
+        args = []
+        for tuner, initial_position, _p in plans:
+            final_position = tuner._evaluate_peak(initial_position)
+            results = tuner.results
+            results.update(tuner, initial_position, final_position)
+            if results.tune_ok.get():
+                yield from bps.create(name=tuner.axis.name + "_PeakStats")
+                yield from bps.read(results)
+                yield from bps.save()
+            args += [tuner.axis, final_position]
+            tuner.stats.append(tuner.peaks)
+        yield from bps.mv(*args)
+        yield from bps.close_run()
+
+        for tuner in tuners:
+            tuner.results.report()
+
+    return (yield from _scan(md=_md))
+
+
+def tune_axes(axes, groups=None, depends_on=None, md=None):
+    """
+    BlueSky plan to tune a list of axes
+    
+    Without ``groups`` or ``depends_on``, the axes are tuned 
+    in sequence, each in its own run.
+    
+    With ``groups`` (a list of lists of axes), the axes in each group 
+    are tuned in order while the groups, which must not interact,
+    are tuned concurrently.  With ``depends_on`` (a dictionary: 
+    ``{axis: [axes to be tuned first]}``), each axis is tuned after 
+    the axes it depends on.  Both may be given together.
+    When either is given, the members of ``axes`` are no longer tuned 
+    in sequence:  an axis in no group and not in ``depends_on`` is 
+    independent and is tuned first, together with the first member 
+    of each group.  Circular dependencies raise ``ValueError``.
+    
+    Axes that can be tuned at the same time (all are :class:`TuneAxis`)
+    are tuned together in one run:  at each step all axes are moved,
+    then the detectors are triggered and each axis is read into a stream
+    named for its axis.  The results of each axis are in the stream 
+    ``<axis>_PeakStats``.  Each axis uses its own ``width`` and ``num``.
+    
+    PARAMETERS
+    
+    axes : [TuneAxis]
+        axes to be tuned (objects that provide a ``tune()`` plan)
+    groups : [[TuneAxis]], optional
+        sequences of axes to be tuned in order, each sequence 
+        independent of the others
+    depends_on : {TuneAxis: [TuneAxis]}, optional
+        axes which must be tuned before the key axis
+    md : dict, optional
+        metadata
     
     EXAMPLE
     
     Sequentially, tune a list of preconfigured axes::
         
         RE(tune_axes([mr, m2r, ar, a2r])
+    
+    Tune the slits on two branches concurrently, 
+    then the analyzer stages (which depend on both slits)::
+        
+        RE(tune_axes(
+            [], 
+            groups=[[sa_h, sa_v], [sb_h, sb_v]], 
+            depends_on={ar: [sa_v, sb_v], a2r: [ar]}))
     """
-    for axis in axes:
-        yield from axis.tune()
+    for layer in _tune_schedule(axes, groups=groups, depends_on=depends_on):
+        concurrent = len(layer) > 1 and all(
+            [isinstance(axis, TuneAxis) for axis in layer])
+        if concurrent:
+            yield from _tune_concurrently(layer, md=md)
+        else:
+            for axis in layer:
+                if md is None:
+                    yield from axis.tune()
+                else:
+                    yield from axis.tune(md=md)
@@ -4,6 +4,7 @@
 
 .. autosummary::
    
+   ~pseudo_voigt
    ~SynPseudoVoigt
 
 """
@@ -26,6 +27,26 @@ import numpy as np
 logger = logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 
+def pseudo_voigt(x, center=0, sigma=1, eta=0.5):
+    """
+    peak-normalized pseudo-Voigt profile (maximum value is 1 at ``center``)
+
+    This is the profile evaluated by :class:`SynPseudoVoigt`:
+    a mixture of a Lorentzian (fraction ``eta``, half-width ``sigma``)
+    and a Gaussian (fraction ``1-eta``, standard deviation ``sigma``).
+    ``x`` may be a number or a NumPy array.
+
+    :see: https://en.wikipedia.org/wiki/Voigt_profile
+    """
+    z = (np.asarray(x, dtype=float) - center) / sigma
+    v = 0
+    if eta > 0:
+        v = v + eta / (1 + z**2)
+    if eta < 1:
+        v = v + (1-eta) * np.exp(-0.5 * z**2)
+    return v
+
+
 class SynPseudoVoigt(ophyd.sim.SynSignal):
     """
     Evaluate a point on a pseudo-Voigt based on the value of a motor.
@@ -58,6 +79,19 @@ class SynPseudoVoigt(ophyd.sim.SynSignal):
     noise_multiplier : float
         Only relevant for 'uniform' noise. Multiply the random amount of
         noise by 'noise_multiplier'
+    shape : int or (int, int), optional
+        If given, the signal is an array (like a line or area detector)
+        with this shape, default=None (a single value)
+    span : float, optional
+        Only relevant with ``shape``. Width (in motor units) of the 
+        array's field of view, centered at the motor position, 
+        default=10*sigma
+    seed : int, optional
+        Seed for this signal's random number generator (for 
+        reproducible noise), default=None (unpredictable)
+    noise_block_size : int, optional
+        Number of 'uniform' noise values generated at once and
+        consumed as needed, default=4096
 
     EXAMPLE
     
@@ -84,11 +118,40 @@ class SynPseudoVoigt(ophyd.sim.SynSignal):
 
         #  RE(bp.scan([synthetic_pseudovoigt], m1, -2, 0, 219))
 
+    EXAMPLE
+    
+    Evaluate many motor positions at once (no motor moves)::
+
+        y = det.evaluate(np.linspace(-2, 2, 10001))
+
+    EXAMPLE
+    
+    Reproducible noise (the same seed gives the same noise)::
+
+        det = SynPseudoVoigt('det', motor, 'motor', 
+            scale=1000, noise="poisson", seed=12345)
+
+    EXAMPLE
+    
+    A 2-D area-detector-like image of a peak (a spot)
+    that moves across the image as the motor moves::
+
+        spot = SynPseudoVoigt('spot', motor, 'motor', 
+            sigma=0.1, scale=1000, shape=(256, 256), span=2)
+
+    .. autosummary::
+       
+       ~evaluate
+       ~profile
+       ~reseed
+
     """
 
     def __init__(self, name, motor, motor_field, center=0, 
                 eta=0.5, scale=1, sigma=1, bkg=0, 
                 noise=None, noise_multiplier=1,
+                shape=None, span=None,
+                seed=None, noise_block_size=4096,
                 **kwargs):
         if eta < 0.0 or eta > 1.0:
             raise ValueError("eta={} must be between 0 and 1".format(eta))
@@ -98,10 +161,14 @@ class SynPseudoVoigt(ophyd.sim.SynSignal):
             raise ValueError("sigma must be > 0")
         if bkg < 0.0:
             raise ValueError("bkg must be >= 0")
+        if noise not in (None, "poisson", "uniform"):
+            msg = "noise={} must be one of: 'poisson', 'uniform', None"
+            raise ValueError(msg.format(noise))
         
         # remember these terms for later access by user
         self.name = name
         self.motor = motor
+        self.motor_field = motor_field
         self.center = center
         self.eta = eta
         self.scale = scale
@@ -109,30 +176,86 @@ class SynPseudoVoigt(ophyd.sim.SynSignal):
         self.bkg = bkg
         self.noise = noise
         self.noise_multiplier = noise_multiplier
+        self.noise_block_size = max(1, int(noise_block_size))
+        self.reseed(seed)
 
-        def f_lorentzian(x, gamma):
-            #return gamma / np.pi / (x**2 + gamma**2)
-            return 1 / np.pi / gamma / (1 + (x/gamma)**2)
-
-        def f_gaussian(x, sigma):
-            numerator = np.exp(-0.5 * (x / sigma) ** 2)
-            denominator = sigma * np.sqrt(2 * np.pi)
-            return numerator / denominator
+        # pixel offsets (from the motor position) of the array
+        self.shape = None
+        self._pixels = None
+        if shape is not None:
+            shape = tuple(np.atleast_1d(shape).astype(int))
+            if len(shape) not in (1, 2) or min(shape) < 1:
+                msg = "shape={} must be 1-D or 2-D".format(shape)
+                raise ValueError(msg)
+            self.shape = shape
+            span = span or 10*sigma
+            axes = [np.linspace(-span/2, span/2, n) for n in shape]
+            if len(shape) == 1:
+                self._pixels = (axes[0], None)
+            else:
+                # rows: perpendicular to motion, columns: along motion
+                self._pixels = (axes[1][np.newaxis, :], axes[0][:, np.newaxis])
 
         def pvoigt():
             m = motor.read()[motor_field]['value']
-            g_max = f_gaussian(0, sigma)    # peak normalization
-            l_max = f_lorentzian(0, sigma)
-            v = bkg
-            if eta > 0:
-                v += eta * f_lorentzian(m - center, sigma) / l_max
-            if eta < 1:
-                v += (1-eta) * f_gaussian(m - center, sigma) / g_max
-            v *= scale
-            if noise == 'poisson':
-                v = int(np.random.poisson(np.round(v), 1))
-            elif noise == 'uniform':
-                v += np.random.uniform(-1, 1) * noise_multiplier
-            return v
+            if self._pixels is None:
+                return self.evaluate(m)
+            x, y = self._pixels
+            return self.evaluate(x + m, y)
 
         super().__init__(name=name, func=pvoigt, **kwargs)
+
+    def reseed(self, seed=None):
+        """
+        restart the noise from ``seed``
+        
+        Discards any noise values not yet used.  
+        If ``seed`` is None, a new, unpredictable, seed is used.
+        """
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._noise_buffer = np.empty(0)
+
+    def _uniform_noise(self, shape):
+        """take uniform noise values (-1 .. 1) from the buffer"""
+        n = int(np.prod(shape))
+        if n > len(self._noise_buffer):
+            size = max(self.noise_block_size, n - len(self._noise_buffer))
+            block = self.rng.uniform(-1, 1, size)
+            self._noise_buffer = np.concatenate((self._noise_buffer, block))
+        values = self._noise_buffer[:n]
+        self._noise_buffer = self._noise_buffer[n:]
+        return values.reshape(shape)
+
+    def profile(self, positions, offsets=None):
+        """
+        noise-free profile at the motor ``positions`` (number or array)
+        
+        ``offsets``, if given, are distances perpendicular to the 
+        motor axis (broadcast with ``positions``), such as the 
+        rows of a 2-D image.
+        """
+        x = np.asarray(positions, dtype=float)
+        if offsets is not None:
+            # radial distance from the peak center
+            x = self.center + np.hypot(x - self.center, offsets)
+        v = pseudo_voigt(x, self.center, self.sigma, self.eta)
+        return self.scale * (self.bkg + v)
+
+    def evaluate(self, positions, offsets=None):
+        """
+        signal (with noise) at the motor ``positions`` (number or array)
+
+        All positions are evaluated with one set of NumPy operations.  
+        Returns a number if ``positions`` is a number, otherwise 
+        an array with the (broadcast) shape of ``positions`` 
+        (and ``offsets``).
+        """
+        v = self.profile(positions, offsets)
+        if self.noise == 'poisson':
+            v = self.rng.poisson(np.round(v))
+        elif self.noise == 'uniform':
+            v = v + self._uniform_noise(np.shape(v)) * self.noise_multiplier
+        if np.ndim(v) == 0:
+            v = int(v) if self.noise == 'poisson' else float(v)
+        return v
@@ -20,6 +20,76 @@
 #-----------------------------------------------------------------------------
 
 from bluesky.suspenders import SuspenderBase
+import threading
+import time
+import weakref
+
+
+class _SignalDispatcher(object):
+    """
+    one subscription to a signal, shared by all suspenders watching it
+    
+    Each update of the signal is passed to every installed suspender.
+    The registry is keyed (weakly) by the signal itself, not by 
+    ``id(signal)``, which may be reused by another signal.
+    """
+    _registry = weakref.WeakKeyDictionary()     # {signal: {event_type: _SignalDispatcher}}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, event_type=None):
+        self.event_type = event_type
+        self.listeners = []
+        self.last_kwargs = None
+        self.lock = threading.Lock()
+        self.cid = None
+
+    @classmethod
+    def add(cls, suspender, event_type=None):
+        """start passing updates of the suspender's signal to ``suspender``"""
+        signal = suspender._sig
+        with cls._registry_lock:
+            dispatchers = cls._registry.setdefault(signal, {})
+            dispatcher = dispatchers.get(event_type)
+            if dispatcher is None:
+                dispatcher = cls(event_type)
+                dispatchers[event_type] = dispatcher
+        with dispatcher.lock:
+            if suspender not in dispatcher.listeners:
+                dispatcher.listeners.append(suspender)
+            last_kwargs = dispatcher.last_kwargs
+            subscribe = dispatcher.cid is None
+        if subscribe:
+            # run=True: the current value is dispatched now
+            dispatcher.cid = signal.subscribe(
+                dispatcher, event_type=event_type, run=True)
+        elif last_kwargs is not None:
+            suspender(**last_kwargs)
+
+    @classmethod
+    def discard(cls, suspender):
+        """stop passing updates to ``suspender``"""
+        signal = suspender._sig
+        with cls._registry_lock:
+            dispatchers = cls._registry.get(signal, {})
+            for event_type, dispatcher in list(dispatchers.items()):
+                with dispatcher.lock:
+                    if suspender in dispatcher.listeners:
+                        dispatcher.listeners.remove(suspender)
+                    empty = len(dispatcher.listeners) == 0
+                if empty:
+                    if dispatcher.cid is not None:
+                        signal.unsubscribe(dispatcher.cid)
+                    del dispatchers[event_type]
+            if signal in cls._registry and len(dispatchers) == 0:
+                del cls._registry[signal]
+
+    def __call__(self, **kwargs):
+        with self.lock:
+            # replayed to suspenders added later, without the signal itself
+            self.last_kwargs = {k: v for k, v in kwargs.items() if k != "obj"}
+            listeners = list(self.listeners)
+        for suspender in listeners:
+            suspender(**kwargs)
 
 
 class SuspendWhenChanged(SuspenderBase):
@@ -30,6 +100,22 @@ class SuspendWhenChanged(SuspenderBase):
     Only resume if allowed AND when monitored equals expected.
     Default expected value is current value when object is created.
     
+    For numerical signals, a ``tolerance`` allows small deviations:
+    suspend when the value differs from the expected by more than 
+    ``tolerance``.  For hysteresis, resume only when the value is back
+    within ``resume_tolerance`` (default: ``tolerance``, must not be 
+    larger) of the expected.
+    
+    To ignore brief glitches, the value must stay changed 
+    for ``debounce_s`` seconds before the plan is suspended 
+    (and, with ``allow_resume=True``, must stay at the expected value 
+    for ``debounce_s`` before it resumes).  Noisy signals can be 
+    evaluated no more often than every ``min_interval_s`` seconds
+    (using the latest value).
+    
+    All ``SuspendWhenChanged`` suspenders watching the same signal
+    share one subscription to it.
+    
     USAGE::
 
         # pause if this value changes in our session
@@ -37,17 +123,44 @@ class SuspendWhenChanged(SuspenderBase):
         suspend_instrument_in_use = SuspendWhenChanged(instrument_in_use)
         RE.install_suspender(suspend_instrument_in_use)
 
+        # ignore changes lasting less than 2 seconds
+        suspend_mode = SuspendWhenChanged(
+            operating_mode, allow_resume=True, debounce_s=2)
+        RE.install_suspender(suspend_mode)
+
+        # suspend when more than 0.5 from 100, resume within 0.1
+        suspend_energy = SuspendWhenChanged(
+            energy, expected_value=100, allow_resume=True,
+            tolerance=0.5, resume_tolerance=0.1)
+        RE.install_suspender(suspend_energy)
+
     """
     # see: http://nsls-ii.github.io/bluesky/_modules/bluesky/suspenders.html#SuspendCeil
     
     def __init__(self, signal, *, 
                 expected_value=None,
                 allow_resume=False,
+                tolerance=None, resume_tolerance=None,
+                debounce_s=0, min_interval_s=0,
                 sleep=0, pre_plan=None, post_plan=None, tripped_message='',
                 **kwargs):
         
+        if resume_tolerance is None:
+            resume_tolerance = tolerance
+        elif tolerance is None or resume_tolerance > tolerance:
+            msg = "resume_tolerance ({}) must not be larger than tolerance ({})"
+            raise ValueError(msg.format(resume_tolerance, tolerance))
         self.expected_value = expected_value or signal.value
         self.allow_resume = allow_resume
+        self.tolerance = tolerance
+        self.resume_tolerance = resume_tolerance
+        self.debounce_s = debounce_s
+        self.min_interval_s = min_interval_s
+        self._latest = None
+        self._last_evaluation = 0
+        self._rate_timer = None
+        self._debounce_timer = None
+        self._timer_lock = threading.RLock()
         super().__init__(signal, 
             sleep=sleep, 
             pre_plan=pre_plan, 
@@ -55,11 +168,102 @@ class SuspendWhenChanged(SuspenderBase):
             tripped_message=tripped_message,
             **kwargs)
 
+    def install(self, RE, *, event_type=None):
+        """install callback on the (shared) subscription to the signal"""
+        with self._lock:
+            self.RE = RE
+        _SignalDispatcher.add(self, event_type=event_type)
+
+    def remove(self):
+        """disable the suspender"""
+        _SignalDispatcher.discard(self)
+        with self._timer_lock:
+            for timer in (self._rate_timer, self._debounce_timer):
+                if timer is not None:
+                    timer.cancel()
+            self._rate_timer = None
+            self._debounce_timer = None
+        super().remove()
+
+    def __call__(self, value=None, **kwargs):
+        """receive an update of the signal"""
+        if self.debounce_s <= 0 and self.min_interval_s <= 0:
+            return super().__call__(value, **kwargs)
+        with self._timer_lock:
+            self._latest = value
+            if self._rate_timer is not None:
+                return      # evaluated when the timer expires
+            wait_s = self._last_evaluation + self.min_interval_s - time.time()
+            if wait_s > 0:
+                self._rate_timer = threading.Timer(wait_s, self._rate_timer_cb)
+                self._rate_timer.daemon = True
+                self._rate_timer.start()
+                return
+        self._evaluate(value)
+
+    def _rate_timer_cb(self):
+        """(internal) evaluate the latest value after ``min_interval_s``"""
+        with self._timer_lock:
+            self._rate_timer = None
+            value = self._latest
+        self._evaluate(value)
+
+    def _wants_change(self, value):
+        """(internal) would ``value`` suspend (or resume)?"""
+        if self.tripped:
+            return self._should_resume(value)
+        return self._should_suspend(value)
+
+    def _evaluate(self, value):
+        """(internal) suspend or resume, after ``debounce_s`` if set"""
+        with self._timer_lock:
+            self._last_evaluation = time.time()
+            if self.debounce_s <= 0:
+                pass
+            elif self._wants_change(value):
+                if self._debounce_timer is None:
+                    self._debounce_timer = threading.Timer(
+                        self.debounce_s, self._debounce_timer_cb)
+                    self._debounce_timer.daemon = True
+                    self._debounce_timer.start()
+                return
+            else:
+                # changed back before debounce_s: ignore the glitch
+                if self._debounce_timer is not None:
+                    self._debounce_timer.cancel()
+                    self._debounce_timer = None
+                return
+        super().__call__(value)
+
+    def _debounce_timer_cb(self):
+        """(internal) value has not changed back for ``debounce_s``"""
+        with self._timer_lock:
+            self._debounce_timer = None
+            value = self._latest
+            if not self._wants_change(value):
+                return
+        super().__call__(value)
+
+    def _deviation(self, value):
+        """(internal) ``|value - expected_value|``, None if not numerical"""
+        try:
+            return abs(float(value) - float(self.expected_value))
+        except (TypeError, ValueError):
+            return None
+
     def _should_suspend(self, value):
-        return value != self.expected_value
+        deviation = self._deviation(value)
+        if self.tolerance is None or deviation is None:
+            return value != self.expected_value
+        return deviation > self.tolerance
 
     def _should_resume(self, value):
-        return self.allow_resume and value == self.expected_value
+        if not self.allow_resume:
+            return False
+        deviation = self._deviation(value)
+        if self.resume_tolerance is None or deviation is None:
+            return value == self.expected_value
+        return deviation <= self.resume_tolerance
 
     def _get_justification(self):
         if not self.tripped:
@@ -18,6 +18,11 @@ EXAMPLES:;
     
     calc1.reset()
 
+    # reset all calcs and scans with concurrent puts
+    targets = calcs.reset_targets()
+    targets.update(scans.reset_targets())
+    apstools.synApps_ophyd.bulk_put(targets)
+
 Compare this effort with a similar project:
 https://github.com/klauer/recordwhat
 """
@@ -33,6 +38,7 @@ https://github.com/klauer/recordwhat
 #-----------------------------------------------------------------------------
 
 
+from .bulk import *
 from .busy import *
 from .save_data import *
 from .sscan import *
@@ -0,0 +1,155 @@
+
+"""
+Bulk configuration of EPICS synApps records
+
+Write many fields (of one or more records) at once:
+read the present values, then (concurrently) put only
+those fields not already at their target value.
+Wait for all the puts to complete.
+
+EXAMPLES:;
+
+    import apstools.synApps_ophyd
+    calcs = apstools.synApps_ophyd.userCalcsDevice("xxx:", name="calcs")
+    scans = apstools.synApps_ophyd.sscanDevice("xxx:", name="scans")
+
+    # reset all calcs and scans together
+    targets = calcs.reset_targets()
+    targets.update(scans.reset_targets())
+    status = apstools.synApps_ophyd.bulk_put(targets)
+
+
+.. autosummary::
+
+    ~bulk_put
+    ~bulk_get
+
+"""
+
+#-----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     jemian@anl.gov
+# :copyright: (c) 2017-2019, UChicago Argonne, LLC
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+#-----------------------------------------------------------------------------
+
+
+import epics
+import threading
+from ophyd.signal import EpicsSignalBase
+from ophyd.status import Status
+from ophyd.status import wait as status_wait
+
+
+__all__ = """
+    bulk_put
+    bulk_get
+    """.split()
+
+
+def _write_pvname(signal):
+    """name of the EPICS PV written by ``signal`` (None if not EPICS)"""
+    if not isinstance(signal, EpicsSignalBase):
+        return None
+    return getattr(signal, "setpoint_pvname", None) or signal.pvname
+
+
+def _same_value(current, target):
+    """True if ``current`` value is already ``target``"""
+    if current is None:
+        return False
+    if isinstance(target, str) and str(current).strip() == target.strip():
+        return True
+    try:
+        return float(current) == float(target)
+    except (TypeError, ValueError):
+        return False
+
+
+def bulk_get(signals, timeout=2.0):
+    """
+    read the present values of many signals
+
+    EPICS signals are read together (in one CA request, as strings),
+    any others with ``signal.get()``.
+
+    Returns ``{signal: value}`` (value is None if not read)
+    """
+    signals = list(signals)
+    values = {}
+    epics_signals = []
+    for signal in signals:
+        if _write_pvname(signal) is None:
+            values[signal] = signal.get()
+        else:
+            epics_signals.append(signal)
+    if len(epics_signals) > 0:
+        results = epics.caget_many(
+            [_write_pvname(signal) for signal in epics_signals],
+            as_string=True,
+            timeout=timeout,
+            connection_timeout=timeout)
+        values.update(zip(epics_signals, results))
+    return {signal: values[signal] for signal in signals}
+
+
+def bulk_put(targets, skip_unchanged=True, wait=True, timeout=10):
+    """
+    write many signals concurrently, return one status for all the puts
+
+    PARAMETERS
+
+    targets
+        *dict* : ``{signal: value}``,
+        such as from the ``reset_targets()`` method of a record
+
+    skip_unchanged
+        *bool* : only write signals not already at their target value
+        (default: True)
+
+    wait
+        *bool* : wait for all the puts to complete (default: True)
+
+    timeout
+        *float* : time (s) allowed for all the puts to complete (default: 10)
+    """
+    targets = list(targets.items())
+    if skip_unchanged and len(targets) > 0:
+        current = bulk_get([signal for signal, _ in targets])
+        targets = [
+            (signal, value)
+            for signal, value in targets
+            if not _same_value(current[signal], value)
+        ]
+
+    status = Status(timeout=timeout)
+    pending = [len(targets)]
+    lock = threading.Lock()
+
+    def put_done(*args, **kwargs):
+        with lock:
+            pending[0] -= 1
+            finished = pending[0] == 0
+        if finished and not status.done:
+            status._finished(success=True)
+
+    # start all the puts before waiting for any
+    try:
+        for signal, value in targets:
+            if _write_pvname(signal) is None:
+                signal.put(value)
+                put_done()
+            else:
+                signal.put(value, use_complete=True, callback=put_done)
+    except Exception:
+        status._finished(success=False)
+        raise
+    if len(targets) == 0:
+        status._finished(success=True)
+
+    if wait:
+        status_wait(status)
+    return status
@@ -9,6 +9,9 @@ EXAMPLE
     from apstools.synApps_ophyd import SaveData
     save_data = SaveData("xxx:saveData_", name="save_data")
 
+    # after a scan, read the MDA file just written
+    mda = save_data.read_latest_mda()
+
 
 Public Structures
 
@@ -29,8 +32,11 @@ Public Structures
 #-----------------------------------------------------------------------------
 
 
+import os
 from ophyd import Device, Component, EpicsSignal, EpicsSignalRO
 
+from ..filereaders import read_mda
+
 __all__ = ["SaveData", ]
 
 
@@ -45,6 +51,8 @@ class SaveData(Device):
 
     .. autosummary::
        
+        ~latest_mda_file
+        ~read_latest_mda
         ~reset
     
     """
@@ -77,3 +85,28 @@ class SaveData(Device):
         self.write_1D_each_point.put("No")
         self.max_retries.put(10)
         self.retry_wait_s.put(15)
+
+    def latest_mda_file(self, directory=None):
+        """
+        name of the MDA file most recently written
+
+        ``directory`` : (optional) replaces ``full_path_name``,
+        such as when the IOC's file system is mounted on
+        a different path on this computer
+        """
+        path = self.full_path_name.get()
+        file_name = self.full_name.get()
+        if directory is not None:
+            path = directory
+        elif path.endswith(file_name):
+            return path
+        return os.path.join(path, file_name)
+
+    def read_latest_mda(self, directory=None):
+        """
+        read the MDA file most recently written
+
+        Returns :class:`apstools.filereaders.MdaFile`
+        (see :meth:`latest_mda_file` for ``directory``)
+        """
+        return read_mda(self.latest_mda_file(directory=directory))
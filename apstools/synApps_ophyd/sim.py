@@ -0,0 +1,940 @@
+
+"""
+Simulations (in-process, without an IOC) of the EPICS synApps records
+
+Each simulated device has the same components as the real device.
+Its EPICS signals are replaced with simulated signals that remember
+their PV names, kept in a (process-wide) database of PVs.
+Records that refer to other PVs by name (such as the ``*PV``
+fields of the sscan record or the ``IN*N`` fields of the swait
+record) find them in this database.
+
+EXAMPLES:;
+
+    from apstools.synApps_ophyd import sim
+    from apstools.plans import sscan_1D
+
+    m1 = sim.sim_pv_database.create("sim:m1", 0)
+    calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+    scans = sim.SimSscanDevice("sim:", name="scans")
+
+    calcs.calc1.channels.A.input_pv.put("sim:m1")
+    calcs.calc1.calc.put("exp(-A*A)")
+
+    scan = scans.scan1
+    scan.number_points.put(21)
+    scan.positioners.p1.setpoint_pv.put("sim:m1")
+    scan.positioners.p1.start.put(-2)
+    scan.positioners.p1.end.put(2)
+    scan.triggers.t1.trigger_pv.put("sim:userCalc1.PROC")
+    scan.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+    RE(sscan_1D(scan))
+
+
+.. autosummary::
+
+    ~SimPVDatabase
+    ~SimEpicsSignal
+    ~SimEpicsSignalRO
+    ~SimSscanRecord
+    ~SimSscanDevice
+    ~SimSwaitRecord
+    ~SimUserCalcsDevice
+    ~SimBusyRecord
+    ~SimSaveData
+    ~compile_calc
+
+"""
+
+#-----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     jemian@anl.gov
+# :copyright: (c) 2017-2019, UChicago Argonne, LLC
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+#-----------------------------------------------------------------------------
+
+
+import copy
+import functools
+import math
+import numpy as np
+import os
+import re
+import threading
+import time
+import weakref
+from ophyd import Component, Device, EpicsSignal, EpicsSignalRO
+from ophyd.device import DynamicDeviceComponent
+from ophyd.sim import FakeEpicsSignal, FakeEpicsSignalRO
+from ophyd.status import Status
+
+from .busy import busyRecord, BusyStatus
+from .save_data import SaveData
+from .sscan import sscanRecord, sscanDevice
+from .swait import swaitRecord, userCalcsDevice, SWAIT_CHANNEL_LETTERS
+
+
+__all__ = """
+    SimPVDatabase
+    sim_pv_database
+    SimEpicsSignal
+    SimEpicsSignalRO
+    SimSscanRecord
+    SimSscanDevice
+    SimSwaitRecord
+    SimUserCalcsDevice
+    SimBusyRecord
+    SimSaveData
+    compile_calc
+    """.split()
+
+
+class SimPVDatabase(object):
+    """
+    PVs of the simulated devices, by name
+
+    .. autosummary::
+
+        ~create
+        ~find
+        ~get
+        ~put
+        ~process
+        ~register
+        ~seed
+
+    ``rng`` is the random number generator of the simulation
+    (such as ``RNDM`` in a CALC expression),
+    use :meth:`seed` for repeatable results.
+    """
+
+    def __init__(self, seed=None):
+        self._pvs = weakref.WeakValueDictionary()
+        self._created = {}
+        self._lock = threading.RLock()
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """restart the random number generator from ``seed``"""
+        self.rng = np.random.default_rng(seed)
+
+    def register(self, signal, pvname):
+        """add ``signal`` to the database as ``pvname``"""
+        with self._lock:
+            self._pvs[pvname] = signal
+
+    def create(self, pvname, value=0):
+        """create a soft PV (such as an EPICS ao record) and return its signal"""
+        signal = SimEpicsSignal(pvname, name=re.sub(r"\W", "_", pvname))
+        signal.put(value)
+        with self._lock:
+            self._created[pvname] = signal   # keep a reference
+        return signal
+
+    def find(self, pvname):
+        """
+        signal for ``pvname`` (None if not found)
+
+        Link options (such as ``"xxx:m1.RBV NPP NMS"``) are ignored.
+        A record name refers to its ``.VAL`` field.
+        """
+        pvname = str(pvname or "").strip()
+        if len(pvname) == 0:
+            return None
+        pvname = pvname.split()[0]
+        with self._lock:
+            signal = self._pvs.get(pvname)
+            if signal is None and "." not in pvname:
+                signal = self._pvs.get(pvname + ".VAL")
+            if signal is None and pvname.endswith(".VAL"):
+                signal = self._pvs.get(pvname[:-len(".VAL")])
+        return signal
+
+    def get(self, pvname, default=None):
+        """value of ``pvname`` (``default`` if not found)"""
+        signal = self.find(pvname)
+        if signal is None:
+            return default
+        return signal.get()
+
+    def put(self, pvname, value, wait=False, timeout=None):
+        """
+        write ``value`` to ``pvname``, return True if found
+
+        With ``wait=True`` (as a CA put with completion),
+        return when the record that owns ``pvname``
+        has finished processing (such as a scan started
+        by writing to its ``.EXSC`` field).
+        """
+        signal = self.find(pvname)
+        if signal is None:
+            return False
+        if isinstance(signal, SimEpicsSignalRO):
+            signal.sim_put(value)
+        else:
+            signal.put(value)
+        completion = getattr(signal.parent, "_sim_put_completion", None)
+        if wait and completion is not None:
+            completion(signal, timeout=timeout)
+        return True
+
+    def process(self, pvname):
+        """process the record named by ``pvname`` (as by a forward link)"""
+        record = str(pvname or "").strip().split(" ")[0].split(".")[0]
+        if len(record) > 0:
+            return self.put(record + ".PROC", 1)
+        return False
+
+
+sim_pv_database = SimPVDatabase()
+
+
+class SimEpicsSignal(FakeEpicsSignal):
+    """
+    simulated EpicsSignal: remembers its PV name, kept in the PV database
+
+    Like a CA put without completion, ``set()`` returns a status
+    that is already done.
+    """
+
+    def __init__(self, read_pv, write_pv=None, **kwargs):
+        super().__init__(read_pv, write_pv=write_pv, **kwargs)
+        self.pvname = read_pv
+        self.setpoint_pvname = write_pv or read_pv
+        sim_pv_database.register(self, read_pv)
+
+    def set(self, value, **kwargs):
+        self.put(value)
+        status = Status(obj=self)
+        status._finished(success=True)
+        return status
+
+
+class SimEpicsSignalRO(FakeEpicsSignalRO, SimEpicsSignal):
+    """simulated EpicsSignalRO (use ``sim_put()`` to change its value)"""
+
+
+_sim_device_cache = {
+    EpicsSignal: SimEpicsSignal,
+    EpicsSignalRO: SimEpicsSignalRO,
+}
+
+
+def _make_sim_device(cls):
+    """
+    Device class with the structure of ``cls``, EPICS signals simulated
+
+    (as ``ophyd.sim.make_fake_device()``, with :class:`SimEpicsSignal`)
+    """
+    if cls not in _sim_device_cache:
+        if not issubclass(cls, Device):
+            _sim_device_cache[cls] = cls
+            return cls
+        sim_dict = {}
+        for cpt_name in cls.component_names:
+            cpt = getattr(cls, cpt_name)
+            if isinstance(cpt, DynamicDeviceComponent):
+                sim_cpt = Component(
+                    cpt.cls,
+                    suffix=cpt.suffix,
+                    lazy=cpt.lazy,
+                    trigger_value=cpt.trigger_value,
+                    kind=cpt.kind,
+                    add_prefix=cpt.add_prefix,
+                    doc=cpt.doc,
+                    **cpt.kwargs,
+                )
+            else:
+                sim_cpt = copy.copy(cpt)
+            sim_cpt.cls = _make_sim_device(cpt.cls)
+            sim_dict[cpt_name] = sim_cpt
+        _sim_device_cache[cls] = type("Sim{}".format(cls.__name__), (cls,), sim_dict)
+    return _sim_device_cache[cls]
+
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+# CALC expressions (swait record)
+
+_calc_token = re.compile(r"""
+    \s*(?:
+      (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<op>\*\*|<=|>=|==|!=|&&|\|\||>>|<<|[-+*/%^()?:,<>=#!&|~])
+    )""", re.VERBOSE)
+
+# binary operators, lowest precedence first
+_calc_binary_operators = [
+    {"||": lambda a, b: float(bool(a) or bool(b))},
+    {"&&": lambda a, b: float(bool(a) and bool(b))},
+    {
+        "|": lambda a, b: float(int(a) | int(b)),
+        "OR": lambda a, b: float(int(a) | int(b)),
+        "XOR": lambda a, b: float(int(a) ^ int(b)),
+    },
+    {
+        "&": lambda a, b: float(int(a) & int(b)),
+        "AND": lambda a, b: float(int(a) & int(b)),
+    },
+    {
+        "=": lambda a, b: float(a == b),
+        "==": lambda a, b: float(a == b),
+        "#": lambda a, b: float(a != b),
+        "!=": lambda a, b: float(a != b),
+        "<": lambda a, b: float(a < b),
+        ">": lambda a, b: float(a > b),
+        "<=": lambda a, b: float(a <= b),
+        ">=": lambda a, b: float(a >= b),
+    },
+    {
+        ">>": lambda a, b: float(int(a) >> int(b)),
+        "<<": lambda a, b: float(int(a) << int(b)),
+    },
+    {
+        "+": lambda a, b: a + b,
+        "-": lambda a, b: a - b,
+    },
+    {
+        "*": lambda a, b: a * b,
+        "/": lambda a, b: a / b,
+        "%": lambda a, b: float(int(a) % int(b)),
+    },
+]
+
+_calc_constants = {
+    "PI": math.pi,
+    "D2R": math.pi / 180,
+    "R2D": 180 / math.pi,
+    "S2R": math.pi / 180 / 3600,
+    "R2S": 180 * 3600 / math.pi,
+}
+
+_calc_functions = {
+    "ABS": abs,
+    "SQR": math.sqrt,
+    "SQRT": math.sqrt,
+    "EXP": math.exp,
+    "LOG": math.log10,
+    "LN": math.log,
+    "LOGE": math.log,
+    "SIN": math.sin,
+    "COS": math.cos,
+    "TAN": math.tan,
+    "ASIN": math.asin,
+    "ACOS": math.acos,
+    "ATAN": math.atan,
+    "ATAN2": math.atan2,
+    "SINH": math.sinh,
+    "COSH": math.cosh,
+    "TANH": math.tanh,
+    "CEIL": math.ceil,
+    "FLOOR": math.floor,
+    "NINT": lambda x: float(math.floor(x + 0.5)),
+    "MIN": min,
+    "MAX": max,
+    "FINITE": lambda *args: float(all(map(math.isfinite, args))),
+    "ISNAN": lambda *args: float(any(map(math.isnan, args))),
+}
+
+
+class _CalcParser(object):
+    """parse a CALC expression into a function of the channel values"""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = []
+        text = expression.strip()
+        pos = 0
+        while pos < len(text):
+            match = _calc_token.match(text, pos)
+            if match is None or match.end() == pos:
+                raise ValueError(
+                    "cannot parse CALC '%s' at: %s" % (expression, text[pos:]))
+            pos = match.end()
+            if match.group("number") is not None:
+                self.tokens.append(("number", float(match.group("number"))))
+            elif match.group("name") is not None:
+                self.tokens.append(("name", match.group("name").upper()))
+            else:
+                self.tokens.append(("op", match.group("op")))
+        self.pos = 0
+
+    def _peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _expect(self, op):
+        kind, value = self._next()
+        if value != op:
+            raise ValueError(
+                "CALC '%s': expected '%s', found '%s'" % (self.expression, op, value))
+
+    def parse(self):
+        node = self._ternary()
+        if self._peek()[0] is not None:
+            raise ValueError(
+                "CALC '%s': unexpected '%s'" % (self.expression, self._peek()[1]))
+        return node
+
+    def _ternary(self):
+        condition = self._binary(0)
+        if self._peek() == ("op", "?"):
+            self._next()
+            a = self._ternary()
+            self._expect(":")
+            b = self._ternary()
+            return lambda v: a(v) if condition(v) else b(v)
+        return condition
+
+    def _binary(self, level):
+        if level == len(_calc_binary_operators):
+            return self._unary()
+        operators = _calc_binary_operators[level]
+        left = self._binary(level + 1)
+        while self._peek()[1] in operators:
+            func = operators[self._next()[1]]
+            right = self._binary(level + 1)
+            left = (lambda f, a, b: lambda v: f(a(v), b(v)))(func, left, right)
+        return left
+
+    def _unary(self):
+        kind, value = self._peek()
+        if value in ("-", "+", "!", "~", "NOT"):
+            self._next()
+            operand = self._unary()
+            if value == "-":
+                return lambda v: -operand(v)
+            if value == "+":
+                return operand
+            if value == "~":
+                return lambda v: float(~int(operand(v)))
+            return lambda v: float(not operand(v))
+        return self._power()
+
+    def _power(self):
+        base = self._primary()
+        if self._peek()[1] in ("^", "**"):
+            self._next()
+            exponent = self._unary()    # right associative
+            return lambda v: base(v) ** exponent(v)
+        return base
+
+    def _primary(self):
+        kind, value = self._next()
+        if kind == "number":
+            return lambda v: value
+        if value == "(":
+            node = self._ternary()
+            self._expect(")")
+            return node
+        if kind == "name":
+            if value in SWAIT_CHANNEL_LETTERS or value == "VAL":
+                return lambda v: v.get(value, 0.0)
+            if value in _calc_constants:
+                constant = _calc_constants[value]
+                return lambda v: constant
+            if value == "RNDM":
+                return lambda v: sim_pv_database.rng.random()
+            if value in _calc_functions:
+                func = _calc_functions[value]
+                self._expect("(")
+                args = [self._ternary()]
+                while self._peek() == ("op", ","):
+                    self._next()
+                    args.append(self._ternary())
+                self._expect(")")
+                return lambda v: float(func(*[arg(v) for arg in args]))
+        raise ValueError(
+            "CALC '%s': unexpected '%s'" % (self.expression, value))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_calc(expression):
+    """
+    compile a swait record CALC expression
+
+    Returns a function of a dictionary of channel values
+    (``{"A": 1.0, "B": 2.0, ...}``) that returns the result,
+    or NaN if the calculation fails (such as divide by zero).
+    ``RNDM`` is drawn from ``sim_pv_database.rng``.
+
+    EXAMPLE::
+
+        f = compile_calc("D*(0.95+E*RNDM)/exp(((A-b)/c)^2)")
+        value = f(dict(A=0.1, B=0, C=1, D=1, E=0))
+    """
+    node = _CalcParser(str(expression)).parse()
+
+    def calc(values):
+        try:
+            return float(node(values))
+        except (ArithmeticError, ValueError):
+            return float("nan")
+
+    return calc
+
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+# records
+
+
+def _is_set(value):
+    """True if the link or PV name ``value`` is not empty"""
+    return len(str(value or "").strip()) > 0
+
+
+def _sim_read_pvs(pvnames, timeout=2.0):
+    """values of many PVs from the simulated PV database"""
+    return {pvname: sim_pv_database.get(pvname) for pvname in pvnames}
+
+
+# FAZE values of the sscan record
+SSCAN_PHASE_IDLE = 0
+SSCAN_PHASE_INIT_SCAN = 1
+SSCAN_PHASE_MOVE_MOTORS = 4
+SSCAN_PHASE_WAIT_MOTORS = 5
+SSCAN_PHASE_TRIG_DETECTORS = 6
+SSCAN_PHASE_WAIT_DETECTORS = 7
+SSCAN_PHASE_RETRACE_MOVE = 8
+SSCAN_PHASE_SCAN_DONE = 12
+SSCAN_PHASE_RECORD_SCALAR_DATA = 15
+
+
+class SimSscanRecord(_make_sim_device(sscanRecord)):
+    """
+    simulated synApps sscan record
+
+    Setting ``execute_scan`` to 1 runs the scan (in a thread)
+    through its phases (``scan_phase``), point by point:
+    move the positioners, trigger the detectors,
+    read the detectors, then post ``current_point``.
+    Positioners (``LINEAR`` mode only) step from ``start``
+    to ``end`` in ``number_points``.  Arrays are posted
+    when the scan is done.  Setting ``execute_scan`` to 0
+    during a scan aborts it.
+
+    Detector triggers are written with completion: a trigger
+    that starts another (inner) scan waits for that scan to finish,
+    as in a multi-dimensional scan.  With ``awct`` > 0,
+    the scan waits, once its data are ready, until its clients
+    have decremented ``wcnt`` to zero (writing 0 to ``wait``).
+
+    ``point_delay_s`` (default: 0) is the time spent at each point,
+    in addition to the positioner and detector delays.
+    """
+
+    point_delay_s = 0
+
+    def __init__(self, *args, **kwargs):
+        self._sim_lock = threading.RLock()
+        self._sim_abort = threading.Event()
+        self._sim_thread = None
+        super().__init__(*args, **kwargs)
+        self.maximum_number_points.put(1000)
+        for signal, value in self.reset_targets(all_channels=True).items():
+            signal.put(value)
+        self.execute_scan.subscribe(self._sim_execute_cb, run=False)
+        self.wait.subscribe(self._sim_wait_cb, run=False)
+
+    def _read_pvs(self, pvnames, timeout=2.0):
+        return _sim_read_pvs(pvnames, timeout=timeout)
+
+    def _sim_execute_cb(self, value=None, **kwargs):
+        with self._sim_lock:
+            running = self._sim_thread is not None
+            if value in (1, "SCAN") and not running:
+                self._sim_abort.clear()
+                self._sim_thread = threading.Thread(
+                    target=self._sim_scan, daemon=True)
+                self._sim_thread.start()
+            elif value in (0, "IDLE") and running:
+                self._sim_abort.set()
+
+    def _sim_wait_cb(self, value=None, **kwargs):
+        """writing 1 to WAIT increments WCNT, writing 0 decrements it"""
+        with self._sim_lock:
+            count = int(self.wcnt.get() or 0)
+            if value in (1, "Wait"):
+                self.wcnt.sim_put(count + 1)
+            elif count > 0:
+                self.wcnt.sim_put(count - 1)
+
+    def _sim_put_completion(self, signal, timeout=None):
+        """wait until the scan started by ``signal`` has finished"""
+        if signal is not self.execute_scan:
+            return
+        thread = self._sim_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _sim_phase(self, phase):
+        self.scan_phase.sim_put(phase)
+
+    def _sim_scan(self):
+        """run one scan"""
+        try:
+            self._sim_scan_points()
+        finally:
+            with self._sim_lock:
+                self._sim_thread = None
+            self.scan_busy.sim_put(0)
+            self._sim_phase(SSCAN_PHASE_IDLE)
+            self.execute_scan.put(0)
+
+    def _sim_scan_points(self):
+        selection = self.channel_selection
+        positioners = [
+            getattr(self.positioners, ch) for ch in selection["positioners"]]
+        detectors = [
+            getattr(self.detectors, ch) for ch in selection["detectors"]]
+        triggers = [
+            getattr(self.triggers, ch) for ch in selection["triggers"]]
+        mpts = int(self.maximum_number_points.get() or 1000)
+        npts = max(1, min(int(self.number_points.get() or 1), mpts))
+
+        self.data_ready.sim_put(0)
+        self.current_point.sim_put(0)
+        self.alert_flag.sim_put(0)
+        self.scan_busy.sim_put(1)
+        self._sim_phase(SSCAN_PHASE_INIT_SCAN)
+        if _is_set(self.bspv.get()):
+            sim_pv_database.put(self.bspv.get(), self.bscd.get())
+
+        trajectories = []
+        prior = []
+        for p in positioners:
+            position = sim_pv_database.get(p.setpoint_pv.get(), 0)
+            prior.append(position)
+            start = float(p.start.get() or 0)
+            end = float(p.end.get() or 0)
+            if p.abs_rel.get() in (1, "RELATIVE"):
+                start += position
+                end += position
+            trajectories.append(np.linspace(start, end, npts))
+
+        p_arrays = np.zeros((len(positioners), mpts))
+        r_arrays = np.zeros((len(positioners), mpts))
+        d_arrays = np.zeros((len(detectors), mpts))
+        for i in range(npts):
+            if self._sim_abort.is_set():
+                break
+            self._sim_phase(SSCAN_PHASE_MOVE_MOTORS)
+            for k, p in enumerate(positioners):
+                target = trajectories[k][i]
+                sim_pv_database.put(p.setpoint_pv.get(), target)
+                p.setpoint_value.sim_put(target)
+            self._sim_phase(SSCAN_PHASE_WAIT_MOTORS)
+            time.sleep(float(self.positioner_delay.get() or 0))
+            for k, p in enumerate(positioners):
+                readback = trajectories[k][i]
+                if _is_set(p.readback_pv.get()):
+                    readback = sim_pv_database.get(p.readback_pv.get(), readback)
+                p.readback_value.sim_put(readback)
+                p_arrays[k, i] = trajectories[k][i]
+                r_arrays[k, i] = readback
+
+            self._sim_phase(SSCAN_PHASE_TRIG_DETECTORS)
+            for t in triggers:
+                sim_pv_database.put(
+                    t.trigger_pv.get(), t.trigger_value.get(), wait=True)
+            self._sim_phase(SSCAN_PHASE_WAIT_DETECTORS)
+            time.sleep(float(self.detector_delay.get() or 0))
+            for k, d in enumerate(detectors):
+                value = sim_pv_database.get(d.input_pv.get(), 0)
+                d.current_value.put(value)
+                d_arrays[k, i] = value
+
+            self.current_point.sim_put(i + 1)
+            self._sim_phase(SSCAN_PHASE_RECORD_SCALAR_DATA)
+            time.sleep(self.point_delay_s)
+
+        self._sim_phase(SSCAN_PHASE_RETRACE_MOVE)
+        if self.pasm.get() in (1, "PRIOR POS"):
+            for p, position in zip(positioners, prior):
+                sim_pv_database.put(p.setpoint_pv.get(), position)
+        elif self.pasm.get() in (2, "START POS"):
+            for p, trajectory in zip(positioners, trajectories):
+                sim_pv_database.put(p.setpoint_pv.get(), trajectory[0])
+        if _is_set(self.aspv.get()):
+            sim_pv_database.put(self.aspv.get(), self.ascd.get())
+        if _is_set(self.a1pv.get()):
+            sim_pv_database.put(self.a1pv.get(), self.a1cd.get())
+
+        for k, p in enumerate(positioners):
+            p.array.sim_put(r_arrays[k])
+        for k, d in enumerate(detectors):
+            d.array.put(d_arrays[k])
+        self._sim_phase(SSCAN_PHASE_SCAN_DONE)
+        self.data_state.sim_put(1)
+        awct = int(self.awct.get() or 0)
+        if awct > 0:
+            self.wcnt.sim_put(awct)
+        self.data_ready.sim_put(1)
+        while self.wcnt.get() > 0 and not self._sim_abort.is_set():
+            time.sleep(0.01)
+
+    def destroy(self):
+        self._sim_abort.set()
+        super().destroy()
+
+
+_sim_device_cache[sscanRecord] = SimSscanRecord
+
+
+class SimSscanDevice(_make_sim_device(sscanDevice)):
+    """simulated synApps XXX IOC setup of sscan records: $(P):scan$(N)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scan_dimension.sim_put(1)
+        self.abort_scans.subscribe(self._sim_abort_cb, run=False)
+
+    def _sim_abort_cb(self, value=None, **kwargs):
+        if value:
+            for nm in "scan1 scan2 scan3 scan4 scanH".split():
+                getattr(self, nm).execute_scan.put(0)
+
+
+class SimSwaitRecord(_make_sim_device(swaitRecord)):
+    """
+    simulated synApps swait record
+
+    The record processes when ``process`` is written,
+    periodically (``scan`` such as ``".1 second"``), or
+    when an input (with ``input_trigger`` of ``"Yes"``)
+    changes (``scan`` of ``"I/O Intr"``).
+    Processing reads the input PVs into channels A-L,
+    evaluates ``calc`` into ``val``, writes ``outn``,
+    then processes ``flnk``.  It does not process when
+    its userCalcsDevice is not enabled.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._sim_lock = threading.RLock()
+        self._sim_stop = threading.Event()
+        self._sim_period_thread = None
+        self._sim_inputs = []
+        super().__init__(*args, **kwargs)
+        for signal, value in self.reset_targets().items():
+            signal.put(value)
+        self.process.subscribe(self._sim_process_cb, run=False)
+        self.scan.subscribe(self._sim_scan_cb, run=False)
+        for letter in SWAIT_CHANNEL_LETTERS:
+            channel = getattr(self.channels, letter)
+            channel.input_pv.subscribe(self._sim_scan_cb, run=False)
+            channel.input_trigger.subscribe(self._sim_scan_cb, run=False)
+
+    @property
+    def _sim_enabled(self):
+        enable = getattr(self.parent, "enable", None)
+        return enable is None or enable.get() not in (0, "Disable")
+
+    def _sim_process_cb(self, value=None, **kwargs):
+        if value:
+            self.sim_process()
+
+    def sim_process(self):
+        """process the record: evaluate the CALC expression"""
+        if not self._sim_enabled:
+            return
+        with self._sim_lock:
+            values = {"VAL": self.val.get() or 0.0}
+            for letter in SWAIT_CHANNEL_LETTERS:
+                channel = getattr(self.channels, letter)
+                source = channel.input_pv.get()
+                if _is_set(source):
+                    value = sim_pv_database.get(source)
+                    if value is not None:
+                        channel.value.put(value)
+                values[letter] = float(channel.value.get() or 0)
+            result = compile_calc(self.calc.get() or "0")(values)
+            self.val.sim_put(result)
+        if _is_set(self.outn.get()):
+            sim_pv_database.put(self.outn.get(), result)
+        if _is_set(self.flnk.get()) and str(self.flnk.get()).strip() != "0":
+            sim_pv_database.process(self.flnk.get())
+
+    def _sim_scan_cb(self, **kwargs):
+        """(re)start periodic or I/O Intr processing"""
+        with self._sim_lock:
+            self._sim_stop.set()
+            self._sim_stop = threading.Event()
+            for signal, cb_id in self._sim_inputs:
+                signal.unsubscribe(cb_id)
+            self._sim_inputs = []
+
+            scan = str(self.scan.get()).strip()
+            if scan.endswith("second"):
+                period = float(scan.split()[0])
+                self._sim_period_thread = threading.Thread(
+                    target=self._sim_periodic,
+                    args=(period, self._sim_stop),
+                    daemon=True)
+                self._sim_period_thread.start()
+            elif scan == "I/O Intr":
+                for letter in SWAIT_CHANNEL_LETTERS:
+                    channel = getattr(self.channels, letter)
+                    if channel.input_trigger.get() not in (1, "Yes"):
+                        continue
+                    source = sim_pv_database.find(channel.input_pv.get())
+                    if source is None or source is self.val:
+                        continue
+                    cb_id = source.subscribe(
+                        lambda **kw: self.sim_process(), run=False)
+                    self._sim_inputs.append((source, cb_id))
+
+    def _sim_periodic(self, period, stop):
+        while not stop.wait(period):
+            self.sim_process()
+
+    def destroy(self):
+        self._sim_stop.set()
+        super().destroy()
+
+
+_sim_device_cache[swaitRecord] = SimSwaitRecord
+
+
+class SimUserCalcsDevice(_make_sim_device(userCalcsDevice)):
+    """simulated synApps XXX IOC setup of userCalcs: $(P):userCalc$(N)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enable.put(1)
+
+
+class SimBusyRecord(_make_sim_device(busyRecord)):
+    """
+    simulated synApps busy record
+
+    When set to ``Busy``, writes ``output_link`` and
+    processes ``forward_link``.  If ``busy_time_s`` is not None,
+    returns to ``Done`` after that time (as a device completing).
+    """
+
+    busy_time_s = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state.subscribe(self._sim_state_cb, run=False)
+
+    def _sim_state_cb(self, value=None, **kwargs):
+        busy = value in (1, BusyStatus.busy)
+        if _is_set(self.output_link.get()):
+            sim_pv_database.put(self.output_link.get(), value)
+        if _is_set(self.forward_link.get()):
+            sim_pv_database.process(self.forward_link.get())
+        if busy and self.busy_time_s is not None:
+            timer = threading.Timer(
+                self.busy_time_s,
+                lambda: self.state.put(BusyStatus.done))
+            timer.daemon = True
+            timer.start()
+
+
+def _xdr_int(*values):
+    return np.array(values, dtype=">i4").tobytes()
+
+
+def _xdr_counted_string(text):
+    data = str(text or "").encode("latin-1")
+    if len(data) == 0:
+        return _xdr_int(0)
+    padding = b"\0" * ((4 - len(data) % 4) % 4)
+    return _xdr_int(len(data), len(data)) + data + padding
+
+
+def _mda_1D_bytes(record, scan_number):
+    """content of an MDA file with the data of one (1-D) sscan record"""
+    selection = record.channel_selection
+    positioners = [
+        (ch, getattr(record.positioners, ch)) 
+        for ch in selection["positioners"]]
+    detectors = [
+        (ch, getattr(record.detectors, ch)) 
+        for ch in selection["detectors"]]
+    triggers = [
+        (ch, getattr(record.triggers, ch)) 
+        for ch in selection["triggers"]]
+    npts = int(record.number_points.get())
+    cpt = int(record.current_point.get())
+
+    parts = [
+        np.array([1.3], dtype=">f4").tobytes(),     # version
+        _xdr_int(scan_number, 1, npts, 1, 0),       # rank, dims, regular, extra
+        _xdr_int(1, npts, cpt),
+        _xdr_counted_string(record.prefix),
+        _xdr_counted_string(time.strftime("%b %d, %Y %H:%M:%S")),
+        _xdr_int(len(positioners), len(detectors), len(triggers)),
+    ]
+    for ch, p in positioners:
+        parts.append(_xdr_int(int(ch[1:]) - 1))
+        for text in (p.setpoint_pv.get(), "", "LINEAR", "", 
+                     p.readback_pv.get(), "", ""):
+            parts.append(_xdr_counted_string(text))
+    for ch, d in detectors:
+        parts.append(_xdr_int(int(ch[1:]) - 1))
+        for text in (d.input_pv.get(), "", ""):
+            parts.append(_xdr_counted_string(text))
+    for ch, t in triggers:
+        parts.append(_xdr_int(int(ch[1:])))
+        parts.append(_xdr_counted_string(t.trigger_pv.get()))
+        parts.append(np.array([t.trigger_value.get()], dtype=">f4").tobytes())
+    for ch, p in positioners:
+        parts.append(np.asarray(p.array.get(), dtype=">f8")[:npts].tobytes())
+    for ch, d in detectors:
+        parts.append(np.asarray(d.array.get(), dtype=">f4")[:npts].tobytes())
+    return b"".join(parts)
+
+
+class SimSaveData(_make_sim_device(SaveData)):
+    """
+    simulated synApps saveData
+
+    Call :meth:`watch` with the sscan records to be saved.
+    When each scan is done, the file name is reported
+    (``full_name``, in directory ``full_path_name``)
+    and ``next_scan_number`` is incremented.
+    If that directory exists, the scan data are written
+    there (1-D scans, MDA format).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reset()
+        self.status.sim_put("Success")
+
+    def watch(self, *records):
+        """save each of these sscan records when its scan is done"""
+        for record in records:
+            record.data_ready.subscribe(
+                functools.partial(self._sim_data_ready_cb, record),
+                run=False)
+
+    def _sim_data_ready_cb(self, record, value=None, **kwargs):
+        if value:
+            self._sim_save(record)
+
+    def _sim_save(self, record):
+        """write the MDA file, report its name"""
+        number = int(self.next_scan_number.get() or 0)
+        file_name = "%s%04d.mda" % (self.base_name.get() or "", number)
+        path = os.path.join(
+            str(self.file_system.get() or ""),
+            str(self.subdirectory.get() or ""))
+        if len(str(self.file_system.get() or "")) > 0 and os.path.isdir(path):
+            with open(os.path.join(path, file_name), "wb") as fp:
+                fp.write(_mda_1D_bytes(record, number))
+        self.full_path_name.sim_put(path)
+        self.full_name.sim_put(file_name)
+        self.message.sim_put("Wrote data to %s" % file_name)
+        self.next_scan_number.put(number + 1)
+        return os.path.join(path, file_name)
@@ -10,6 +10,10 @@ EXAMPLE
     scans = apstools.synApps_ophyd.sscanDevice("xxx:", name="scans")
     scans.select_channels()     # only the channels configured in EPICS
 
+    # connect only the channels configured in EPICS
+    scans = apstools.synApps_ophyd.sscanDevice("xxx:", name="scans", lazy=True)
+    scans.select_channels()
+
 
 Public Structures
 
@@ -40,6 +44,8 @@ Private Structures
 
 
 from collections import OrderedDict
+import epics
+import threading
 from ophyd.device import (
     Device,
     Component as Cpt,
@@ -49,6 +55,8 @@ from ophyd import EpicsSignal, EpicsSignalRO
 from ophyd.status import DeviceStatus
 from ophyd.ophydobj import Kind
 
+from .bulk import bulk_put
+
 
 __all__ = """
     sscanRecord  
@@ -64,6 +72,7 @@ class sscanPositioner(Device):
        
         ~defined_in_EPICS
         ~reset
+        ~reset_targets
 
     """
     
@@ -87,15 +96,21 @@ class sscanPositioner(Device):
     
     def reset(self):
         """set all fields to default values"""
-        self.readback_pv.put("")
-        self.setpoint_pv.put("")
-        self.start.put(0)
-        self.center.put(0)
-        self.end.put(0)
-        self.step_size.put(0)
-        self.width.put(0)
-        self.abs_rel.put("ABSOLUTE")
-        self.mode.put("LINEAR")
+        bulk_put(self.reset_targets())
+
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        return OrderedDict([
+            (self.readback_pv, ""),
+            (self.setpoint_pv, ""),
+            (self.start, 0),
+            (self.center, 0),
+            (self.end, 0),
+            (self.step_size, 0),
+            (self.width, 0),
+            (self.abs_rel, "ABSOLUTE"),
+            (self.mode, "LINEAR"),
+        ])
     
     @property
     def defined_in_EPICS(self):
@@ -111,6 +126,7 @@ class sscanDetector(Device):
        
         ~defined_in_EPICS
         ~reset
+        ~reset_targets
 
     """
     
@@ -124,7 +140,13 @@ class sscanDetector(Device):
     
     def reset(self):
         """set all fields to default values"""
-        self.input_pv.put("")
+        bulk_put(self.reset_targets())
+
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        return OrderedDict([
+            (self.input_pv, ""),
+        ])
     
     @property
     def defined_in_EPICS(self):
@@ -139,6 +161,7 @@ class sscanTrigger(Device):
     .. autosummary::
        
         ~reset
+        ~reset_targets
     """
     
     trigger_pv = FC(EpicsSignal, '{self.prefix}.T{self._ch_num}PV', kind=Kind.config)
@@ -150,8 +173,14 @@ class sscanTrigger(Device):
     
     def reset(self):
         """set all fields to default values"""
-        self.trigger_pv.put("")
-        self.trigger_value.put(1)
+        bulk_put(self.reset_targets())
+
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        return OrderedDict([
+            (self.trigger_pv, ""),
+            (self.trigger_value, 1),
+        ])
     
     @property
     def defined_in_EPICS(self):
@@ -159,11 +188,12 @@ class sscanTrigger(Device):
         return len(self.trigger_pv.value.strip()) > 0
 
 
+# channels are created (and connected) when first used, see sscanRecord
 def _sscan_positioners(channel_list):
     defn = OrderedDict()
     for chan in channel_list:
         attr = 'p{}'.format(chan)
-        defn[attr] = (sscanPositioner, '', {'num': chan})
+        defn[attr] = (sscanPositioner, '', {'num': chan, 'lazy': True})
     return defn
 
 
@@ -171,7 +201,7 @@ def _sscan_detectors(channel_list):
     defn = OrderedDict()
     for chan in channel_list:
         attr = 'd{}'.format(chan)
-        defn[attr] = (sscanDetector, '', {'num': chan})
+        defn[attr] = (sscanDetector, '', {'num': chan, 'lazy': True})
     return defn
 
 
@@ -179,22 +209,54 @@ def _sscan_triggers(channel_list):
     defn = OrderedDict()
     for chan in channel_list:
         attr = 't{}'.format(chan)
-        defn[attr] = (sscanTrigger, '', {'num': chan})
+        defn[attr] = (sscanTrigger, '', {'num': chan, 'lazy': True})
     return defn
 
 
+# field (of each channel) that names the PV used by that channel
+_sscan_channel_pv_fields = OrderedDict([
+    ("positioners", "P{}PV"),
+    ("detectors", "D{}PV"),
+    ("triggers", "T{}PV"),
+])
+
+# signal (of each channel) of that field
+_sscan_channel_pv_attrs = OrderedDict([
+    ("positioners", "setpoint_pv"),
+    ("detectors", "input_pv"),
+    ("triggers", "trigger_pv"),
+])
+
+
 class sscanRecord(Device):
     """
     EPICS synApps sscan record: used as $(P):scan(N)
+    
+    With ``lazy=True``, the (78) positioner, detector, and trigger 
+    channels are not connected when the record is created.  
+    :meth:`select_channels()` reads the ``*PV`` fields of all channels 
+    (in one request), then creates and connects only those channels 
+    defined in EPICS.  (A channel is also created when used.)
+    
+    The selection of channels defined in EPICS is cached
+    (see :attr:`channel_selection`) until the ``*PV`` field
+    of a channel in use (created or selected) changes in EPICS
+    (these fields are monitored when ``monitor_channel_pvs`` is True).
+    Use ``select_channels(refresh=True)`` to find channels
+    newly defined in EPICS.
 
     .. autosummary::
        
+        ~channel_selection
         ~defined_in_EPICS
         ~reset
+        ~reset_targets
         ~select_channels
 
     """
     
+    monitor_channel_pvs = True
+
     desc = Cpt(EpicsSignal, '.DESC', kind=Kind.config)
     scan_phase = Cpt(EpicsSignalRO, '.FAZE')
     data_state = Cpt(EpicsSignalRO, '.DSTATE')
@@ -243,6 +305,20 @@ class sscanRecord(Device):
         )
     )
 
+    def __init__(self, *args, lazy=None, **kwargs):
+        self._channel_lock = threading.RLock()
+        self._channel_selection = None
+        self._channel_pv_cache = {}
+        self._channel_pv_monitors = {}
+        super().__init__(*args, **kwargs)
+        if lazy is None:
+            lazy = getattr(self.parent, "lazy", False)
+        self.lazy = lazy
+        if not lazy:
+            for part in (self.positioners, self.detectors, self.triggers):
+                for ch_name in part.component_names:
+                    getattr(part, ch_name)
+
     def set(self, value, **kwargs):
         """interface to use bps.mv()"""
         if value != 1:
@@ -263,41 +339,175 @@ class sscanRecord(Device):
     
     def reset(self):
         """set all fields to default values"""
-        self.desc.put(self.desc.pvname.split(".")[0])
-        self.number_points.put(1000)
-        for part in (self.positioners, self.detectors, self.triggers):
-            for ch_name in part.component_names:
+        bulk_put(self.reset_targets())
+        self._release_waits()
+
+    def reset_targets(self, all_channels=False):
+        """
+        default values of all fields: ``{signal: value}``
+        
+        Only the channels already created (or selected) are included,
+        lazy channels are not created.  Use ``all_channels=True``
+        to include (and create) every channel.
+        """
+        targets = OrderedDict()
+        targets[self.desc] = self.prefix.split(".")[0]
+        targets[self.number_points] = 1000
+        for part_name in _sscan_channel_pv_fields:
+            part = getattr(self, part_name)
+            if all_channels:
+                channel_names = part.component_names
+            else:
+                channel_names = self._channels_in_use(part_name)
+            for ch_name in channel_names:
                 channel = getattr(part, ch_name)
-                channel.reset()
-        self.a1pv.put("")
-        self.acqm.put("NORMAL")
+                targets.update(channel.reset_targets())
+        targets[self.a1pv] = ""
+        targets[self.acqm] = "NORMAL"
         if self.name.find("scanH") > 0:
-            self.acqt.put("1D ARRAY")
+            targets[self.acqt] = "1D ARRAY"
         else:
-            self.acqt.put("SCALAR")
-        self.aspv.put("")
-        self.bspv.put("")
-        self.pasm.put("STAY")
-        self.bswait.put("Wait")
-        self.a1cd.put(1)
-        self.ascd.put(1)
-        self.bscd.put(1)
-        self.reference_detector.put(1)
-        self.atime.put(0)
-        self.awct.put(0)
-        self.copyto.put(0)
-        self.detector_delay.put(0)
-        self.positioner_delay.put(0)
+            targets[self.acqt] = "SCALAR"
+        targets[self.aspv] = ""
+        targets[self.bspv] = ""
+        targets[self.pasm] = "STAY"
+        targets[self.bswait] = "Wait"
+        targets[self.a1cd] = 1
+        targets[self.ascd] = 1
+        targets[self.bscd] = 1
+        targets[self.reference_detector] = 1
+        targets[self.atime] = 0
+        targets[self.awct] = 0
+        targets[self.copyto] = 0
+        targets[self.detector_delay] = 0
+        targets[self.positioner_delay] = 0
+        return targets
+
+    def _release_waits(self):
+        """release any clients waiting on this scan"""
         while self.wcnt.get() > 0:
             self.wait.put(0)
-    
-    def select_channels(self):
+
+    def _channels_in_use(self, part_name):
+        """names of the channels of ``part_name`` created or selected"""
+        part = getattr(self, part_name)
+        selection = self._channel_selection or {}
+        selected = selection.get(part_name, [])
+        return [
+            ch_name
+            for ch_name in part.component_names
+            if ch_name in part._signals or ch_name in selected]
+
+    def _channel_pv_names(self):
+        """
+        names of the ``*PV`` field of each channel
+        
+        ``{(part_name, channel_name): pvname}``
+        (read these without creating the channels)
+        """
+        names = OrderedDict()
+        for part_name, field in _sscan_channel_pv_fields.items():
+            part = getattr(self, part_name)
+            for ch_name in part.component_names:
+                num = ch_name[1:]
+                pvname = "{}.{}".format(self.prefix, field.format(num))
+                names[(part_name, ch_name)] = pvname
+        return names
+
+    def _read_pvs(self, pvnames, timeout=2.0):
+        """
+        values (as strings) of many PVs, in one CA request
+        
+        ``{pvname: value}`` (value is None if not read)
+        """
+        values = epics.caget_many(
+            pvnames, as_string=True, 
+            timeout=timeout, connection_timeout=timeout)
+        return dict(zip(pvnames, values))
+
+    def _channel_pv_values(self, timeout=2.0):
+        """values of the ``*PV`` field of each channel: ``{pvname: value}``"""
+        pvnames = list(self._channel_pv_names().values())
+        return self._read_pvs(pvnames, timeout=timeout)
+
+    def _update_channel_selection(self, pv_values):
+        """
+        compute (and cache) the channel selection from ``{pvname: value}``
+        """
+        selection = OrderedDict(
+            (part_name, []) for part_name in _sscan_channel_pv_fields)
+        cache = {}
+        for (part_name, ch), pvname in self._channel_pv_names().items():
+            value = (pv_values.get(pvname) or "").strip()
+            cache[pvname] = value
+            if len(value) > 0:
+                selection[part_name].append(ch)
+        with self._channel_lock:
+            self._channel_pv_cache = cache
+            self._channel_selection = selection
+        self._monitor_channel_pvs()
+        return selection
+
+    def _monitor_channel_pvs(self):
+        """
+        watch the ``*PV`` fields of the channels in use,
+        forget the selection when any changes
+        
+        (subscribes only to the ``*PV`` field signals of the channels
+        in use, not to those of all 78 channels)
+        """
+        if not self.monitor_channel_pvs:
+            return
+        names = self._channel_pv_names()
+        with self._channel_lock:
+            for part_name, attr in _sscan_channel_pv_attrs.items():
+                part = getattr(self, part_name)
+                for ch_name in self._channels_in_use(part_name):
+                    pvname = names[(part_name, ch_name)]
+                    if pvname in self._channel_pv_monitors:
+                        continue
+                    signal = getattr(getattr(part, ch_name), attr)
+
+                    def cb(value=None, pvname=pvname, **kwargs):
+                        self._channel_pv_cb(
+                            pvname=pvname, char_value=str(value or ""))
+
+                    signal.subscribe(cb, run=False)
+                    self._channel_pv_monitors[pvname] = signal
+
+    def _channel_pv_cb(self, pvname=None, char_value=None, **kwargs):
+        """a ``*PV`` field was updated in EPICS"""
+        with self._channel_lock:
+            cached = self._channel_pv_cache.get(pvname)
+            if cached is not None and (char_value or "").strip() != cached:
+                self._channel_selection = None
+
+    @property
+    def channel_selection(self):
+        """
+        names of the channels defined in EPICS (cached)
+        
+        ``{"positioners": [...], "detectors": [...], "triggers": [...]}``
+        """
+        selection = self._channel_selection
+        if selection is None:
+            selection = self._update_channel_selection(
+                self._channel_pv_values())
+        return selection
+
+    def select_channels(self, refresh=False):
         """
         Select channels that are configured in EPICS
+        
+        Use ``refresh=True`` to read the ``*PV`` fields from EPICS
+        again, rather than the cached :attr:`channel_selection`.
         """
-        for part in (self.positioners, self.detectors, self.triggers):
-            channel_names = []      # part.get_configured_channels()
-            channel_names = [ch for ch in part.component_names if getattr(part, ch).defined_in_EPICS]
+        if refresh:
+            self._channel_selection = None
+        for part_name, channel_names in self.channel_selection.items():
+            part = getattr(self, part_name)
+            for ch in channel_names:
+                getattr(part, ch)   # creates (and connects) a lazy channel
 
             part.configuration_attrs = channel_names
             part.read_attrs = channel_names
@@ -306,20 +516,24 @@ class sscanRecord(Device):
     @property
     def defined_in_EPICS(self):
         """True if will be used in EPICS"""
-        self.select_channels()
-        channels = len(self.positioners.read_attrs)
-        channels += len(self.detectors.read_attrs)
-        #channels += len(self.triggers.read_attrs)
+        selection = self.channel_selection
+        channels = len(selection["positioners"])
+        channels += len(selection["detectors"])
+        #channels += len(selection["triggers"])
         return channels > 0
 
 
 class sscanDevice(Device):
     """
     synApps XXX IOC setup of sscan records: $(P):scan$(N)
+    
+    ``lazy=True`` : connect only the channels configured in EPICS
+    (see :class:`sscanRecord`)
 
     .. autosummary::
        
         ~reset
+        ~reset_targets
         ~select_channels
 
     """
@@ -334,19 +548,55 @@ class sscanDevice(Device):
     scanH = Cpt(sscanRecord, 'scanH')
     resume_delay = Cpt(EpicsSignal, 'scanResumeSEQ.DLY1')
 
+    def __init__(self, *args, lazy=False, **kwargs):
+        self.lazy = lazy    # passed to each sscanRecord
+        super().__init__(*args, **kwargs)
+
     def reset(self):
         """set all fields to default values"""
+        bulk_put(self.reset_targets())
+        for chnum in "1 2 3 4 H".split():
+            getattr(self, "scan" + chnum)._release_waits()
+
+    def reset_targets(self, all_channels=False):
+        """
+        default values of all fields: ``{signal: value}``
+        
+        (see :meth:`sscanRecord.reset_targets`)
+        """
+        targets = OrderedDict()
         for chnum in "1 2 3 4 H".split():
-            getattr(self, "scan" + chnum).reset()
+            rec = getattr(self, "scan" + chnum)
+            targets.update(rec.reset_targets(all_channels=all_channels))
+        return targets
     
-    def select_channels(self):
+    def select_channels(self, refresh=False, timeout=2.0):
         """
         Select only the scans that are configured in EPICS
+        
+        The ``*PV`` fields of all (uncached) sscan records 
+        are read in one CA request.
         """
         scans = ["scan"+ch for ch in "1 2 3 4 H".split()]
+        records = [getattr(self, nm) for nm in scans]
+        stale = [
+            rec 
+            for rec in records 
+            if refresh or rec._channel_selection is None]
+        if len(stale) > 0:
+            pvnames = []
+            for rec in stale:
+                pvnames += list(rec._channel_pv_names().values())
+            pv_values = stale[0]._read_pvs(pvnames, timeout=timeout)
+            for rec in stale:
+                rec._update_channel_selection(pv_values)
+
         attrs = []
         for nm in self.component_names:
-            if nm in scans and not getattr(self, nm).defined_in_EPICS:
-                continue
+            if nm in scans:
+                rec = getattr(self, nm)
+                rec.select_channels()
+                if not rec.defined_in_EPICS:
+                    continue
             attrs.append(nm)
         self.read_attrs = attrs
@@ -14,6 +14,25 @@ EXAMPLES:;
     
     calc1.reset()
 
+    # configure several calcs at once from templates
+    apstools.synApps_ophyd.swait_apply_templates({
+        calcs.calc3: apstools.synApps_ophyd.swait_template_random_number(),
+        calcs.calc4: apstools.synApps_ophyd.swait_template_gaussian(m1),
+        calcs.calc5: apstools.synApps_ophyd.swait_template_lorentzian(m2),
+        })
+    
+    # save the configuration of all the calcs, restore it later
+    apstools.synApps_ophyd.swait_export_configuration(calcs, "calcs.json")
+    apstools.synApps_ophyd.swait_import_configuration(calcs, "calcs.json")
+
+A *template* is a dictionary of swait record field values,
+keyed by the name of the field's ophyd component, such as
+``{"calc": "RNDM", "scan": ".1 second", "channels.B.value": 2}``.
+Fields not in the template are set to their defaults 
+(see :meth:`swaitRecord.reset_targets()`).
+A value may be a function of the swait record, 
+called when the template is applied.
+
 
 .. autosummary::
    
@@ -23,6 +42,13 @@ EXAMPLES:;
     ~swait_setup_gaussian
     ~swait_setup_lorentzian 
     ~swait_setup_incrementer
+    ~swait_template_random_number 
+    ~swait_template_gaussian
+    ~swait_template_lorentzian 
+    ~swait_template_incrementer
+    ~swait_apply_templates
+    ~swait_export_configuration
+    ~swait_import_configuration
 
 """
 
@@ -38,6 +64,7 @@ EXAMPLES:;
 
 
 from collections import OrderedDict
+import json
 from ophyd.device import (
     Device,
     Component as Cpt,
@@ -45,6 +72,8 @@ from ophyd.device import (
     FormattedComponent as FC)
 from ophyd import EpicsSignal, EpicsSignalRO, EpicsMotor
 
+from .bulk import bulk_get, bulk_put, _same_value
+
 
 __all__ = """
     swaitRecord 
@@ -53,9 +82,30 @@ __all__ = """
     swait_setup_gaussian
     swait_setup_lorentzian 
     swait_setup_incrementer
+    swait_template_random_number 
+    swait_template_gaussian
+    swait_template_lorentzian 
+    swait_template_incrementer
+    swait_apply_templates
+    swait_export_configuration
+    swait_import_configuration
 	""".split()
 
 
+SWAIT_CHANNEL_LETTERS = "A B C D E F G H I J K L".split()
+# fields of a swait record configuration (see swait_export_configuration)
+_swait_config_fields = """
+    desc scan calc prec dold doln dopt flnk odly oopt outn
+    """.split() + [
+    "channels.%s.%s" % (letter, nm) 
+    for letter in SWAIT_CHANNEL_LETTERS
+    for nm in "value input_pv input_trigger".split()
+    ]
+_swait_numeric_fields = ["prec", "dold", "odly"] + [
+    "channels.%s.value" % letter for letter in SWAIT_CHANNEL_LETTERS
+    ]
+
+
 class swaitRecordChannel(Device):
     """channel of a synApps swait record: A-L"""
 
@@ -71,9 +121,15 @@ class swaitRecordChannel(Device):
 
     def reset(self):
         """set all fields to default values"""
-        self.value.put(0)
-        self.input_pv.put("")
-        self.input_trigger.put("Yes")
+        bulk_put(self.reset_targets())
+
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        return OrderedDict([
+            (self.value, 0),
+            (self.input_pv, ""),
+            (self.input_trigger, "Yes"),
+        ])
 
 
 def _swait_channels(channel_list):
@@ -90,6 +146,7 @@ class swaitRecord(Device):
     .. autosummary::
        
         ~reset
+        ~reset_targets
 
     """
     desc = Cpt(EpicsSignal, '.DESC')
@@ -118,21 +175,30 @@ class swaitRecord(Device):
     
     def reset(self):
         """set all fields to default values"""
-        self.desc.put(self.desc.pvname.split(".")[0])
-        self.scan.put("Passive")
-        self.calc.put("0")
-        self.prec.put("5")
-        self.dold.put(0)
-        self.doln.put("")
-        self.dopt.put("Use VAL")
-        self.flnk.put("0")
-        self.odly.put(0)
-        self.oopt.put("Every Time")
-        self.outn.put("")
-        for letter in self.channels.read_attrs:
+        bulk_put(self.reset_targets())
+        self._reset_attrs()
+
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        targets = OrderedDict()
+        targets[self.desc] = self.prefix.split(".")[0]
+        targets[self.scan] = "Passive"
+        targets[self.calc] = "0"
+        targets[self.prec] = "5"
+        targets[self.dold] = 0
+        targets[self.doln] = ""
+        targets[self.dopt] = "Use VAL"
+        targets[self.flnk] = "0"
+        targets[self.odly] = 0
+        targets[self.oopt] = "Every Time"
+        targets[self.outn] = ""
+        for letter in self.channels.component_names:
             channel = getattr(self.channels, letter)
-            if isinstance(channel, swaitRecordChannel):
-                channel.reset()
+            targets.update(channel.reset_targets())
+        return targets
+
+    def _reset_attrs(self):
+        """default hints and read_attrs"""
         self.hints = {'fields': ["channels.%s" % c for c in "A B C D E F G H I J K L".split()]}
         self.read_attrs = ["channels.%s" % c for c in "A B C D E F G H I J K L".split()]
         self.read_attrs.append('val')
@@ -145,6 +211,7 @@ class userCalcsDevice(Device):
     .. autosummary::
        
         ~reset
+        ~reset_targets
 
     """
 
@@ -162,85 +229,228 @@ class userCalcsDevice(Device):
 
     def reset(self):
         """set all fields to default values"""
-        self.calc1.reset()
-        self.calc2.reset()
-        self.calc3.reset()
-        self.calc4.reset()
-        self.calc5.reset()
-        self.calc6.reset()
-        self.calc7.reset()
-        self.calc8.reset()
-        self.calc9.reset()
-        self.calc10.reset()
+        bulk_put(self.reset_targets())
+        for c in range(10):
+            getattr(self, "calc%d" % (c+1))._reset_attrs()
         self.read_attrs = ["calc%d" % (c+1) for c in range(10)]
 
+    def reset_targets(self):
+        """default values of all fields: ``{signal: value}``"""
+        targets = OrderedDict()
+        for c in range(10):
+            targets.update(getattr(self, "calc%d" % (c+1)).reset_targets())
+        return targets
 
-def swait_setup_random_number(swait, **kw):
-    """setup swait record to generate random numbers"""
-    swait.reset()
-    swait.scan.put("Passive")
-    swait.calc.put("RNDM")
-    swait.scan.put(".1 second")
-    swait.desc.put("uniform random numbers")
 
-    swait.hints = {"fields": ['val',]}
-    swait.read_attrs = ['val',]
+def _swait_field(swait, field):
+    """signal of ``swait`` named (dotted) by ``field``"""
+    signal = swait
+    for part in field.split("."):
+        signal = getattr(signal, part)
+    return signal
 
 
-def swait_setup_gaussian(swait, motor, center=0, width=1, scale=1, noise=0.05):
-    """setup swait for noisy Gaussian"""
+def swait_template_random_number(**kw):
+    """template: swait record generates random numbers"""
+    return OrderedDict([
+        ("calc", "RNDM"),
+        ("scan", ".1 second"),
+        ("desc", "uniform random numbers"),
+    ])
+
+
+def swait_template_gaussian(motor, center=0, width=1, scale=1, noise=0.05):
+    """template: swait record computes noisy Gaussian"""
     # consider a noisy background, as well (needs a couple calcs)
     assert(isinstance(motor, EpicsMotor))
     assert(width > 0)
     assert(0.0 <= noise <= 1.0)
-    swait.reset()
-    swait.scan.put("Passive")
-    swait.channels.A.input_pv.put(motor.user_readback.pvname)
-    swait.channels.B.value.put(center)
-    swait.channels.C.value.put(width)
-    swait.channels.D.value.put(scale)
-    swait.channels.E.value.put(noise)
-    swait.calc.put("D*(0.95+E*RNDM)/exp(((A-b)/c)^2)")
-    swait.scan.put("I/O Intr")
-    swait.desc.put("noisy Gaussian curve")
-
-    swait.hints = {"fields": ['val',]}
-    swait.read_attrs = ['val',]
-
-
-def swait_setup_lorentzian(swait, motor, center=0, width=1, scale=1, noise=0.05):
-    """setup swait record for noisy Lorentzian"""
+    return OrderedDict([
+        ("channels.A.input_pv", motor.user_readback.pvname),
+        ("channels.B.value", center),
+        ("channels.C.value", width),
+        ("channels.D.value", scale),
+        ("channels.E.value", noise),
+        ("calc", "D*(0.95+E*RNDM)/exp(((A-b)/c)^2)"),
+        ("scan", "I/O Intr"),
+        ("desc", "noisy Gaussian curve"),
+    ])
+
+
+def swait_template_lorentzian(motor, center=0, width=1, scale=1, noise=0.05):
+    """template: swait record computes noisy Lorentzian"""
     # consider a noisy background, as well (needs a couple calcs)
     assert(isinstance(motor, EpicsMotor))
     assert(width > 0)
     assert(0.0 <= noise <= 1.0)
-    swait.reset()
-    swait.scan.put("Passive")
-    swait.channels.A.input_pv.put(motor.user_readback.pvname)
-    swait.channels.B.value.put(center)
-    swait.channels.C.value.put(width)
-    swait.channels.D.value.put(scale)
-    swait.channels.E.value.put(noise)
-    swait.calc.put("D*(0.95+E*RNDM)/(1+((A-b)/c)^2)")
-    swait.scan.put("I/O Intr")
-    swait.desc.put("noisy Lorentzian curve")
+    return OrderedDict([
+        ("channels.A.input_pv", motor.user_readback.pvname),
+        ("channels.B.value", center),
+        ("channels.C.value", width),
+        ("channels.D.value", scale),
+        ("channels.E.value", noise),
+        ("calc", "D*(0.95+E*RNDM)/(1+((A-b)/c)^2)"),
+        ("scan", "I/O Intr"),
+        ("desc", "noisy Lorentzian curve"),
+    ])
+
+
+def swait_template_incrementer(scan=None, limit=100000):
+    """template: swait record is an incrementer"""
+    return OrderedDict([
+        # the record reads its own value
+        ("channels.A.input_pv", lambda swait: swait.prefix),
+        ("channels.B.value", limit),
+        ("calc", "(A+1) % B"),
+        ("scan", scan or ".1 second"),
+        ("desc", "incrementer"),
+    ])
+
+
+def swait_apply_templates(templates, timeout=10):
+    """
+    configure many swait records at once
+    
+    Each record is reset to defaults and then configured
+    from its template, writing (concurrently) only those fields
+    that change.  Records are kept "Passive" until all their
+    other fields are written, then ``scan`` is written.
+    
+    PARAMETERS
+    
+    templates
+        *dict* : ``{swait: template}``
+    
+    timeout
+        *float* : time (s) allowed for each group of puts (default: 10)
+    """
+    configure, scan = OrderedDict(), OrderedDict()
+    for swait, template in templates.items():
+        targets = swait.reset_targets()
+        for field, value in template.items():
+            if callable(value):
+                value = value(swait)
+            targets[_swait_field(swait, field)] = value
+        scan[swait] = targets.pop(swait.scan)
+        configure[swait] = targets
+
+    signals = [swait.scan for swait in scan]
+    for targets in configure.values():
+        signals += list(targets.keys())
+    current = bulk_get(signals)
+
+    first, last = OrderedDict(), OrderedDict()
+    for swait, targets in configure.items():
+        changes = OrderedDict([
+            (signal, value)
+            for signal, value in targets.items()
+            if not _same_value(current[signal], value)
+            ])
+        if len(changes) > 0:
+            first[swait.scan] = "Passive"
+            first.update(changes)
+            last[swait.scan] = scan[swait]
+        elif not _same_value(current[swait.scan], scan[swait]):
+            last[swait.scan] = scan[swait]
+
+    bulk_put(first, skip_unchanged=False, timeout=timeout)
+    bulk_put(last, skip_unchanged=False, timeout=timeout)
+
+    for swait in templates:
+        swait.hints = {"fields": ['val',]}
+        swait.read_attrs = ['val',]
+
+
+def _swait_records(calcs):
+    """``{name: swaitRecord}`` of a userCalcsDevice (or one swaitRecord)"""
+    if isinstance(calcs, swaitRecord):
+        return OrderedDict([(calcs.attr_name or calcs.name, calcs)])
+    return OrderedDict([
+        (nm, getattr(calcs, nm))
+        for nm in calcs.component_names
+        if isinstance(getattr(calcs, nm), swaitRecord)
+        ])
+
+
+def swait_export_configuration(calcs, filename):
+    """
+    write the configuration of the swait records to a JSON file
+    
+    ``calcs`` is a userCalcsDevice (or a swaitRecord).
+    Each record's configuration is a template 
+    (see :func:`swait_import_configuration()`).
+    Fields that could not be read are left out
+    (on import, these are reset to their default values).
+    """
+    records = _swait_records(calcs)
+    signals = OrderedDict()
+    for nm, swait in records.items():
+        for field in _swait_config_fields:
+            signals[(nm, field)] = _swait_field(swait, field)
+    values = bulk_get(signals.values())
+
+    configuration = OrderedDict((nm, OrderedDict()) for nm in records)
+    for (nm, field), signal in signals.items():
+        value = values[signal]
+        if value is None:
+            continue        # not read: not configured on import
+        if field in _swait_numeric_fields:
+            value = float(value)
+            if field == "prec":
+                value = int(value)
+        configuration[nm][field] = value
+
+    with open(filename, "w") as fp:
+        json.dump(configuration, fp, indent=2)
+    return configuration
+
+
+def swait_import_configuration(calcs, filename, timeout=10):
+    """
+    configure the swait records from a JSON file
+    
+    ``calcs`` is a userCalcsDevice (or a swaitRecord).
+    The file was written by :func:`swait_export_configuration()`.
+    Fields without a value (``null``) are left out of the template
+    (reset to their default values, as fields not in the file).
+    """
+    with open(filename, "r") as fp:
+        configuration = json.load(fp, object_pairs_hook=OrderedDict)
+    records = _swait_records(calcs)
+    templates = OrderedDict([
+        (
+            records[nm], 
+            OrderedDict([
+                (field, value)
+                for field, value in template.items()
+                if value is not None
+                ])
+        )
+        for nm, template in configuration.items()
+        ])
+    swait_apply_templates(templates, timeout=timeout)
+
 
-    swait.hints = {"fields": ['val',]}
-    swait.read_attrs = ['val',]
+def swait_setup_random_number(swait, **kw):
+    """setup swait record to generate random numbers"""
+    swait_apply_templates({swait: swait_template_random_number(**kw)})
+
+
+def swait_setup_gaussian(swait, motor, center=0, width=1, scale=1, noise=0.05):
+    """setup swait for noisy Gaussian"""
+    template = swait_template_gaussian(
+        motor, center=center, width=width, scale=scale, noise=noise)
+    swait_apply_templates({swait: template})
+
+
+def swait_setup_lorentzian(swait, motor, center=0, width=1, scale=1, noise=0.05):
+    """setup swait record for noisy Lorentzian"""
+    template = swait_template_lorentzian(
+        motor, center=center, width=width, scale=scale, noise=noise)
+    swait_apply_templates({swait: template})
 
 
 def swait_setup_incrementer(swait, scan=None, limit=100000):
     """setup swait record as an incrementer"""
-    # consider a noisy background, as well (needs a couple calcs)
-    scan = scan or ".1 second"
-    swait.reset()
-    swait.scan.put("Passive")
-    pvname = swait.val.pvname.split(".")[0]
-    swait.channels.A.input_pv.put(pvname)
-    swait.channels.B.value.put(limit)
-    swait.calc.put("(A+1) % B")
-    swait.scan.put(scan)
-    swait.desc.put("incrementer")
-
-    swait.hints = {"fields": ['val',]}
-    swait.read_attrs = ['val',]
+    template = swait_template_incrementer(scan=scan, limit=limit)
+    swait_apply_templates({swait: template})
@@ -13,9 +13,23 @@ import unittest
 def suite(*args, **kw):
 
     import test_simple
+    import test_peakstats
+    import test_signals
+    import test_synApps_sim
+    import test_filereaders
+    import test_plans
+    import test_devices
+    import test_suspenders
     # import test_excel
     test_list = [
         test_simple,
+        test_peakstats,
+        test_signals,
+        test_synApps_sim,
+        test_filereaders,
+        test_plans,
+        test_devices,
+        test_suspenders,
         # test_excel
         ]
 
@@ -0,0 +1,584 @@
+
+"""
+unit tests for the devices
+"""
+
+import numpy as np
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from ophyd import Component, Device
+from ophyd.areadetector import HDF5Plugin, SimDetectorCam
+from ophyd.areadetector.filestore_mixins import FileStoreIterativeWrite
+from ophyd.scaler import EpicsScaler, ScalerCH
+from ophyd.sim import make_fake_device
+from ophyd.status import wait as status_wait
+from apstools import devices as APS_devices
+
+
+def wait_until(condition, timeout=2):
+    """wait for ``condition()`` to become true, return its value"""
+    t_end = time.time() + timeout
+    while not condition() and time.time() < t_end:
+        time.sleep(0.01)
+    return condition()
+
+
+class Test_EPICS_scaler_channels(unittest.TestCase):
+
+    def setUp(self):
+        APS_devices._scaler_channels_cache.clear()
+        self.names = {"xxx:scaler1.NM1": "clock", "xxx:scaler1.NM3": "I0 "}
+        self.requests = []
+
+    def tearDown(self):
+        APS_devices._scaler_channels_cache.clear()
+
+    def caget_many(self, pvlist, **kwargs):
+        self.requests.append(list(pvlist))
+        return [self.names.get(pvname, "") for pvname in pvlist]
+
+    def use_channels(self, scaler, **kwargs):
+        with mock.patch.object(APS_devices.epics, "caget_many", self.caget_many):
+            APS_devices.use_EPICS_scaler_channels(scaler, **kwargs)
+
+    def test_EpicsScaler(self):
+        scaler = make_fake_device(EpicsScaler)("xxx:scaler1", name="scaler")
+        self.use_channels(scaler)
+        self.assertEqual(len(self.requests), 1)     # one bulk request
+        self.assertEqual(len(self.requests[0]), 32)
+        self.assertEqual(scaler.channels.read_attrs, ["chan1", "chan3"])
+
+        self.use_channels(scaler)           # from the cache
+        self.assertEqual(len(self.requests), 1)
+
+        # same prefix (another object): also from the cache
+        other = make_fake_device(EpicsScaler)("xxx:scaler1", name="other")
+        self.use_channels(other)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(other.channels.read_attrs, ["chan1", "chan3"])
+
+        self.names["xxx:scaler1.NM2"] = "I00"
+        self.use_channels(scaler, refresh=True)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(scaler.channels.read_attrs, ["chan1", "chan2", "chan3"])
+
+    def test_ScalerCH(self):
+        scaler = make_fake_device(ScalerCH)("xxx:scaler1", name="scaler")
+        self.use_channels(scaler)
+        self.use_channels(scaler)
+        self.assertEqual(len(self.requests), 1)
+        channels = [a for a in scaler.channels.read_attrs if "." not in a]
+        self.assertEqual(channels, ["chan01", "chan03"])
+        self.assertEqual(scaler.channels.chan03.s.name, "I0")
+
+        # another prefix: its own request
+        scaler2 = make_fake_device(ScalerCH)("xxx:scaler2", name="scaler2")
+        self.use_channels(scaler2)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_not_cached(self):
+        scaler = make_fake_device(EpicsScaler)("xxx:scaler1", name="scaler")
+        def caget_many(pvlist, **kwargs):
+            self.requests.append(list(pvlist))
+            return [None] + [""] * (len(pvlist) - 1)    # NM1 not read
+        with mock.patch.object(APS_devices.epics, "caget_many", caget_many):
+            APS_devices.use_EPICS_scaler_channels(scaler)
+            APS_devices.use_EPICS_scaler_channels(scaler)
+        self.assertEqual(len(self.requests), 2)
+
+
+class Test_ApsPssShutterWithStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.shutter = APS_devices.SimulatedApsPssShutterWithStatus(
+            name="shutter", response_time_s=(0.01, 0.02), seed=1)
+
+    def test_state_cache(self):
+        shutter = self.shutter
+        self.assertEqual(shutter.state_pv, None)
+        self.assertEqual(shutter.state, "close")
+        status_wait(shutter.set("open"), timeout=2)
+        self.assertEqual(shutter._state_value, "open")
+        self.assertEqual(shutter.state, "open")
+        self.assertTrue(shutter.isOpen)
+
+        # state reported by the PSS, not by the open/close bits
+        shutter.pss_state.put("close")
+        self.assertEqual(shutter._state_value, "close")
+        self.assertTrue(shutter.isClosed)
+
+    def test_disconnect(self):
+        shutter = self.shutter
+        shutter.pss_state.put("open")
+        self.assertEqual(shutter._state_value, "open")
+        shutter.pss_state._metadata["connected"] = False
+        shutter.pss_state._run_metadata_callbacks()
+        self.assertTrue(wait_until(lambda: shutter._state_value is None))
+
+
+class Test_ShutterMoves(unittest.TestCase):
+
+    def test_one_signal_shutter(self):
+        shutter = APS_devices.OneSignalShutter(name="shutter")
+        self.assertTrue(shutter.isClosed)
+        status = shutter.set("open")
+        status_wait(status, timeout=2)
+        self.assertTrue(status.success)
+        self.assertTrue(shutter.isOpen)
+        self.assertFalse(shutter.busy.get())
+        self.assertIn("open", shutter.move_times)
+        shutter.close()
+        self.assertTrue(shutter.isClosed)
+
+    def test_second_set_cancels(self):
+        shutter = APS_devices.SimulatedApsPssShutterWithStatus(
+            name="shutter", response_time_s=(0.5, 0.5))
+        first = shutter.set("open")
+        time.sleep(0.05)
+        self.assertTrue(shutter.busy.get())
+        second = shutter.set("close")
+        self.assertTrue(first.done)
+        self.assertFalse(first.success)
+        status_wait(second, timeout=2)
+        self.assertTrue(second.success)
+        time.sleep(0.6)         # the cancelled move never arrives
+        self.assertTrue(shutter.isClosed)
+        self.assertFalse(shutter.busy.get())
+
+    def test_stop(self):
+        shutter = APS_devices.SimulatedApsPssShutterWithStatus(
+            name="shutter", response_time_s=(0.5, 0.5))
+        status = shutter.set("open")
+        shutter.stop()
+        self.assertTrue(status.done)
+        self.assertFalse(status.success)
+        self.assertFalse(shutter.busy.get())
+
+    def test_destroy(self):
+        shutter = APS_devices.SimulatedApsPssShutterWithStatus(
+            name="shutter", response_time_s=(30, 30))
+        status = shutter.set("open")        # would wait a long time
+        thread = shutter._move_thread
+        self.assertTrue(thread.daemon)      # does not block exit
+        shutter.destroy()
+        self.assertTrue(status.done)
+        self.assertFalse(status.success)
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+
+    def test_many_shutters_concurrently(self):
+        shutters = [
+            APS_devices.SimulatedApsPssShutterWithStatus(
+                name="shutter%d" % i, response_time_s=(0.5, 0.5))
+            for i in range(12)]
+        t0 = time.time()
+        statuses = [shutter.set("open") for shutter in shutters]
+        for status in statuses:
+            status_wait(status, timeout=5)
+        self.assertLess(time.time() - t0, 0.9)     # not 8 at a time
+        self.assertTrue(all([shutter.isOpen for shutter in shutters]))
+
+
+class Test_ShutterGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.fast = APS_devices.OneSignalShutter(name="fast")
+        self.pss = APS_devices.SimulatedApsPssShutterWithStatus(
+            name="pss", response_time_s=(0.2, 0.2))
+        self.group = APS_devices.ShutterGroup(
+            [self.fast, self.pss], name="group")
+
+    def test_set(self):
+        group = self.group
+        self.assertTrue(group.isClosed)
+        status = group.set("open")
+        self.assertTrue(group.busy.get())
+        status_wait(status, timeout=2)
+        self.assertTrue(status.success)
+        self.assertFalse(group.busy.get())
+        self.assertTrue(group.isOpen)
+        self.assertEqual(group.state, "open")
+        self.assertEqual(list(group.timing), ["fast", "pss"])
+        self.assertLess(group.timing["fast"], group.timing["pss"])
+
+        status = group.set({self.fast: "close"})
+        status_wait(status, timeout=2)
+        self.assertEqual(group.state, "unknown")     # members disagree
+
+    def test_set_fails(self):
+        group = self.group
+        # pss starts to move, then fast cannot
+        status = group.set({self.pss: "open", self.fast: "sideways"})
+        self.assertTrue(status.done)
+        self.assertFalse(status.success)
+        self.assertFalse(group.busy.get())
+        self.assertFalse(self.pss.busy.get())    # move was stopped
+        time.sleep(0.3)
+        self.assertTrue(self.pss.isClosed)
+
+
+class Test_ApsMachineParametersDevice(unittest.TestCase):
+
+    def setUp(self):
+        self.aps = make_fake_device(
+            APS_devices.ApsMachineParametersDevice)("", name="aps")
+
+    def tearDown(self):
+        self.aps.disable_cache()
+
+    def test_snapshot(self):
+        aps = self.aps
+        aps.current.sim_put(102.5)
+        snapshot = aps.snapshot()
+        self.assertEqual(snapshot["aps_current"]["value"], 102.5)
+        self.assertEqual(
+            len(snapshot), len(list(aps.walk_signals())))
+
+    def test_cached_snapshot(self):
+        aps = self.aps
+        aps.enable_cache(max_age_s=0.1)
+        aps.current.sim_put(102.5)
+        self.assertEqual(aps.snapshot()["aps_current"]["value"], 102.5)
+        received = aps._cache_updated["aps_current"]
+
+        time.sleep(0.15)        # stale: read again, cache refreshed
+        snapshot = aps.snapshot()
+        self.assertEqual(snapshot["aps_current"]["value"], 102.5)
+        self.assertGreater(aps._cache_updated["aps_current"], received)
+        self.assertEqual(
+            list(snapshot), [w.item.name for w in aps.walk_signals()])
+
+
+    def test_stale_reading_cached(self):
+        aps = self.aps
+        aps.machine_status.sim_put("USER OPERATIONS")
+        aps.enable_cache(max_age_s=0.1)
+        time.sleep(0.15)    # stale, no monitor update (value unchanged)
+
+        gets = []
+        original_read = aps.machine_status.read
+        def read():
+            gets.append(time.time())
+            return original_read()
+        aps.machine_status.read = read
+
+        for _ in range(100):
+            self.assertTrue(aps.inUserOperations)
+            aps.read()
+        self.assertEqual(len(gets), 1)      # cache refreshed by the first get
+        age = time.time() - aps._cache_updated["aps_machine_status"]
+        self.assertLess(age, 0.1)
+
+
+class Test_Struck3820Flyer(unittest.TestCase):
+
+    def setUp(self):
+        self.mcs = make_fake_device(
+            APS_devices.Struck3820Flyer)("mcs:", name="mcs")
+
+    def acquire(self, channels=5):
+        """(simulate) the SIS3820 acquires ``channels`` MCS channels"""
+        mcs = self.mcs
+        for i, mca in enumerate(mcs.mca_channels):
+            mca.spectrum.sim_put(np.arange(8) * (i+1))
+        mcs.current_channel.sim_put(channels)
+        mcs.dwell_time.put(0.01)
+        mcs.acquiring.sim_put(0)
+
+    def test_fly(self):
+        mcs = self.mcs
+        status = mcs.kickoff()
+        self.assertFalse(status.done)       # not acquiring yet
+        mcs.acquiring.sim_put(1)
+        status_wait(status, timeout=2)
+        self.assertTrue(status.success)
+
+        status = mcs.complete()
+        self.acquire(5)
+        status_wait(status, timeout=2)
+        self.assertTrue(status.success)
+
+        keys = ["mcs_mca1", "mcs_mca2", "mcs_mca3", "mcs_mca4"]
+        desc = mcs.describe_collect()
+        self.assertEqual(list(desc), ["mcs"])
+        self.assertEqual(list(desc["mcs"]), keys)
+        pages = list(mcs.collect_pages())
+        self.assertEqual(len(pages), 1)
+        page = pages[0]
+        self.assertEqual(sorted(page), ["data", "timestamps"])
+        self.assertEqual(list(page["data"]), keys)
+        self.assertEqual(list(page["timestamps"]), keys)
+        for i, key in enumerate(keys):
+            self.assertEqual(len(page["data"][key]), 5)
+            self.assertEqual(len(page["timestamps"][key]), 5)
+            self.assertTrue(np.allclose(page["data"][key], np.arange(5) * (i+1)))
+        self.assertTrue(np.allclose(
+            np.diff(page["timestamps"]["mcs_mca1"]), 0.01))
+
+    def test_kickoff_timeout(self):
+        mcs = self.mcs
+        mcs.kickoff_timeout_s = 0.1
+        status = mcs.kickoff()          # never reports Acquiring
+        with self.assertRaises(Exception):
+            status_wait(status, timeout=2)
+        self.assertFalse(status.success)
+
+    def test_complete_timeout(self):
+        mcs = self.mcs
+        mcs.complete_timeout_s = 0.1
+        status = mcs.kickoff()
+        mcs.acquiring.sim_put(1)
+        status_wait(status, timeout=2)
+        status = mcs.complete()         # acquisition never ends
+        with self.assertRaises(TimeoutError):
+            status_wait(status, timeout=2)
+        self.assertEqual(list(mcs.collect_pages()), [])
+
+
+class MyHdf5EpicsIterativeWriter(
+        APS_devices.AD_EpicsHdf5FileName, FileStoreIterativeWrite): pass
+
+
+class MyHDF5FileNames(HDF5Plugin, MyHdf5EpicsIterativeWriter): pass
+
+
+class Test_AD_EpicsHdf5FileName(unittest.TestCase):
+
+    def setUp(self):
+        hdf = make_fake_device(MyHDF5FileNames)(
+            "HDF1:", name="hdf", root="/", write_path_template="/tmp/")
+        hdf.plugin_type.sim_put("NDFileHDF5")
+        hdf.array_size.width.sim_put(1024)     # primed
+        hdf.file_path_exists.sim_put(1)
+        hdf.file_path.sim_put("/tmp/")
+        hdf.file_name.sim_put("test")
+        hdf.file_number.sim_put(7)
+        hdf.file_template.sim_put("%s%s_%4.4d.h5")
+        hdf.stage_sigs.clear()      # no EPICS settings to stage
+        self.hdf = hdf
+
+    def tearDown(self):
+        self.hdf.unstage()
+
+    def datum_documents(self, frames):
+        """stage, generate a datum for each frame, return the datum documents"""
+        hdf = self.hdf
+        hdf.stage()
+        ids = [hdf.generate_datum("hdf_image", i, {}) for i in range(frames)]
+        datums = {
+            doc["datum_id"]: doc
+            for name, doc in hdf.collect_asset_docs()
+            if name == "datum"}
+        return [datums[datum_id] for datum_id in ids]
+
+    def test_datum_per_frame(self):
+        datums = self.datum_documents(5)
+        self.assertEqual(
+            [d["datum_kwargs"]["point_number"] for d in datums],
+            list(range(5)))
+        for d in datums:
+            self.assertEqual(d["datum_kwargs"]["HDF5_file_name"], "/tmp/test_0007.h5")
+            self.assertNotIn("point_start", d["datum_kwargs"])
+
+    def test_batches(self):
+        self.hdf.datum_batch_size = 3
+        datums = self.datum_documents(7)
+        # one datum document for each batch, shared by its frames
+        unique = {d["datum_id"]: d for d in datums}
+        self.assertEqual(len(unique), 3)
+        self.assertEqual(
+            [datums[i]["datum_id"] for i in (0, 1, 2)],
+            [datums[0]["datum_id"]]*3)
+        self.assertEqual(
+            [(d["datum_kwargs"]["point_start"], d["datum_kwargs"]["point_stop"]) 
+             for d in unique.values()],
+            [(0, 3), (3, 6), (6, 9)])
+        for d in unique.values():
+            self.assertEqual(d["datum_kwargs"]["HDF5_file_name"], "/tmp/test_0007.h5")
+            self.assertNotIn("point_number", d["datum_kwargs"])
+
+    def test_batch_datum_count(self):
+        frames, batch_size = 100, 10
+        self.hdf.datum_batch_size = batch_size
+        self.hdf.stage()
+        for i in range(frames):
+            self.hdf.generate_datum("hdf_image", i, {})
+        docs = [name for name, doc in self.hdf.collect_asset_docs()]
+        self.assertEqual(docs.count("datum"), frames // batch_size)
+        self.assertEqual(len(self.hdf._datum_uids["hdf_image"]), frames)
+
+    def test_stage_fails(self):
+        hdf = self.hdf
+        hdf.file_path_exists.sim_put(0)
+        with self.assertRaises(IOError):
+            hdf.stage()
+        self.assertIsNone(hdf._file_name_parts)
+        self.assertIsNone(hdf._file_number_cid)
+
+
+class Test_AD_setup_FrameType(unittest.TestCase):
+
+    def setUp(self):
+        self.iocs = {}      # simulated PVs: {pvname: value}
+        self.puts = []
+
+    def caput_many(self, pvlist, values, **kwargs):
+        self.puts.append(list(pvlist))
+        self.iocs.update(zip(pvlist, values))
+        return [1] * len(pvlist)
+
+    def caget_many(self, pvlist, **kwargs):
+        return [self.iocs.get(pvname) for pvname in pvlist]
+
+    def setup_FrameType(self, *args, **kwargs):
+        with mock.patch.object(APS_devices.epics, "caput_many", self.caput_many), \
+             mock.patch.object(APS_devices.epics, "caget_many", self.caget_many):
+            return APS_devices.AD_setup_FrameType(*args, **kwargs)
+
+    def test_verified(self):
+        report = self.setup_FrameType(
+            ["13SIM1:", "2bmbPG3:"], 
+            scheme={"13SIM1:": "NeXus", "2bmbPG3:": "DataExchange"})
+        self.assertEqual(len(self.puts), 1)         # all PVs at once
+        self.assertEqual(len(self.puts[0]), 2*2*3)
+        self.assertEqual(list(report), ["13SIM1:", "2bmbPG3:"])
+        for p in report.values():
+            self.assertTrue(p["ok"])
+            self.assertEqual(len(p["errors"]), 0)
+        self.assertEqual(
+            self.iocs["2bmbPG3:cam1:FrameType_RBV.ONST"], "/exchange/data_dark")
+
+    def test_mismatch(self):
+        def caput_many(pvlist, values, **kwargs):
+            self.caput_many(pvlist, values)
+            # one PV does not take the new value, one cannot be read
+            self.iocs["13SIM1:cam1:FrameType.TWST"] = "FlatField"
+            del self.iocs["13SIM1:cam1:FrameType_RBV.ZRST"]
+
+        with mock.patch.object(APS_devices.epics, "caput_many", caput_many), \
+             mock.patch.object(APS_devices.epics, "caget_many", self.caget_many):
+            report = APS_devices.AD_setup_FrameType("13SIM1:")
+        self.assertFalse(report["13SIM1:"]["ok"])
+        self.assertEqual(
+            dict(report["13SIM1:"]["errors"]),
+            {
+                "13SIM1:cam1:FrameType.TWST": ("/entry/data/white", "FlatField"),
+                "13SIM1:cam1:FrameType_RBV.ZRST": ("/entry/data/data", None),
+            })
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            self.setup_FrameType("13SIM1:", scheme="no such scheme")
+        self.assertEqual(len(self.puts), 0)
+
+
+class MyDetector(Device):
+    cam = Component(SimDetectorCam, "cam1:")
+    hdf1 = Component(HDF5Plugin, "HDF1:")
+
+
+def fake_detector(name, primes=True):
+    """
+    fake detector: acquiring a frame primes its HDF5 plugin (if ``primes``)
+    
+    Returns the detector and the list of its acquisitions.
+    """
+    det = make_fake_device(MyDetector)("", name=name)
+    settings = dict(array_callbacks=0, image_mode=2, trigger_mode=1, num_images=5)
+    for attr, value in settings.items():
+        getattr(det.cam, attr).sim_put(value)
+    det.hdf1.enable.sim_put("Disable")
+    acquisitions = []
+
+    def acquire_cb(value=None, **kwargs):
+        if value == 1:
+            acquisitions.append(time.time())
+            if primes and det.hdf1.enable.get() in (1, "1", "Enable"):
+                det.hdf1.array_size.width.sim_put(1024)
+
+    det.cam.acquire.subscribe(acquire_cb, run=False)
+    return det, acquisitions
+
+
+class Test_AD_warmed_up(unittest.TestCase):
+
+    def test_not_primed(self):
+        det = make_fake_device(MyDetector)("", name="det")
+        t0 = time.time()
+        self.assertFalse(APS_devices.AD_warmed_up(det))
+        self.assertLess(time.time() - t0, 0.5)      # no waiting
+        self.assertEqual(det.hdf1.capture.get(), 0)     # not changed
+
+    def test_primed(self):
+        det = make_fake_device(MyDetector)("", name="det")
+        det.hdf1.array_size.width.sim_put(1024)
+        det.hdf1.array_size.height.sim_put(1024)
+        self.assertTrue(APS_devices.AD_warmed_up(det))
+        self.assertTrue(APS_devices.AD_prime_plugin(det))   # nothing to do
+
+
+class Test_AD_prime_plugin(unittest.TestCase):
+
+    def test_prime(self):
+        det, acquisitions = fake_detector("det")
+        self.assertFalse(APS_devices.AD_warmed_up(det))
+        self.assertTrue(APS_devices.AD_prime_plugin(det, timeout=1))
+        self.assertEqual(len(acquisitions), 1)
+        self.assertTrue(APS_devices.AD_warmed_up(det))
+        # settings restored
+        self.assertEqual(det.cam.array_callbacks.get(), 0)
+        self.assertEqual(det.cam.image_mode.get(), 2)
+        self.assertEqual(det.cam.trigger_mode.get(), 1)
+        self.assertEqual(det.cam.num_images.get(), 5)
+        self.assertEqual(det.hdf1.enable.get(), "Disable")
+        self.assertEqual(det.cam.acquire.get(), 0)
+
+    def test_prime_fails(self):
+        det, acquisitions = fake_detector("det", primes=False)
+        self.assertFalse(APS_devices.AD_prime_plugin(det, timeout=0.1))
+        self.assertEqual(det.cam.num_images.get(), 5)
+        self.assertEqual(det.hdf1.enable.get(), "Disable")
+
+    def test_warm_up_detectors(self):
+        cold, cold_acquisitions = fake_detector("cold")
+        warm, warm_acquisitions = fake_detector("warm")
+        warm.hdf1.array_size.width.sim_put(1024)
+        stuck, _ = fake_detector("stuck", primes=False)
+        results = APS_devices.AD_warm_up_detectors([cold, warm, stuck], timeout=0.5)
+        self.assertEqual(dict(results), dict(cold=True, warm=True, stuck=False))
+        self.assertEqual(len(cold_acquisitions), 1)
+        self.assertEqual(len(warm_acquisitions), 0)     # already warm: skipped
+        self.assertEqual(APS_devices.AD_warm_up_detectors([]), {})
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_EPICS_scaler_channels,
+        Test_ApsPssShutterWithStatus,
+        Test_ShutterMoves,
+        Test_ShutterGroup,
+        Test_ApsMachineParametersDevice,
+        Test_Struck3820Flyer,
+        Test_AD_EpicsHdf5FileName,
+        Test_AD_setup_FrameType,
+        Test_AD_warmed_up,
+        Test_AD_prime_plugin,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
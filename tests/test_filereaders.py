@@ -0,0 +1,196 @@
+
+"""
+unit tests for the file readers
+"""
+
+import numpy as np
+import os
+import sys
+import tempfile
+import unittest
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from bluesky import RunEngine
+from apstools.filereaders import read_mda, DBR_CTRL_DOUBLE, DBR_STRING
+from apstools.plans import sscan_1D
+from apstools.synApps_ophyd import sim
+
+
+def xdr_int(*values):
+    return np.array(values, dtype=">i4").tobytes()
+
+
+def xdr_string(text):
+    data = text.encode("latin-1")
+    if len(data) == 0:
+        return xdr_int(0)
+    padding = b"\0" * ((4 - len(data) % 4) % 4)
+    return xdr_int(len(data), len(data)) + data + padding
+
+
+def mda_scan(rank, name, positioners, detectors, offsets=None, curr_pt=None):
+    """one scan: positioners & detectors are {name: 1-D array}"""
+    npts = len(list(positioners.values())[0])
+    if curr_pt is None:
+        curr_pt = npts
+    parts = [xdr_int(rank, npts, curr_pt)]
+    if offsets is not None:
+        parts.append(xdr_int(*offsets))
+    parts += [
+        xdr_string(name),
+        xdr_string("Jan 01, 2019 00:00:00"),
+        xdr_int(len(positioners), len(detectors), 0),
+    ]
+    for i, nm in enumerate(positioners):
+        parts.append(xdr_int(i))
+        for text in (nm, "", "LINEAR", "mm", "", "", ""):
+            parts.append(xdr_string(text))
+    for i, nm in enumerate(detectors):
+        parts.append(xdr_int(i))
+        for text in (nm, "", "counts"):
+            parts.append(xdr_string(text))
+    for data in positioners.values():
+        parts.append(np.asarray(data, dtype=">f8").tobytes())
+    for data in detectors.values():
+        parts.append(np.asarray(data, dtype=">f4").tobytes())
+    return b"".join(parts)
+
+
+class Test_MDA(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_2D(self):
+        x = np.linspace(0, 1, 3)
+        y = np.linspace(-1, 1, 5)
+        z = np.outer(x, y)
+        inner = [
+            mda_scan(1, "xxx:scan1", dict(y=y), dict(z=row))
+            for row in z]
+        header_size = len(xdr_int(0, 0, 0, 3, 5, 1, 0))
+        outer_size = len(mda_scan(2, "xxx:scan2", dict(x=x), {}, offsets=[0]*3))
+        offsets = [header_size + outer_size]
+        for scan in inner[:-1]:
+            offsets.append(offsets[-1] + len(scan))
+        offset_extra = offsets[-1] + len(inner[-1])
+        extra = b"".join([
+            xdr_int(2),
+            xdr_string("xxx:ring_current"), xdr_string("ring current"),
+            xdr_int(DBR_CTRL_DOUBLE, 1), xdr_string("mA"),
+            np.array([101.5], dtype=">f8").tobytes(),
+            xdr_string("xxx:sample"), xdr_string(""),
+            xdr_int(DBR_STRING), xdr_string("silicon"),
+        ])
+        content = b"".join([
+            np.array([1.3], dtype=">f4").tobytes(),
+            xdr_int(7, 2, 3, 5, 1, offset_extra),
+            mda_scan(2, "xxx:scan2", dict(x=x), {}, offsets=offsets),
+        ] + inner + [extra])
+
+        filename = os.path.join(self.tempdir.name, "xxx_0007.mda")
+        with open(filename, "wb") as fp:
+            fp.write(content)
+
+        mda = read_mda(filename)
+        self.assertEqual(mda.version, 1.3)
+        self.assertEqual(mda.scan_number, 7)
+        self.assertEqual(mda.dimensions, [3, 5])
+        self.assertTrue(np.allclose(mda.positioners(1)["x"], x))
+        self.assertEqual(mda.positioners(2)["y"].shape, (3, 5))
+        self.assertTrue(np.allclose(mda.positioners(2)["y"][2], y))
+        self.assertTrue(np.allclose(mda.detectors(2)["z"], z))
+        self.assertEqual(mda.scan(2).positioners[0]["unit"], "mm")
+        self.assertEqual(mda.extra_pvs["xxx:ring_current"]["value"], 101.5)
+        self.assertEqual(mda.extra_pvs["xxx:sample"]["value"], "silicon")
+
+    def test_partial(self):
+        x = np.linspace(0, 1, 4)
+        y = np.linspace(-1, 1, 5)
+        # outer scan stopped after 2 of 4 points, inner scan of point 2
+        # stopped after 3 of 5 points (file content of the rest is left over)
+        inner = [
+            mda_scan(1, "xxx:scan1", dict(y=y), dict(z=y+1)),
+            mda_scan(1, "xxx:scan1", dict(y=y), dict(z=y+2), curr_pt=3),
+            ]
+        header_size = len(xdr_int(0, 0, 0, 4, 5, 1, 0))
+        outer_size = len(mda_scan(2, "xxx:scan2", dict(x=x), {}, offsets=[0]*4))
+        offsets = [header_size + outer_size, header_size + outer_size + len(inner[0])]
+        content = b"".join([
+            np.array([1.3], dtype=">f4").tobytes(),
+            xdr_int(8, 2, 4, 5, 1, 0),
+            mda_scan(2, "xxx:scan2", dict(x=x), {}, offsets=offsets+[0, 0], curr_pt=2),
+        ] + inner)
+
+        filename = os.path.join(self.tempdir.name, "xxx_0008.mda")
+        with open(filename, "wb") as fp:
+            fp.write(content)
+
+        mda = read_mda(filename)
+        x1 = mda.positioners(1)["x"]
+        self.assertEqual(x1.dtype, np.dtype(np.float64))
+        self.assertTrue(x1.dtype.isnative)
+        self.assertTrue(np.allclose(x1[:2], x[:2]))
+        self.assertTrue(np.isnan(x1[2:]).all())
+
+        z = mda.detectors(2)["z"]
+        self.assertEqual(z.dtype, np.dtype(np.float64))
+        self.assertEqual(z.shape, (4, 5))
+        self.assertTrue(np.allclose(z[0], y+1))
+        self.assertTrue(np.allclose(z[1, :3], y[:3]+2))
+        self.assertTrue(np.isnan(z[1, 3:]).all())
+        self.assertTrue(np.isnan(z[2:]).all())
+
+    def test_SaveData(self):
+        m1 = sim.sim_pv_database.create("sim:m1", 0)
+        calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+        scans = sim.SimSscanDevice("sim:", name="scans")
+        calcs.calc1.channels.A.input_pv.put("sim:m1")
+        calcs.calc1.calc.put("A*A")
+        scan = scans.scan1
+        scan.number_points.put(11)
+        scan.positioners.p1.setpoint_pv.put("sim:m1")
+        scan.positioners.p1.start.put(-1)
+        scan.positioners.p1.end.put(1)
+        scan.triggers.t1.trigger_pv.put("sim:userCalc1.PROC")
+        scan.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+
+        save_data = sim.SimSaveData("sim:saveData_", name="save_data")
+        save_data.file_system.put(self.tempdir.name)
+        save_data.base_name.put("sim_")
+        save_data.watch(scan)
+
+        RE = RunEngine({})
+        RE(sscan_1D(scan))
+        mda = save_data.read_latest_mda()
+        self.assertEqual(mda.scan_number, 1)
+        self.assertEqual(mda.dimensions, [11])
+        x = mda.positioners()["sim:m1"]
+        y = mda.detectors()["sim:userCalc1.VAL"]
+        self.assertTrue(np.allclose(x, np.linspace(-1, 1, 11)))
+        self.assertTrue(np.allclose(y, x*x))
+
+        calcs.destroy()
+        scans.destroy()
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_MDA,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,68 @@
+
+"""
+unit tests for the PeakStatistics callback
+"""
+
+import numpy as np
+import os
+import sys
+import unittest
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from apstools.callbacks import PeakStatistics
+from apstools.signals import pseudo_voigt
+
+
+class Test_PeakStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.x = np.linspace(-1, 1, 41)
+        self.y = 10 + 1000 * pseudo_voigt(self.x, center=0.1, sigma=0.2, eta=0.4)
+        self.stats = PeakStatistics("x", "y")
+        for x, y in zip(self.x, self.y):
+            self.stats.append(x, y)
+
+    def test_running_statistics(self):
+        self.assertAlmostEqual(self.stats.max[0], 0.1)
+        self.assertAlmostEqual(self.stats.max[1], 1010)
+        self.assertEqual(self.stats.min[1], self.y.min())
+        com = (self.x * self.y).sum() / self.y.sum()
+        self.assertAlmostEqual(self.stats.com, com)
+
+    def test_compute(self):
+        self.stats.compute()
+        self.assertEqual(len(self.stats.crossings), 2)
+        self.assertAlmostEqual(self.stats.cen, 0.1, delta=0.01)
+        self.assertGreater(self.stats.fwhm, 0.3)
+        self.assertLess(self.stats.fwhm, 0.5)
+
+    def test_fit(self):
+        for shape in self.stats.fit_shapes:
+            fitted = self.stats.fit(shape)
+            self.assertEqual(fitted["shape"], shape)
+            self.assertAlmostEqual(fitted["center"], 0.1, delta=0.01)
+        fitted = self.stats.fit("pseudovoigt")
+        self.assertAlmostEqual(fitted["sigma"], 0.2, places=4)
+        self.assertAlmostEqual(fitted["eta"], 0.4, places=4)
+        self.assertAlmostEqual(fitted["height"], 1000, places=2)
+        self.assertAlmostEqual(fitted["background"], 10, places=2)
+        self.assertRaises(ValueError, self.stats.fit, "triangle")
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_PeakStatistics,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,249 @@
+
+"""
+unit tests for the plans
+"""
+
+import numpy as np
+import os
+import sys
+import unittest
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from bluesky import RunEngine
+from ophyd.sim import SynAxis
+from apstools import plans as APS_plans
+from apstools.signals import SynPseudoVoigt
+from apstools.synApps_ophyd import sim
+
+
+def run_documents(plan):
+    """run the plan, return documents: {"start": [...], "primary": [...], ...}"""
+    documents = {}
+    descriptors = {}
+
+    def collect(key, doc):
+        if key == "descriptor":
+            descriptors[doc["uid"]] = doc["name"]
+        if key == "event":
+            key = descriptors[doc["descriptor"]]
+        documents.setdefault(key, []).append(doc)
+
+    RE = RunEngine({})
+    RE(plan, collect)
+    return documents
+
+
+class Test_sscan_1D(unittest.TestCase):
+
+    def setUp(self):
+        self.m1 = sim.sim_pv_database.create("sim:m1", 0)
+        self.calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+        self.scans = sim.SimSscanDevice("sim:", name="scans")
+        calc = self.calcs.calc1
+        calc.channels.A.input_pv.put("sim:m1")
+        calc.calc.put("A*A")
+
+        scan = self.scans.scan1
+        scan.number_points.put(11)
+        scan.positioners.p1.setpoint_pv.put("sim:m1")
+        scan.positioners.p1.start.put(-1)
+        scan.positioners.p1.end.put(1)
+        scan.triggers.t1.trigger_pv.put("sim:userCalc1.PROC")
+        scan.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+
+    def tearDown(self):
+        self.calcs.destroy()
+        self.scans.destroy()
+
+    def test_acquired_points(self):
+        scan = self.scans.scan1
+        scan.current_point.sim_put(0)
+        self.assertEqual(APS_plans._sscan_acquired_points(scan), 11)
+        scan.current_point.sim_put(4)
+        self.assertEqual(APS_plans._sscan_acquired_points(scan), 4)
+        scan.current_point.sim_put(11)
+        self.assertEqual(APS_plans._sscan_acquired_points(scan), 11)
+
+    def test_final_arrays(self):
+        scan = self.scans.scan1
+        documents = run_documents(
+            APS_plans.sscan_1D(scan, final_array_stream="final"))
+        self.assertEqual(len(documents["final"]), 1)
+        data = documents["final"][0]["data"]
+        x = np.array(data["scans_scan1_positioners_p1_array"])
+        y = np.array(data["scans_scan1_detectors_d01_array"])
+        self.assertEqual(x.shape, (11,))          # not MPTS (1000)
+        self.assertTrue(np.allclose(x, np.linspace(-1, 1, 11)))
+        self.assertTrue(np.allclose(y, x*x))
+
+        # trimmed to CPT when the scan ended early
+        scan.current_point.sim_put(6)
+        arrays = APS_plans._get_sscan_final_arrays(scan)
+        self.assertEqual([len(sig.get()) for sig in arrays], [6, 6])
+
+    def test_final_arrays_stacked(self):
+        scan = self.scans.scan1
+        scan.detectors.d02.input_pv.put("sim:m1")
+        documents = run_documents(
+            APS_plans.sscan_1D(
+                scan, final_array_stream="final", final_array_stacked=True))
+        channels = documents["start"][0]["sscan_final_array_channels"]
+        self.assertEqual(channels["positioners"], ["p1"])
+        self.assertEqual(channels["detectors"], ["d01", "d02"])
+        data = documents["final"][0]["data"]
+        positioners = np.array(data["scans_scan1_positioners_array"])
+        detectors = np.array(data["scans_scan1_detectors_array"])
+        self.assertEqual(positioners.shape, (1, 11))
+        self.assertEqual(detectors.shape, (2, 11))
+        self.assertTrue(np.allclose(detectors[1], positioners[0]))
+
+
+class Test_sscan_nD(unittest.TestCase):
+
+    def setUp(self):
+        self.m1 = sim.sim_pv_database.create("sim:m1", 0)
+        self.m2 = sim.sim_pv_database.create("sim:m2", 0)
+        self.calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+        self.scans = sim.SimSscanDevice("sim:", name="scans")
+        calc = self.calcs.calc1
+        calc.channels.A.input_pv.put("sim:m1")
+        calc.channels.B.input_pv.put("sim:m2")
+        calc.calc.put("A+10*B")
+
+        inner = self.scans.scan1
+        inner.number_points.put(5)
+        inner.positioners.p1.setpoint_pv.put("sim:m1")
+        inner.positioners.p1.start.put(0)
+        inner.positioners.p1.end.put(4)
+        inner.triggers.t1.trigger_pv.put("sim:userCalc1.PROC")
+        inner.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+
+        outer = self.scans.scan2
+        outer.number_points.put(3)
+        outer.positioners.p1.setpoint_pv.put("sim:m2")
+        outer.positioners.p1.start.put(1)
+        outer.positioners.p1.end.put(3)
+        outer.triggers.t1.trigger_pv.put("sim:scan1.EXSC")
+
+    def tearDown(self):
+        self.calcs.destroy()
+        self.scans.destroy()
+
+    def test_2D(self):
+        inner = self.scans.scan1
+        documents = run_documents(
+            APS_plans.sscan_nD([inner, self.scans.scan2]))
+        self.assertEqual(len(documents["scan1"]), 3)   # one per outer point
+        self.assertEqual(len(documents["scan2"]), 1)
+        self.assertEqual(len(documents["settings"]), 1)
+        for row, event in enumerate(documents["scan1"]):
+            data = event["data"]
+            x = np.array(data["scans_scan1_positioners_p1_array"])
+            y = np.array(data["scans_scan1_detectors_d01_array"])
+            outer_position = data["scans_scan2_positioners_p1_readback_value"]
+            self.assertEqual(outer_position, row + 1)
+            self.assertTrue(np.allclose(x, np.arange(5)))
+            self.assertTrue(np.allclose(y, x + 10*outer_position))
+        data = documents["scan2"][0]["data"]
+        self.assertTrue(np.allclose(
+            data["scans_scan2_positioners_p1_array"], [1, 2, 3]))
+
+        # inner record restored, not left waiting
+        self.assertEqual(inner.awct.get(), 0)
+        self.assertEqual(inner.wcnt.get(), 0)
+
+
+class Test_TuneAxis(unittest.TestCase):
+
+    def setUp(self):
+        self.motor = SynAxis(name="motor")
+        self.det = SynPseudoVoigt(
+            "det", self.motor, "motor", center=0.3, sigma=0.1, scale=1000)
+
+    def multi_pass_tune(self, **kwargs):
+        self.motor.set(0)
+        tuner = APS_plans.TuneAxis([self.det], self.motor)
+        documents = run_documents(
+            tuner.multi_pass_tune(
+                width=2, num=11, pass_max=3, step_factor=2, **kwargs))
+        return tuner, documents
+
+    def test_points_metadata(self):
+        tuner, documents = self.multi_pass_tune()
+        self.assertTrue(tuner.tune_ok)
+        self.assertEqual(len(documents["start"]), 3)
+        self.assertEqual(len(documents["primary"]), 3*11)
+        for i, start in enumerate(documents["start"]):
+            self.assertEqual(start["points_budget"], 3*11)
+            self.assertEqual(start["points_used"], (i+1)*11)
+        for event in documents["PeakStats"]:
+            self.assertEqual(event["data"]["PeakStats_points_saved"], 0)
+        self.assertEqual(tuner.points_saved, 0)
+
+    def test_adaptive(self):
+        tuner, documents = self.multi_pass_tune(adaptive=True, tolerance=0.01)
+        self.assertTrue(tuner.tune_ok)
+        self.assertTrue(tuner.converged)
+        self.assertAlmostEqual(tuner.center, 0.3, delta=0.01)
+
+        passes = len(documents["start"])
+        self.assertLess(passes, 3)
+        self.assertEqual(len(documents["primary"]), passes*11)
+        last = documents["start"][-1]
+        self.assertEqual(last["points_used"], passes*11)
+        self.assertEqual(tuner.points_saved, (3 - passes)*11)
+        data = documents["PeakStats"][-1]["data"]
+        self.assertEqual(data["PeakStats_points_saved"], tuner.points_saved)
+        self.assertTrue(data["PeakStats_converged"])
+
+
+class Test_tune_schedule(unittest.TestCase):
+
+    def test_sequence(self):
+        layers = APS_plans._tune_schedule(["a", "b", "c"])
+        self.assertEqual(layers, [["a"], ["b"], ["c"]])
+
+    def test_groups(self):
+        layers = APS_plans._tune_schedule(
+            ["x"], groups=[["a", "b", "c"], ["d", "e"]])
+        self.assertEqual(layers, [["x", "a", "d"], ["b", "e"], ["c"]])
+
+    def test_depends_on(self):
+        layers = APS_plans._tune_schedule(
+            [],
+            groups=[["sa_h", "sa_v"], ["sb_h", "sb_v"]],
+            depends_on={"ar": ["sa_v", "sb_v"], "a2r": ["ar"]})
+        self.assertEqual(
+            layers, 
+            [["sa_h", "sb_h"], ["sa_v", "sb_v"], ["ar"], ["a2r"]])
+
+    def test_circular(self):
+        with self.assertRaises(ValueError) as context:
+            APS_plans._tune_schedule(
+                ["a", "b", "c"], depends_on={"a": ["b"], "b": ["a"]})
+        self.assertTrue(str(context.exception).endswith(": a, b"))
+        with self.assertRaises(ValueError):
+            APS_plans._tune_schedule(
+                [], groups=[["a", "b"]], depends_on={"a": ["b"]})
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_sscan_1D,
+        Test_sscan_nD,
+        Test_TuneAxis,
+        Test_tune_schedule,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
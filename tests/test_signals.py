@@ -0,0 +1,73 @@
+
+"""
+unit tests for the simulated signals
+"""
+
+import numpy as np
+import os
+import sys
+import unittest
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from ophyd.sim import SynAxis
+from apstools.signals import SynPseudoVoigt
+
+
+class Test_SynPseudoVoigt(unittest.TestCase):
+
+    def setUp(self):
+        self.motor = SynAxis(name="motor")
+
+    def test_evaluate(self):
+        det = SynPseudoVoigt(
+            "det", self.motor, "motor", center=0.5, sigma=0.2, scale=100)
+        x = np.linspace(-2, 2, 81)
+        y = det.evaluate(x)
+        self.assertEqual(y.shape, x.shape)
+        self.assertAlmostEqual(y.max(), 100)
+        self.assertAlmostEqual(x[y.argmax()], 0.5)
+        self.motor.set(0.5)
+        det.trigger()
+        self.assertAlmostEqual(det.get(), 100)
+
+    def test_array_shape(self):
+        det = SynPseudoVoigt(
+            "det", self.motor, "motor", 
+            sigma=0.2, scale=100, shape=(32, 64), span=2)
+        det.trigger()
+        image = det.get()
+        self.assertEqual(image.shape, (32, 64))
+        self.assertEqual(det.describe()["det"]["shape"], [32, 64])
+
+    def test_seeded_noise(self):
+        x = np.linspace(-2, 2, 101)
+        for noise in ("poisson", "uniform"):
+            a = SynPseudoVoigt(
+                "a", self.motor, "motor", scale=1000, noise=noise, 
+                seed=12345, noise_block_size=10)
+            b = SynPseudoVoigt(
+                "b", self.motor, "motor", scale=1000, noise=noise, 
+                seed=12345)
+            self.assertTrue(np.array_equal(a.evaluate(x), b.evaluate(x)))
+            a.reseed(12345)
+            b.reseed(12345)
+            self.assertTrue(np.array_equal(a.evaluate(x), b.evaluate(x)))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_SynPseudoVoigt,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,123 @@
+
+"""
+unit tests for the suspenders
+"""
+
+import os
+import sys
+import time
+import unittest
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from bluesky import RunEngine
+from ophyd import Signal
+from apstools import suspenders as APS_suspenders
+from apstools.suspenders import SuspendWhenChanged
+
+
+class Test_SuspendWhenChanged(unittest.TestCase):
+
+    def setUp(self):
+        self.RE = RunEngine({})
+        self.signal = Signal(name="signal", value=100)
+        self.suspenders = []
+
+    def tearDown(self):
+        for suspender in self.suspenders:
+            suspender.remove()
+
+    def install(self, **kwargs):
+        suspender = SuspendWhenChanged(self.signal, **kwargs)
+        suspender.install(self.RE)
+        self.suspenders.append(suspender)
+        return suspender
+
+    def test_immediate(self):
+        suspender = self.install(allow_resume=True)
+        self.assertFalse(suspender.tripped)
+        self.signal.put(101)
+        self.assertTrue(suspender.tripped)
+        self.signal.put(100)
+        self.assertFalse(suspender.tripped)
+
+    def test_debounce(self):
+        suspender = self.install(allow_resume=True, debounce_s=0.2)
+        self.signal.put(101)        # a glitch
+        self.signal.put(100)
+        time.sleep(0.3)
+        self.assertFalse(suspender.tripped)
+
+        self.signal.put(101)        # stays changed
+        self.assertFalse(suspender.tripped)
+        time.sleep(0.3)
+        self.assertTrue(suspender.tripped)
+
+        self.signal.put(100)        # must stay back for debounce_s
+        self.assertTrue(suspender.tripped)
+        time.sleep(0.3)
+        self.assertFalse(suspender.tripped)
+
+    def test_min_interval(self):
+        suspender = self.install(allow_resume=True, min_interval_s=0.2)
+        self.signal.put(101)        # evaluated now
+        self.assertTrue(suspender.tripped)
+        self.signal.put(102)        # later, using the latest value
+        self.signal.put(100)
+        self.assertTrue(suspender.tripped)
+        time.sleep(0.3)
+        self.assertFalse(suspender.tripped)
+
+    def test_hysteresis(self):
+        suspender = self.install(
+            allow_resume=True, tolerance=0.5, resume_tolerance=0.1)
+        self.signal.put(100.4)
+        self.assertFalse(suspender.tripped)
+        self.signal.put(100.6)
+        self.assertTrue(suspender.tripped)
+        self.signal.put(100.3)      # inside tolerance, not resume_tolerance
+        self.assertTrue(suspender.tripped)
+        self.signal.put(100.05)
+        self.assertFalse(suspender.tripped)
+        with self.assertRaises(ValueError):
+            SuspendWhenChanged(self.signal, tolerance=0.1, resume_tolerance=0.5)
+
+    def test_shared_subscription(self):
+        n_subs = len(self.signal._callbacks["value"])
+        first = self.install()
+        second = self.install(debounce_s=0.2)
+        self.assertEqual(len(self.signal._callbacks["value"]), n_subs + 1)
+        self.signal.put(101)
+        self.assertTrue(first.tripped)
+        self.assertFalse(second.tripped)
+        first.remove()
+        second.remove()
+        self.suspenders = []
+        self.assertEqual(len(self.signal._callbacks["value"]), n_subs)
+        self.assertNotIn(self.signal, APS_suspenders._SignalDispatcher._registry)
+
+        # a suspender installed later receives the latest value
+        first = self.install()
+        self.assertFalse(first.tripped)
+        third = SuspendWhenChanged(self.signal, expected_value=100)
+        third.install(self.RE)
+        self.suspenders.append(third)
+        self.assertTrue(third.tripped)
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_SuspendWhenChanged,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,291 @@
+
+"""
+unit tests for the simulated synApps records
+"""
+
+import numpy as np
+import os
+import sys
+import tempfile
+import json
+import time
+import unittest
+from unittest import mock
+
+_path = os.path.dirname(__file__)
+_path = os.path.join(_path, '..')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from bluesky import RunEngine
+from ophyd.sim import make_fake_device
+from apstools.plans import sscan_1D
+from apstools.synApps_ophyd import bulk
+from apstools.synApps_ophyd import sim
+from apstools.synApps_ophyd import sscan
+from apstools.synApps_ophyd import swait
+
+
+class Test_CalcExpressions(unittest.TestCase):
+
+    def test_arithmetic(self):
+        values = dict(A=2, B=3, C=4)
+        self.assertEqual(sim.compile_calc("A+B*C")(values), 14)
+        self.assertEqual(sim.compile_calc("(a+b)*c")(values), 20)
+        self.assertEqual(sim.compile_calc("C^A")(values), 16)
+        self.assertEqual(sim.compile_calc("(B+1) % A")(values), 0)
+        self.assertEqual(sim.compile_calc("max(A,B,C)-abs(-1)")(values), 3)
+        self.assertAlmostEqual(sim.compile_calc("exp(-(A-B)^2)")(values), np.exp(-1))
+
+    def test_logic(self):
+        values = dict(A=2, B=3)
+        self.assertEqual(sim.compile_calc("A>B?A:B")(values), 3)
+        self.assertEqual(sim.compile_calc("A=2&&B#2")(values), 1)
+        self.assertEqual(sim.compile_calc("!(A<B)")(values), 0)
+
+    def test_random(self):
+        f = sim.compile_calc("RNDM")
+        sim.sim_pv_database.seed(7)
+        first = [f({}) for _ in range(3)]
+        sim.sim_pv_database.seed(7)
+        self.assertEqual([f({}) for _ in range(3)], first)
+        self.assertTrue(all(0 <= x < 1 for x in first))
+        sim.sim_pv_database.seed()
+
+    def test_errors(self):
+        self.assertTrue(np.isnan(sim.compile_calc("1/0")({})))
+        self.assertRaises(ValueError, sim.compile_calc, "A+")
+        self.assertRaises(ValueError, sim.compile_calc, "NOSUCH(A)")
+
+
+class Test_SimRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.m1 = sim.sim_pv_database.create("sim:m1", 0)
+        self.calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+        self.scans = sim.SimSscanDevice("sim:", name="scans")
+
+    def tearDown(self):
+        self.calcs.destroy()
+        self.scans.destroy()
+
+    def test_swait_process(self):
+        calc = self.calcs.calc1
+        calc.channels.A.input_pv.put("sim:m1")
+        calc.channels.B.value.put(5)
+        calc.calc.put("A*10+B")
+        self.m1.put(2)
+        calc.process.put(1)
+        self.assertEqual(calc.val.get(), 25)
+
+        calc.scan.put("I/O Intr")
+        self.m1.put(3)
+        self.assertEqual(calc.val.get(), 35)
+
+        self.calcs.enable.put(0)
+        self.m1.put(4)
+        self.assertEqual(calc.val.get(), 35)
+
+    def test_swait_templates(self):
+        swait.swait_apply_templates({
+            self.calcs.calc1: swait.swait_template_random_number(),
+            self.calcs.calc2: swait.swait_template_incrementer(scan="Passive"),
+            })
+        self.assertEqual(self.calcs.calc1.calc.get(), "RNDM")
+        self.assertEqual(self.calcs.calc2.channels.A.input_pv.get(), "sim:userCalc2")
+        for _ in range(3):
+            self.calcs.calc2.process.put(1)
+        self.assertEqual(self.calcs.calc2.val.get(), 3)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "calcs.json")
+            swait.swait_export_configuration(self.calcs, filename)
+            self.calcs.reset()
+            self.assertEqual(self.calcs.calc1.calc.get(), "0")
+            swait.swait_import_configuration(self.calcs, filename)
+        self.assertEqual(self.calcs.calc1.calc.get(), "RNDM")
+        self.assertEqual(self.calcs.calc2.calc.get(), "(A+1) % B")
+
+    def test_swait_unreadable_fields(self):
+        calc = self.calcs.calc1
+        calc.desc.put("exported")
+        calc.calc.put("A+2")
+        bulk_get = swait.bulk_get
+
+        def not_all_read(signals, **kwargs):
+            values = bulk_get(signals, **kwargs)
+            values[calc.desc] = None        # could not read this one
+            return values
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "calcs.json")
+            with mock.patch.object(swait, "bulk_get", not_all_read):
+                configuration = swait.swait_export_configuration(calc, filename)
+            self.assertNotIn("desc", configuration["calc1"])
+            self.assertEqual(configuration["calc1"]["calc"], "A+2")
+
+            calc.desc.put("changed")
+            calc.calc.put("0")
+            swait.swait_import_configuration(calc, filename)
+            self.assertEqual(calc.desc.get(), "sim:userCalc1")  # default, not None
+            self.assertEqual(calc.calc.get(), "A+2")
+
+            # file with null values (such as from an older export)
+            with open(filename, "w") as fp:
+                json.dump({"calc1": {"desc": None, "calc": "A+3"}}, fp)
+            calc.desc.put("changed")
+            swait.swait_import_configuration(calc, filename)
+        self.assertEqual(calc.desc.get(), "sim:userCalc1")
+        self.assertEqual(calc.calc.get(), "A+3")
+
+    def test_swait_reset_channels(self):
+        calc = self.calcs.calc1
+        calc.channels.read_attrs = []   # channels not read
+        calc.channels.A.input_pv.put("sim:m1")
+        targets = calc.reset_targets()
+        self.assertIn(calc.channels.A.input_pv, targets)
+        self.assertIn(calc.channels.L.value, targets)
+        calc.reset()
+        self.assertEqual(calc.channels.A.input_pv.get(), "")
+
+    def test_sscan_1D(self):
+        calc = self.calcs.calc1
+        calc.channels.A.input_pv.put("sim:m1")
+        calc.calc.put("exp(-A*A)")
+
+        scan = self.scans.scan1
+        scan.number_points.put(21)
+        scan.positioners.p1.setpoint_pv.put("sim:m1")
+        scan.positioners.p1.start.put(-2)
+        scan.positioners.p1.end.put(2)
+        scan.triggers.t1.trigger_pv.put("sim:userCalc1.PROC")
+        scan.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+        scan.point_delay_s = 0.002
+
+        save_data = sim.SimSaveData("sim:saveData_", name="save_data")
+        save_data.base_name.put("sim_")
+        save_data.next_scan_number.put(5)
+        save_data.watch(scan)
+
+        documents = []
+        RE = RunEngine({})
+        RE(sscan_1D(scan), lambda key, doc: documents.append((key, doc)))
+        events = [doc for key, doc in documents if key == "event"]
+        self.assertGreater(len(events), 0)
+        self.assertEqual(scan.current_point.get(), 21)
+        self.assertEqual(scan.scan_phase.get(), 0)
+        self.assertEqual(scan.execute_scan.get(), 0)
+
+        x = scan.positioners.p1.array.get()[:21]
+        y = scan.detectors.d01.array.get()[:21]
+        self.assertTrue(np.allclose(x, np.linspace(-2, 2, 21)))
+        self.assertTrue(np.allclose(y, np.exp(-x*x)))
+
+        self.assertEqual(save_data.full_name.get(), "sim_0005.mda")
+        self.assertEqual(save_data.next_scan_number.get(), 6)
+
+    def test_sscan_channel_monitors(self):
+        scan = self.scans.scan1
+        scan.detectors.d01.input_pv.put("sim:userCalc1.VAL")
+        scan.select_channels(refresh=True)
+        self.assertEqual(scan.channel_selection["detectors"], ["d01"])
+        signal = scan._channel_pv_monitors["sim:scan1.D01PV"]
+        self.assertIs(signal, scan.detectors.d01.input_pv)
+
+        scan.detectors.d01.input_pv.put("sim:userCalc2.VAL")
+        self.assertIsNone(scan._channel_selection)
+
+    def test_busy(self):
+        busy = sim.SimBusyRecord("sim:busy", name="busy")
+        busy.busy_time_s = 0.01
+        busy.output_link.put("sim:userCalc1.PROC")
+        busy.state.put("Busy")
+        time.sleep(0.1)
+        self.assertEqual(busy.state.get(), "Done")
+
+
+class Test_Bulk(unittest.TestCase):
+
+    def setUp(self):
+        self.calcs = sim.SimUserCalcsDevice("sim:", name="calcs")
+
+    def tearDown(self):
+        self.calcs.destroy()
+
+    def test_bulk_get(self):
+        calc = self.calcs.calc1
+        calc.calc.put("A+B")
+        calc.channels.B.value.put(2)
+        values = bulk.bulk_get([calc.calc, calc.channels.B.value])
+        self.assertEqual(list(values.values()), ["A+B", 2])
+
+    def test_bulk_put(self):
+        calc = self.calcs.calc1
+        calc.desc.put("unchanged")
+        writes = []
+        for signal in (calc.desc, calc.calc, calc.channels.A.value):
+            signal.subscribe(
+                lambda obj=None, **kw: writes.append(obj.name), run=False)
+
+        status = bulk.bulk_put({
+            calc.desc: "unchanged",
+            calc.calc: "A*2",
+            calc.channels.A.value: 3,
+            })
+        self.assertTrue(status.done and status.success)
+        self.assertEqual(calc.calc.get(), "A*2")
+        self.assertEqual(calc.channels.A.value.get(), 3)
+        self.assertNotIn(calc.desc.name, writes)
+
+        # all fields written when skip_unchanged=False
+        writes.clear()
+        bulk.bulk_put({calc.desc: "unchanged"}, skip_unchanged=False)
+        self.assertEqual(writes, [calc.desc.name])
+
+        status = bulk.bulk_put({})
+        self.assertTrue(status.done and status.success)
+
+
+class Test_LazySscan(unittest.TestCase):
+
+    def setUp(self):
+        record = make_fake_device(sscan.sscanRecord)
+        self.scan = record("fake:scan1", name="scan", lazy=True)
+
+    def test_reset_targets(self):
+        scan = self.scan
+        n_record = len(scan.reset_targets())
+        self.assertEqual(len(scan.detectors._signals), 0)
+
+        scan.detectors.d05      # created when used
+        self.assertEqual(len(scan.reset_targets()), n_record + 1)
+
+        pvname = "fake:scan1.D07PV"
+        scan._update_channel_selection({pvname: "sim:userCalc1.VAL"})
+        self.assertEqual(len(scan.reset_targets()), n_record + 2)
+        self.assertEqual(len(scan.detectors._signals), 2)
+        self.assertEqual(
+            sorted(scan._channel_pv_monitors),
+            ["fake:scan1.D05PV", "fake:scan1.D07PV"])
+
+        self.assertGreater(
+            len(scan.reset_targets(all_channels=True)), n_record + 100)
+        self.assertEqual(len(scan.detectors._signals), 70)
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        Test_CalcExpressions,
+        Test_SimRecords,
+        Test_Bulk,
+        Test_LazySscan,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())